@@ -129,6 +129,14 @@ def get_students_by_dept_semester(db: Session, department_id: int, semester_id:
     ).all()
 
 
+# Map legacy exam type strings to exam_type_id
+LEGACY_EXAM_TYPE_MAP = {
+    "Internal-1": 1,  # Mid-1
+    "Internal-2": 2,  # Mid-2
+    "Semester": 3     # Semester
+}
+
+
 def map_exam_type_to_session(db: Session, exam_type_str: str, semester_id: int, 
                              regulation_id: int, academic_year: str = "2024-25"):
     """
@@ -144,14 +152,7 @@ def map_exam_type_to_session(db: Session, exam_type_str: str, semester_id: int,
     Returns:
         ExamSession object or None
     """
-    # Map legacy exam type strings to exam_type_id
-    exam_type_map = {
-        "Internal-1": 1,  # Mid-1
-        "Internal-2": 2,  # Mid-2
-        "Semester": 3     # Semester
-    }
-    
-    exam_type_id = exam_type_map.get(exam_type_str)
+    exam_type_id = LEGACY_EXAM_TYPE_MAP.get(exam_type_str)
     if not exam_type_id:
         return None
     
@@ -163,6 +164,40 @@ def map_exam_type_to_session(db: Session, exam_type_str: str, semester_id: int,
     ).first()
 
 
+def map_exam_type_to_sessions(db: Session, exam_type_str: str, semester_id: int,
+                              regulation_ids, academic_year: str = "2024-25") -> dict:
+    """
+    Set-based variant of map_exam_type_to_session for bulk uploads.
+    
+    Args:
+        db: Database session
+        exam_type_str: Legacy exam type string ("Internal-1", "Internal-2", "Semester")
+        semester_id: Semester ID
+        regulation_ids: Regulation IDs to resolve in one query
+        academic_year: Academic year
+        
+    Returns:
+        Dictionary of regulation_id -> ExamSession (missing regulations are absent)
+    """
+    exam_type_id = LEGACY_EXAM_TYPE_MAP.get(exam_type_str)
+    regulation_ids = set(regulation_ids)
+    if not exam_type_id or not regulation_ids:
+        return {}
+    
+    sessions = db.query(ExamSession).filter(
+        ExamSession.exam_type_id == exam_type_id,
+        ExamSession.semester_id == semester_id,
+        ExamSession.regulation_id.in_(regulation_ids),
+        ExamSession.academic_year == academic_year
+    ).order_by(ExamSession.id).all()
+    
+    # Keep the first match per regulation, like .first() in the single-row helper
+    result = {}
+    for session in sessions:
+        result.setdefault(session.regulation_id, session)
+    return result
+
+
 def should_use_new_model(db: Session, teacher_id: int = None) -> bool:
     """
     Determine if new academic model should be used.
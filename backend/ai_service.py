@@ -2,31 +2,301 @@
 AI Service Module for Student Performance Summary Generation
 
 This module provides AI-powered natural language summaries of student performance
-using Google's Generative AI (Gemini). It includes graceful fallback to rule-based
+using a pluggable LLM backend (Gemini, an OpenAI-compatible endpoint or a local
+stub; see llm_backends.py). It includes graceful fallback to rule-based
 summaries when AI is unavailable.
 
 STRICT RULES:
 - READ-ONLY: No database writes
 - Uses existing marks and analysis data
 - Graceful degradation when AI unavailable
+
+AI responses are cached persistently (see ai_summary_cache.py), keyed by a hash
+of the input data plus the prompt version. Bump the *_PROMPT_VERSION constants
+whenever a prompt changes so stale text is not served.
+
+Routes use the async interface (agenerate_student_summary /
+agenerate_teacher_insights): blocking model calls run on a dedicated executor,
+at most AI_MAX_CONCURRENCY at a time, and the rule-based fallback is returned as
+soon as AI_TIMEOUT_SECONDS passes (time spent waiting for a slot included).
+
+All model calls go through a circuit breaker: after AI_BREAKER_FAILURE_THRESHOLD
+consecutive failures or slow calls it opens and the fallback is served without
+contacting the provider; after AI_BREAKER_RESET_SECONDS a limited number of
+half-open trial calls decide whether it closes again.
+
+Bulk generation (generate_summaries_batch, used by the precompute job) packs up
+to AI_BATCH_SIZE students into one prompt with JSON output and splits the reply
+back per student, falling back to single-student calls if parsing fails.
 """
 
 import os
+import asyncio
+import json
 import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
+
+from ai_summary_cache import content_key, get_summary_cache
+from llm_backends import JSON_KEYS_MARKER, LLMBackend, LLMBackendError, create_backend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import Google Generative AI
-try:
-    import google.generativeai as genai
-    GENAI_AVAILABLE = True
-except ImportError:
-    GENAI_AVAILABLE = False
-    logger.warning("google-generativeai not installed. AI summaries will use fallback mode.")
+
+# Part of the summary cache key; bump when the corresponding prompt changes
+STUDENT_PROMPT_VERSION = "1"
+TEACHER_PROMPT_VERSION = "1"
+
+# Students packed into one prompt by generate_summaries_batch (1 disables batching).
+# A K-student call asks for K times the output, so its request timeout and the
+# breaker's slow-call threshold are both scaled by K.
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "5"))
+
+# Concurrent model calls and per-call deadline (seconds) for the async interface
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "8"))
+
+# Circuit breaker: consecutive failures (or calls slower than AI_BREAKER_SLOW_CALL_SECONDS)
+# that open the circuit, how long it stays open, and concurrent half-open trial calls
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5"))
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
+AI_BREAKER_SLOW_CALL_SECONDS = float(os.getenv("AI_BREAKER_SLOW_CALL_SECONDS", "5"))
+AI_BREAKER_HALF_OPEN_CALLS = int(os.getenv("AI_BREAKER_HALF_OPEN_CALLS", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Tracks model call health and short-circuits calls while the provider is failing.
+    
+    closed -> open: failure_threshold consecutive failures or slow calls
+    open -> half_open: reset_seconds after opening; up to half_open_calls trial calls
+    half_open -> closed on a fast success, back to open on any failure or slow call
+    """
+    
+    def __init__(self, failure_threshold: int = AI_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = AI_BREAKER_RESET_SECONDS,
+                 slow_call_seconds: float = AI_BREAKER_SLOW_CALL_SECONDS,
+                 half_open_calls: int = AI_BREAKER_HALF_OPEN_CALLS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        """Close the circuit and zero all counters."""
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at: Optional[float] = None
+            self.half_open_in_flight = 0
+            self.successes = 0
+            self.failures = 0
+            self.slow_calls = 0
+            self.rejected = 0
+            self.times_opened = 0
+            self.last_failure: Optional[str] = None
+    
+    def allow_request(self) -> bool:
+        """Whether a model call may proceed; every allowed call must end in record_* or release."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self.half_open_in_flight = 0
+            if self.state == HALF_OPEN:
+                if self.half_open_in_flight >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self.half_open_in_flight += 1
+            return True
+    
+    def record_success(self, latency: float, slow_call_seconds: Optional[float] = None) -> None:
+        """slow_call_seconds overrides the threshold for calls with a larger budget (batches)."""
+        if latency > (self.slow_call_seconds if slow_call_seconds is None else slow_call_seconds):
+            with self._lock:
+                self.slow_calls += 1
+            self._record_bad(f"slow call ({latency:.1f}s)")
+            return
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.half_open_in_flight = 0
+                logger.info("AI circuit breaker closed")
+    
+    def record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self.failures += 1
+        self._record_bad(f"{type(error).__name__}: {error}")
+    
+    def release(self) -> None:
+        """Give back a half-open slot for a call that was cancelled before it finished."""
+        with self._lock:
+            if self.state == HALF_OPEN and self.half_open_in_flight > 0:
+                self.half_open_in_flight -= 1
+    
+    def _record_bad(self, reason: str) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_failure = reason
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"AI circuit breaker opened ({reason})")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.half_open_in_flight = 0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "slow_call_seconds": self.slow_call_seconds,
+                "reset_seconds": self.reset_seconds,
+                "retry_in_seconds": retry_in,
+                "successes": self.successes,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "last_failure": self.last_failure,
+            }
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get or create the global circuit breaker guarding model calls."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+
+def call_with_breaker(func, *args, cost: int = 1):
+    """
+    Run a blocking model call through the circuit breaker.
+    
+    cost: work units of the call (students in a batch); the slow-call threshold
+    is multiplied by it.
+    
+    Raises:
+        CircuitOpenError: If the circuit is open (the model is not called)
+    """
+    breaker = get_circuit_breaker()
+    if not breaker.allow_request():
+        raise CircuitOpenError("AI circuit breaker is open")
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+    except Exception as e:
+        breaker.record_failure(e)
+        raise
+    breaker.record_success(time.perf_counter() - start, breaker.slow_call_seconds * cost)
+    return result
+
+
+_ai_executor: Optional[ThreadPoolExecutor] = None
+_ai_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_ai_executor() -> ThreadPoolExecutor:
+    """Executor reserved for model calls, so they never occupy the request threadpool."""
+    global _ai_executor
+    if _ai_executor is None:
+        _ai_executor = ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="ai")
+    return _ai_executor
+
+
+def _get_ai_semaphore() -> asyncio.Semaphore:
+    # asyncio primitives belong to one event loop; keep one semaphore per loop
+    loop = asyncio.get_running_loop()
+    semaphore = _ai_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+        _ai_semaphores[loop] = semaphore
+    return semaphore
+
+
+async def run_with_deadline(func, *args, timeout: Optional[float] = None):
+    """
+    Run a blocking model call on the AI executor under the concurrency limit
+    and the circuit breaker.
+    
+    Only the backend call itself is judged by the breaker: running out of time
+    while waiting for a local slot raises TimeoutError without counting as a
+    failure, so a burst of our own requests cannot open the circuit.
+    
+    A slot is held until the executor thread finishes, not until the caller
+    stops waiting: a timed-out call keeps running in the background, so its
+    slot only frees once it returns. At most AI_MAX_CONCURRENCY calls are ever
+    in flight, and a started call never queues behind abandoned ones.
+    
+    Raises:
+        CircuitOpenError: If the circuit is open (the model is not called)
+        asyncio.TimeoutError: If waiting for a slot plus the call exceed the deadline.
+            The abandoned call finishes in the background (the model request
+            carries its own timeout, so the worker is not held indefinitely).
+    """
+    timeout = AI_TIMEOUT_SECONDS if timeout is None else timeout
+    breaker = get_circuit_breaker()
+    if not breaker.allow_request():
+        raise CircuitOpenError("AI circuit breaker is open")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    semaphore = _get_ai_semaphore()
+    
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        breaker.release()  # queue wait only: the backend was never called
+        raise
+    
+    def _finished(f: asyncio.Future) -> None:
+        semaphore.release()
+        if not f.cancelled():
+            f.exception()  # retrieved here so an abandoned call's error is not reported as unhandled
+    
+    # Latency is measured from slot acquisition, so our own queueing does not trip the breaker
+    start = time.perf_counter()
+    call = loop.run_in_executor(_get_ai_executor(), func, *args)
+    call.add_done_callback(_finished)
+    try:
+        # shield: a timeout abandons the call but must not mark it done (which would free the slot)
+        result = await asyncio.wait_for(asyncio.shield(call), max(0.0, deadline - loop.time()))
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        breaker.record_failure(e)
+        raise
+    breaker.record_success(time.perf_counter() - start)
+    return result
 
 
 class AIPerformanceSummarizer:
@@ -35,25 +305,12 @@ class AIPerformanceSummarizer:
     Falls back to rule-based summaries when AI is unavailable.
     """
     
-    def __init__(self):
-        """Initialize the AI service with API key if available."""
-        self.ai_enabled = False
-        self.model = None
-        
-        if GENAI_AVAILABLE:
-            api_key = os.getenv("GEMINI_API_KEY")
-            if api_key:
-                try:
-                    genai.configure(api_key=api_key)
-                    self.model = genai.GenerativeModel('gemini-pro')
-                    self.ai_enabled = True
-                    logger.info("AI service initialized with Gemini API")
-                except Exception as e:
-                    logger.error(f"Failed to initialize Gemini API: {e}")
-            else:
-                logger.info("GEMINI_API_KEY not found. Using fallback mode.")
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        """Initialize the AI service with the given backend, or the one configured by AI_BACKEND."""
+        self.backend = backend if backend is not None else create_backend()
+        self.ai_enabled = self.backend is not None
     
-    def generate_summary(self, student_data: Dict[str, Any]) -> Dict[str, Any]:
+    def generate_summary(self, student_data: Dict[str, Any], check_cache: bool = True) -> Dict[str, Any]:
         """
         Generate performance summary for a student.
         
@@ -67,6 +324,7 @@ class AIPerformanceSummarizer:
                 - weak_subjects: list of dicts with name and percentage
                 - exam_trend: str (improving/stable/declining)
                 - backlogs: int
+            check_cache: False when the caller already looked the key up (skips a second read)
         
         Returns:
             Dictionary with:
@@ -77,14 +335,25 @@ class AIPerformanceSummarizer:
         timestamp = datetime.utcnow().isoformat() + "Z"
         
         try:
-            if self.ai_enabled and self.model:
+            if self.ai_enabled and self.backend:
+                # Unchanged data: reuse the stored text and its original timestamp
+                cache = get_summary_cache()
+                cache_key = content_key("student_summary", student_data, STUDENT_PROMPT_VERSION)
+                cached = cache.get(cache_key) if check_cache else None
+                if cached is not None:
+                    return cached
+                
                 # Try AI generation
-                summary_text = self._generate_ai_summary(student_data)
-                return {
+                summary_text = call_with_breaker(self._generate_ai_summary, student_data)
+                result = {
                     "summary": summary_text,
                     "generated_at": timestamp,
                     "source": "ai"
                 }
+                cache.put(cache_key, result)
+                return result
+        except CircuitOpenError:
+            pass
         except Exception as e:
             logger.warning(f"AI generation failed: {e}. Falling back to rule-based summary.")
         
@@ -96,6 +365,108 @@ class AIPerformanceSummarizer:
             "source": "fallback"
         }
     
+    async def agenerate_summary(self, student_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of generate_summary for use from request handlers.
+        
+        Same response shape; returns the rule-based summary immediately once
+        the deadline passes instead of waiting on the model.
+        """
+        timestamp = datetime.utcnow().isoformat() + "Z"
+        
+        if self.ai_enabled and self.backend:
+            cache = get_summary_cache()
+            cache_key = content_key("student_summary", student_data, STUDENT_PROMPT_VERSION)
+            # The cache is a SQLite file (locks, commits): keep it off the event loop
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                return cached
+            
+            try:
+                summary_text = await run_with_deadline(self._generate_ai_summary, student_data)
+                result = {
+                    "summary": summary_text,
+                    "generated_at": timestamp,
+                    "source": "ai"
+                }
+                await asyncio.to_thread(cache.put, cache_key, result)
+                return result
+            except CircuitOpenError:
+                pass
+            except asyncio.TimeoutError:
+                logger.warning(f"AI generation exceeded {AI_TIMEOUT_SECONDS}s. Falling back to rule-based summary.")
+            except Exception as e:
+                logger.warning(f"AI generation failed: {e}. Falling back to rule-based summary.")
+        
+        return {
+            "summary": self._generate_fallback_summary(student_data),
+            "generated_at": timestamp,
+            "source": "fallback"
+        }
+    
+    def generate_summaries_batch(self, students: List[Dict[str, Any]],
+                                 throttle: Optional[Callable[[], None]] = None,
+                                 check_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Generate summaries for many students with one model call per AI_BATCH_SIZE students.
+        
+        Cached students are returned as-is. Each group of misses is sent as a
+        single prompt asking for a JSON object keyed by student reference; if the
+        call fails or the reply cannot be split, that group falls back to
+        generate_summary per student.
+        
+        Args:
+            students: List of student_data dictionaries (see generate_summary)
+            throttle: Optional callable invoked before every model call (rate limiting)
+            check_cache: False when the caller already knows these students are not cached
+        
+        Returns:
+            List of summary dictionaries, in input order
+        """
+        if not (self.ai_enabled and self.backend):
+            return [self.generate_summary(data) for data in students]
+        
+        timestamp = datetime.utcnow().isoformat() + "Z"
+        cache = get_summary_cache()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(students)
+        pending = []
+        for index, data in enumerate(students):
+            cache_key = content_key("student_summary", data, STUDENT_PROMPT_VERSION)
+            cached = cache.get(cache_key) if check_cache else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, cache_key, data))
+        
+        batch_size = max(1, AI_BATCH_SIZE)
+        for start in range(0, len(pending), batch_size):
+            group = pending[start:start + batch_size]
+            texts = None
+            if len(group) > 1:
+                try:
+                    if throttle:
+                        throttle()
+                    texts = self._generate_ai_batch([data for _, _, data in group])
+                except CircuitOpenError:
+                    pass
+                except Exception as e:
+                    logger.warning(f"Batched AI generation failed: {e}. Falling back to single-student calls.")
+            
+            for position, (index, cache_key, data) in enumerate(group):
+                if texts is not None:
+                    results[index] = {
+                        "summary": texts[position],
+                        "generated_at": timestamp,
+                        "source": "ai"
+                    }
+                    cache.put(cache_key, results[index])
+                    continue
+                if throttle and get_circuit_breaker().state != OPEN:
+                    throttle()
+                results[index] = self.generate_summary(data, check_cache=False)
+        
+        return results
+    
     def _construct_prompt(self, student_data: Dict[str, Any]) -> str:
         """
         Construct a structured prompt for the LLM.
@@ -154,7 +525,7 @@ Keep the tone supportive and constructive. Limit to 150 words.
     
     def _generate_ai_summary(self, student_data: Dict[str, Any]) -> str:
         """
-        Generate summary using Gemini AI.
+        Generate summary using the configured LLM backend.
         
         Args:
             student_data: Student performance data
@@ -166,20 +537,68 @@ Keep the tone supportive and constructive. Limit to 150 words.
             Exception: If AI generation fails
         """
         prompt = self._construct_prompt(student_data)
+        return _generate_text(self.backend, prompt)
+    
+    def _construct_batch_prompt(self, students: List[Dict[str, Any]], refs: List[str]) -> str:
+        """
+        Construct one prompt for several students.
+        
+        The instructions appear once; each student is a compact one-line block.
         
-        # Generate content with timeout and safety settings
-        response = self.model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                max_output_tokens=300,
-                temperature=0.7,
-            )
+        Args:
+            students: Student performance data dictionaries
+            refs: Reference keys (one per student) expected in the JSON reply
+        
+        Returns:
+            Formatted prompt string
+        """
+        def subjects_text(subjects):
+            if not subjects:
+                return "-"
+            return ", ".join(f"{s['name']} ({s['percentage']:.1f}%)" for s in subjects[:3])
+        
+        blocks = "\n".join(
+            f"{ref} | {data.get('total_subjects', 0)} | {data.get('current_semester', 'N/A')} | "
+            f"{data.get('average_percentage', 0):.1f}% | {data.get('backlogs', 0)} | "
+            f"{data.get('exam_trend', 'stable')} | {subjects_text(data.get('strong_subjects'))} | "
+            f"{subjects_text(data.get('weak_subjects'))}"
+            for ref, data in zip(refs, students)
         )
         
-        if not response or not response.text:
-            raise Exception("Empty response from AI model")
+        prompt = f"""You are an academic advisor analyzing performance data for several students.
+
+For EACH student below, write a concise, encouraging performance summary including:
+1. Overall performance assessment
+2. Recognition of strong subjects
+3. Areas needing improvement
+4. Actionable study suggestions (non-prescriptive)
+5. Motivational closing remark
+
+Keep the tone supportive and constructive. Limit each summary to 150 words.
+
+Students (ref | total subjects | current semester | overall average | backlogs | exam trend | strong subjects ≥75% | weak subjects <50%):
+{blocks}
+
+Respond with ONLY a JSON object mapping each ref to its summary text.
+{JSON_KEYS_MARKER} {", ".join(refs)}
+"""
+        return prompt
+    
+    def _generate_ai_batch(self, students: List[Dict[str, Any]]) -> List[str]:
+        """
+        Generate summaries for a group of students with one model call.
         
-        return response.text.strip()
+        Raises:
+            CircuitOpenError: If the circuit is open
+            ValueError: If the reply is not a JSON object with a summary per ref
+            Exception: If AI generation fails
+        """
+        refs = [f"S{i + 1}" for i in range(len(students))]
+        prompt = self._construct_batch_prompt(students, refs)
+        # K students: K times the output tokens, so K times the time budget
+        reply = call_with_breaker(_generate_text, self.backend, prompt, 300 * len(students),
+                                  AI_TIMEOUT_SECONDS * len(students), cost=len(students))
+        return _parse_batch_reply(reply, refs)
     
     def _generate_fallback_summary(self, student_data: Dict[str, Any]) -> str:
         """
@@ -303,15 +722,26 @@ def generate_teacher_insights(class_data: Dict[str, Any]) -> Dict[str, Any]:
     }
     
     try:
-        if summarizer.ai_enabled and summarizer.model:
+        if summarizer.ai_enabled and summarizer.backend:
+            # Unchanged data: reuse the stored text and its original timestamp
+            cache = get_summary_cache()
+            cache_key = content_key("teacher_insights", class_data, TEACHER_PROMPT_VERSION)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             # Try AI generation
-            insights_text = _generate_ai_teacher_insights(summarizer.model, class_data)
-            return {
+            insights_text = call_with_breaker(_generate_ai_teacher_insights, summarizer.backend, class_data)
+            result = {
                 "insights": insights_text,
                 "generated_at": timestamp,
                 "scope": scope,
                 "source": "ai"
             }
+            cache.put(cache_key, result)
+            return result
+    except CircuitOpenError:
+        pass
     except Exception as e:
         logger.warning(f"AI generation failed for teacher insights: {e}. Falling back.")
     
@@ -325,6 +755,71 @@ def generate_teacher_insights(class_data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+async def agenerate_student_summary(student_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async variant of generate_student_summary (bounded concurrency, per-call deadline).
+    
+    Args:
+        student_data: Student performance data dictionary
+    
+    Returns:
+        Summary dictionary with 'summary', 'generated_at', and 'source' fields
+    """
+    summarizer = get_summarizer()
+    return await summarizer.agenerate_summary(student_data)
+
+
+async def agenerate_teacher_insights(class_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async variant of generate_teacher_insights (bounded concurrency, per-call deadline).
+    
+    Args:
+        class_data: Class performance data (see generate_teacher_insights)
+    
+    Returns:
+        Dictionary with 'insights', 'generated_at', 'scope' and 'source' fields
+    """
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    summarizer = get_summarizer()
+    
+    scope = {
+        "subject": class_data.get("subject_name", "Unknown"),
+        "section": class_data.get("section_name", "Unknown"),
+        "academic_year": class_data.get("academic_year", "Unknown")
+    }
+    
+    if summarizer.ai_enabled and summarizer.backend:
+        cache = get_summary_cache()
+        cache_key = content_key("teacher_insights", class_data, TEACHER_PROMPT_VERSION)
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            insights_text = await run_with_deadline(_generate_ai_teacher_insights, summarizer.backend, class_data)
+            result = {
+                "insights": insights_text,
+                "generated_at": timestamp,
+                "scope": scope,
+                "source": "ai"
+            }
+            await asyncio.to_thread(cache.put, cache_key, result)
+            return result
+        except CircuitOpenError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning(f"AI generation for teacher insights exceeded {AI_TIMEOUT_SECONDS}s. Falling back.")
+        except Exception as e:
+            logger.warning(f"AI generation failed for teacher insights: {e}. Falling back.")
+    
+    return {
+        "insights": _generate_fallback_teacher_insights(class_data),
+        "generated_at": timestamp,
+        "scope": scope,
+        "source": "fallback"
+    }
+
+
 def _construct_teacher_prompt(class_data: Dict[str, Any]) -> str:
     """
     Construct a structured prompt for teacher class insights.
@@ -388,12 +883,47 @@ Keep the tone professional and constructive. Limit to 150 words.
     return prompt
 
 
-def _generate_ai_teacher_insights(model, class_data: Dict[str, Any]) -> str:
+def _generate_text(backend: LLMBackend, prompt: str, max_output_tokens: int = 300,
+                   timeout: Optional[float] = None) -> str:
+    """Run a prompt on the backend (the request carries the AI deadline as its own timeout)."""
+    text = backend.generate(prompt, max_output_tokens=max_output_tokens, temperature=0.7,
+                            timeout=AI_TIMEOUT_SECONDS if timeout is None else timeout)
+    if not text or not text.strip():
+        raise LLMBackendError("Empty response from AI model")
+    return text.strip()
+
+
+def _parse_batch_reply(reply: str, refs: List[str]) -> List[str]:
+    """
+    Split a batched JSON reply into one summary per ref (in ref order).
+    
+    Tolerates surrounding prose or ``` fences around the JSON object.
+    
+    Raises:
+        ValueError: If the reply has no JSON object or a ref is missing/empty
     """
-    Generate insights using Gemini AI.
+    start, end = reply.find("{"), reply.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object in batched reply")
+    parsed = json.loads(reply[start:end + 1])
+    if not isinstance(parsed, dict):
+        raise ValueError("Batched reply is not a JSON object")
+    
+    texts = []
+    for ref in refs:
+        text = parsed.get(ref)
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError(f"Batched reply has no summary for {ref}")
+        texts.append(text.strip())
+    return texts
+
+
+def _generate_ai_teacher_insights(backend: LLMBackend, class_data: Dict[str, Any]) -> str:
+    """
+    Generate insights using the configured LLM backend.
     
     Args:
-        model: Gemini model instance
+        backend: LLM backend instance
         class_data: Class performance data
     
     Returns:
@@ -403,20 +933,7 @@ def _generate_ai_teacher_insights(model, class_data: Dict[str, Any]) -> str:
         Exception: If AI generation fails
     """
     prompt = _construct_teacher_prompt(class_data)
-    
-    # Generate content
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.types.GenerationConfig(
-            max_output_tokens=300,
-            temperature=0.7,
-        )
-    )
-    
-    if not response or not response.text:
-        raise Exception("Empty response from AI model")
-    
-    return response.text.strip()
+    return _generate_text(backend, prompt)
 
 
 def _generate_fallback_teacher_insights(class_data: Dict[str, Any]) -> str:
@@ -0,0 +1,163 @@
+"""
+AI Summary Cache
+
+Persistent cache for AI-generated summaries/insights, backed by a local SQLite
+file (separate from the application database). Entries are keyed by a stable
+hash of the input data dict plus the prompt version, so a repeat view of
+unchanged marks returns the stored text (with its original generated_at)
+instead of paying LLM latency and API cost again.
+
+Configuration (environment):
+- AI_SUMMARY_CACHE_PATH: cache file (default: backend/ai_summary_cache.db)
+- AI_SUMMARY_CACHE_TTL: seconds an entry stays valid (default: 86400, 0 disables)
+- AI_SUMMARY_CACHE_MAX_ENTRIES: size limit, least recently used evicted (default: 10000)
+- AI_SUMMARY_CACHE_TOUCH_INTERVAL: a hit refreshes accessed_at (a write + commit) only
+  when it is older than this many seconds (default: 300), so repeat views stay read-only;
+  LRU eviction order is approximate to within this interval
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.getenv("AI_SUMMARY_CACHE_PATH", os.path.join(BASE_DIR, "ai_summary_cache.db"))
+DEFAULT_TTL = int(os.getenv("AI_SUMMARY_CACHE_TTL", "86400"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("AI_SUMMARY_CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_TOUCH_INTERVAL = float(os.getenv("AI_SUMMARY_CACHE_TOUCH_INTERVAL", "300"))
+
+
+def content_key(kind: str, data: Dict[str, Any], prompt_version: str) -> str:
+    """Stable hash of the input data dict (key order independent) plus prompt version."""
+    payload = json.dumps(
+        {"kind": kind, "prompt_version": prompt_version, "data": data},
+        sort_keys=True, default=str, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """SQLite-backed TTL + LRU cache of generated summary responses."""
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl_seconds: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, touch_interval: float = DEFAULT_TOUCH_INTERVAL):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_summary_cache_accessed_at ON summary_cache (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored response for `key`, or None if missing/expired."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT response, created_at, accessed_at FROM summary_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[1] >= self.ttl_seconds:
+                    if row is not None:
+                        conn.execute("DELETE FROM summary_cache WHERE key = ?", (key,))
+                        conn.commit()
+                    self.misses += 1
+                    return None
+                if now - row[2] >= self.touch_interval:
+                    conn.execute("UPDATE summary_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+        except sqlite3.Error as e:
+            logger.warning(f"AI summary cache read failed: {e}")
+            return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response, evicting the least recently used entries beyond max_entries."""
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO summary_cache (key, response, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(response), now, now)
+                )
+                conn.execute(
+                    "DELETE FROM summary_cache WHERE key IN ("
+                    "  SELECT key FROM summary_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self.max_entries,)
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"AI summary cache write failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM summary_cache")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global instance for reuse
+_cache_instance: Optional[SummaryCache] = None
+
+
+def get_summary_cache() -> SummaryCache:
+    """Get or create the global summary cache."""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = SummaryCache()
+    return _cache_instance
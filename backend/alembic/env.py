@@ -18,6 +18,7 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
+import os
 import sys
 from pathlib import Path
 # Add parent directory to path to import models
@@ -25,11 +26,16 @@ backend_dir = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(backend_dir))
 
 # Import Base from database module (not models, to avoid circular import)
-from database import Base
+from database import Base, SQLALCHEMY_DATABASE_URL, is_sqlite_url
 # Import all models to ensure they're registered
 import models
 target_metadata = Base.metadata
 
+# DATABASE_URL (see database.py) wins over alembic.ini, so migrations target
+# the same database as the app; '%' is escaped for ConfigParser interpolation
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL.replace("%", "%%"))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -75,7 +81,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            # SQLite cannot ALTER constraints in place; autogenerate batch ops there
+            render_as_batch=is_sqlite_url(str(connection.engine.url))
         )
 
         with context.begin_transaction():
@@ -55,7 +55,7 @@ def upgrade() -> None:
         sa.Column('code', sa.String(), nullable=False),
         sa.Column('description', sa.Text(), nullable=True),
         sa.Column('start_year', sa.Integer(), nullable=False),
-        sa.Column('active', sa.Boolean(), nullable=True, server_default='1'),
+        sa.Column('active', sa.Boolean(), nullable=True, server_default=sa.true()),
         sa.Column('institute_id', sa.Integer(), nullable=True),
         sa.ForeignKeyConstraint(['institute_id'], ['institutes.id'], ),
         sa.PrimaryKeyConstraint('id'),
@@ -67,8 +67,8 @@ def upgrade() -> None:
     op.execute("""
         INSERT INTO regulations (code, description, start_year, active, institute_id)
         VALUES 
-            ('R20', 'Regulation 2020', 2020, 0, 1),
-            ('R23', 'Regulation 2023', 2023, 1, 1)
+            ('R20', 'Regulation 2020', 2020, FALSE, 1),
+            ('R23', 'Regulation 2023', 2023, TRUE, 1)
     """)
     
     # ========================================================================
@@ -79,7 +79,7 @@ def upgrade() -> None:
         sa.Column('id', sa.Integer(), nullable=False),
         sa.Column('name', sa.String(), nullable=False),
         sa.Column('conducted_by', sa.String(), nullable=False),
-        sa.Column('counts_for_internal', sa.Boolean(), nullable=True, server_default='0'),
+        sa.Column('counts_for_internal', sa.Boolean(), nullable=True, server_default=sa.false()),
         sa.Column('default_max_marks', sa.Float(), nullable=True),
         sa.PrimaryKeyConstraint('id'),
         sa.UniqueConstraint('name')
@@ -89,10 +89,10 @@ def upgrade() -> None:
     op.execute("""
         INSERT INTO exam_types (name, conducted_by, counts_for_internal, default_max_marks)
         VALUES 
-            ('Mid-1', 'college', 1, 30.0),
-            ('Mid-2', 'college', 1, 30.0),
-            ('Semester', 'university', 0, 70.0),
-            ('Slip Test', 'college', 1, 10.0)
+            ('Mid-1', 'college', TRUE, 30.0),
+            ('Mid-2', 'college', TRUE, 30.0),
+            ('Semester', 'university', FALSE, 70.0),
+            ('Slip Test', 'college', TRUE, 10.0)
     """)
 
 
@@ -79,12 +79,12 @@ def upgrade() -> None:
     # TABLE 3: users - Add active status flag
     # ========================================================================
     op.add_column('users', sa.Column('is_active', sa.Boolean(), 
-                                      nullable=True, server_default='1'))
+                                      nullable=True, server_default=sa.true()))
     
     # Backfill users - all existing users are active
     op.execute("""
         UPDATE users 
-        SET is_active = 1
+        SET is_active = TRUE
         WHERE is_active IS NULL
     """)
     
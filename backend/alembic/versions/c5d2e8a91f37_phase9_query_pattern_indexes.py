@@ -0,0 +1,87 @@
+"""phase9_query_pattern_indexes
+
+Revision ID: c5d2e8a91f37
+Revises: 787dce8f06af
+Create Date: 2026-10-17 09:12:44.281530
+
+PHASE 9: Composite Indexes for the Hot Filters
+Adds indexes matching the column combinations the application filters on.
+
+New indexes:
+- uq_marks_student_subject_exam (UNIQUE) - marks(student_id, subject_id, exam_type)
+    * lookup in marks uploads; ON CONFLICT target for the marks upsert
+    * leading student_id also covers per-student transcript queries
+      (marks.student_id had no index)
+- ix_subject_offerings_teacher_subject_year - access_control offering lookups
+- ix_students_department_semester - legacy class roster filter
+- ix_students_section_id - section roster filter
+
+exam_sessions(exam_type_id, semester_id, regulation_id, academic_year) is
+already indexed by uq_exam_session_type_sem_reg_year (Phase 5); it is only
+created here for databases built with create_all that lack it.
+
+IMPORTANT: Duplicate marks rows (same student/subject/exam type) block the
+unique index. The upgrade stops with an error listing how many exist instead
+of choosing which mark to delete - resolve them by hand, then re-run.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8a91f37'
+down_revision: Union[str, Sequence[str], None] = '787dce8f06af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EXAM_SESSION_KEY = ['exam_type_id', 'semester_id', 'regulation_id', 'academic_year']
+
+
+def _has_exam_session_key(inspector) -> bool:
+    """True if exam_sessions already has a unique constraint/index on EXAM_SESSION_KEY."""
+    existing = inspector.get_unique_constraints('exam_sessions') + inspector.get_indexes('exam_sessions')
+    return any(item['column_names'] == EXAM_SESSION_KEY for item in existing)
+
+
+def upgrade() -> None:
+    """Create composite indexes and the marks uniqueness constraint."""
+    bind = op.get_bind()
+
+    duplicates = bind.execute(sa.text(
+        "SELECT COUNT(*) FROM (SELECT 1 FROM marks "
+        "GROUP BY student_id, subject_id, exam_type HAVING COUNT(*) > 1) AS dup"
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} student/subject/exam_type combinations have more than one marks row; "
+            "remove the duplicates before adding uq_marks_student_subject_exam"
+        )
+
+    op.create_index('uq_marks_student_subject_exam', 'marks',
+                    ['student_id', 'subject_id', 'exam_type'], unique=True)
+    op.create_index('ix_subject_offerings_teacher_subject_year', 'subject_offerings',
+                    ['teacher_id', 'subject_id', 'academic_year'], unique=False)
+    op.create_index('ix_students_department_semester', 'students',
+                    ['department_id', 'current_semester_id'], unique=False)
+    op.create_index(op.f('ix_students_section_id'), 'students', ['section_id'], unique=False)
+
+    if not _has_exam_session_key(sa.inspect(bind)):
+        op.create_index('uq_exam_session_type_sem_reg_year', 'exam_sessions',
+                        EXAM_SESSION_KEY, unique=True)
+
+
+def downgrade() -> None:
+    """Remove Phase 9 indexes (reverse migration)."""
+
+    # Phase 5's constraint is left in place; only the index created above is dropped
+    inspector = sa.inspect(op.get_bind())
+    if any(ix['name'] == 'uq_exam_session_type_sem_reg_year' and not ix.get('duplicates_constraint')
+           for ix in inspector.get_indexes('exam_sessions')):
+        op.drop_index('uq_exam_session_type_sem_reg_year', table_name='exam_sessions')
+
+    op.drop_index(op.f('ix_students_section_id'), table_name='students')
+    op.drop_index('ix_students_department_semester', table_name='students')
+    op.drop_index('ix_subject_offerings_teacher_subject_year', table_name='subject_offerings')
+    op.drop_index('uq_marks_student_subject_exam', table_name='marks')
@@ -1,11 +1,65 @@
+import os
 import pandas as pd
 import numpy as np
 
-def analyze_performance(student_id: int, marks_data: list, weak_threshold: float = 50.0):
+# "pandas" (default) or "numpy": the NumPy engine skips DataFrame construction,
+# which dominates for the small per-request inputs. Both return the same dicts.
+ANALYSIS_ENGINE = os.getenv("ANALYSIS_ENGINE", "pandas")
+ENGINES = ("pandas", "numpy")
+
+
+def _resolve_engine(engine):
+    engine = engine or ANALYSIS_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown analysis engine '{engine}' (expected one of {ENGINES})")
+    return engine
+
+
+def _factorize(keys):
+    """
+    Integer-code a sequence of group keys. Returns (sorted unique keys, codes);
+    codes follow the sorted order so results line up with pandas groupby.
+    """
+    index = {}
+    codes = np.fromiter((index.setdefault(k, len(index)) for k in keys), dtype=np.intp, count=len(keys))
+    uniques = list(index)
+    order = sorted(range(len(uniques)), key=uniques.__getitem__)
+    rank = np.empty(len(uniques), dtype=np.intp)
+    rank[order] = np.arange(len(uniques))
+    return [uniques[i] for i in order], rank[codes]
+
+
+def _grouped_mean(keys, values):
+    """
+    Mean of `values` per distinct key, NaN-skipping like pandas groupby().mean().
+    Returns (sorted unique keys, means).
+    """
+    uniques, codes = _factorize(keys)
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=len(uniques))
+    counts = np.bincount(codes[valid], minlength=len(uniques))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return uniques, means
+
+
+def _percentages(marks_data):
+    n = len(marks_data)
+    marks = np.fromiter((np.nan if d['marks'] is None else d['marks'] for d in marks_data), dtype=float, count=n)
+    total = np.fromiter((np.nan if d['total'] is None else d['total'] for d in marks_data), dtype=float, count=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (marks / total) * 100
+
+
+def analyze_performance(student_id: int, marks_data: list, weak_threshold: float = 50.0, engine: str = None):
     """
     Analyze student marks to identify weak subjects and trends.
     marks_data: List of dicts [{'subject': 'Math', 'marks': 50, 'total': 100, 'semester': '1-1'}, ...]
+    engine: "pandas" or "numpy" (defaults to ANALYSIS_ENGINE)
     """
+    if _resolve_engine(engine) == "numpy":
+        return _analyze_performance_numpy(marks_data, weak_threshold)
+
     if not marks_data:
         return {"weak_subjects": [], "trend": "Insufficent Data"}
 
@@ -40,11 +94,101 @@ def analyze_performance(student_id: int, marks_data: list, weak_threshold: float
         "average_percentage": df['percentage'].mean()
     }
 
-def analyze_class_performance(marks_data: list):
+def _analyze_performance_numpy(marks_data: list, weak_threshold: float):
+    """NumPy implementation of analyze_performance (integer-coded groups + bincount)."""
+    if not marks_data:
+        return {"weak_subjects": [], "trend": "Insufficent Data"}
+
+    percentage = _percentages(marks_data)
+
+    # 1. Weak Subject Identification (consistently < weak_threshold)
+    subjects, subject_avg = _grouped_mean([d['subject'] for d in marks_data], percentage)
+    weak_subjects = [s for s, avg in zip(subjects, subject_avg) if avg < weak_threshold]
+
+    # 2. Performance Trend (Semester wise average)
+    if any('semester' in d for d in marks_data):
+        # Rows without a semester are dropped, like pandas groupby
+        has_sem = np.array([d.get('semester') is not None for d in marks_data])
+        semesters = [d['semester'] for d in marks_data if d.get('semester') is not None]
+        if len(semesters):
+            sem_keys, sem_avg = _grouped_mean(semesters, percentage[has_sem])
+            sem_trend = {k: float(v) for k, v in zip(sem_keys, sem_avg)}
+        else:
+            sem_trend = {}
+
+        trend_values = list(sem_trend.values())
+        if len(trend_values) > 1:
+            trend = "improving" if trend_values[-1] > trend_values[0] else "declining"
+        else:
+            trend = "stable"
+    else:
+        sem_trend = {}
+        trend = "stable"
+
+    return {
+        "weak_subjects": weak_subjects,
+        "semester_trend": sem_trend,
+        "overall_trend": trend,
+        "average_percentage": np.float64(np.nanmean(percentage)) if np.any(~np.isnan(percentage)) else np.float64("nan")
+    }
+
+def analyze_many(marks_frame, weak_threshold: float = 50.0):
+    """
+    Run analyze_performance for many students in one grouped pass.
+    marks_frame: DataFrame (or list of dicts) with columns
+        student_id, subject, marks, total[, semester]
+    Returns: {student_id: <analyze_performance result>} for every student present.
+    """
+    if isinstance(marks_frame, list):
+        marks_frame = pd.DataFrame(marks_frame)
+    if marks_frame is None or marks_frame.empty:
+        return {}
+
+    df = marks_frame.assign(percentage=(marks_frame['marks'] / marks_frame['total']) * 100)
+
+    # 1. Weak subjects per student
+    subject_avg = df.groupby(['student_id', 'subject'])['percentage'].mean()
+    weak = subject_avg[subject_avg < weak_threshold]
+    weak_by_student = {}
+    for (student_id, subject), _ in weak.items():
+        weak_by_student.setdefault(student_id, []).append(subject)
+
+    # 2. Semester trend per student (first vs last semester average)
+    trend_by_student = {}
+    overall_by_student = {}
+    if 'semester' in df.columns:
+        sem_avg = df.groupby(['student_id', 'semester'])['percentage'].mean().sort_index()
+        for (student_id, semester), value in sem_avg.items():
+            trend_by_student.setdefault(student_id, {})[semester] = float(value)
+
+        ends = sem_avg.groupby(level=0).agg(['first', 'last', 'count'])
+        overall = np.where(ends['count'] > 1,
+                           np.where(ends['last'] > ends['first'], "improving", "declining"),
+                           "stable")
+        overall_by_student = dict(zip(ends.index, overall.tolist()))
+
+    # 3. Average percentage per student
+    average = df.groupby('student_id')['percentage'].mean()
+
+    return {
+        student_id: {
+            "weak_subjects": weak_by_student.get(student_id, []),
+            "semester_trend": trend_by_student.get(student_id, {}),
+            "overall_trend": overall_by_student.get(student_id, "stable"),
+            "average_percentage": np.float64(avg)
+        }
+        for student_id, avg in average.items()
+    }
+
+def analyze_class_performance(marks_data: list, engine: str = None):
     """
     Analyze performance for a whole class.
     marks_data: List of dicts [{'subject': 'Math', 'marks': 50, 'total': 100, 'student_id': 1}, ...]
+    engine: "pandas" or "numpy" (defaults to ANALYSIS_ENGINE)
     """
+    if _resolve_engine(engine) == "numpy":
+        return _analyze_class_performance_numpy(marks_data)
+
     if not marks_data:
         return {"subject_performance": {}, "weakest_subject": None}
 
@@ -54,6 +198,26 @@ def analyze_class_performance(marks_data: list):
     # Average percentage per subject
     subject_avg = df.groupby('subject')['percentage'].mean().to_dict()
     
+    return summarize_class_performance(subject_avg)
+
+
+
+def _analyze_class_performance_numpy(marks_data: list):
+    """NumPy implementation of analyze_class_performance."""
+    if not marks_data:
+        return {"subject_performance": {}, "weakest_subject": None}
+
+    subjects, subject_means = _grouped_mean([d['subject'] for d in marks_data], _percentages(marks_data))
+    subject_avg = {k: float(v) for k, v in zip(subjects, subject_means)}
+
+    return summarize_class_performance(subject_avg)
+
+
+def summarize_class_performance(subject_avg: dict):
+    """
+    Build the analyze_class_performance response from per-subject averages.
+    subject_avg: {subject_name: average_percentage} (e.g. aggregated in SQL)
+    """
     # Identify weakest subject (lowest average)
     try:
         weakest_subject = min(subject_avg, key=subject_avg.get)
@@ -64,4 +228,3 @@ def analyze_class_performance(marks_data: list):
         "subject_performance": subject_avg,
         "weakest_subject": weakest_subject
     }
-
@@ -1,12 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import schemas, database, models
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from sqlalchemy.orm.attributes import NO_VALUE
+import database, models, password_service
+from principal_cache import Principal, principal_cache
 
 # Secret key and algorithm (Hardcoded for MVP)
 SECRET_KEY = "SECRET_KEY_FOR_DEV"
@@ -15,11 +17,13 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# In-process bcrypt (scripts, seeding). Request handlers go through
+# password_service.get_password_service() so hashing runs in the worker pool.
 def verify_password(plain_password, hashed_password):
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return password_service.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_service.hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -31,28 +35,93 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    credentials_exception = HTTPException(
+def _principal_query(username: str):
+    """User identity plus profile ids in one query."""
+    return select(
+        models.User.id,
+        models.User.username,
+        models.User.role,
+        models.User.is_active,
+        models.Student.id.label("student_id"),
+        models.Teacher.id.label("teacher_id"),
+    ).outerjoin(
+        models.Student, models.Student.user_id == models.User.id
+    ).outerjoin(
+        models.Teacher, models.Teacher.user_id == models.User.id
+    ).where(models.User.username == username).limit(1)
+
+def _principal_from_row(row) -> Optional[Principal]:
+    if row is None:
+        return None
+    return Principal(id=row.id, username=row.username, role=row.role, is_active=row.is_active,
+                     student_id=row.student_id, teacher_id=row.teacher_id)
+
+def _load_principal(db: Session, username: str) -> Optional[Principal]:
+    return _principal_from_row(db.execute(_principal_query(username)).first())
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> dict:
+    """JWT payload of a valid token (401 otherwise)."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        role: str = payload.get("role")
-        if username is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(username=username, role=role)
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> Principal:
+    """Authenticate the bearer token; repeat tokens are served from the principal cache."""
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = _decode_token(token)
+    principal = _load_principal(db, payload["sub"])
+    if principal is None:
+        raise _credentials_exception()
+    principal_cache.set(token, principal, payload.get("exp"))
+    return principal
+
+async def get_current_principal_async(token: str = Depends(oauth2_scheme),
+                                      db=Depends(database.get_async_db)) -> Principal:
+    """get_current_principal for async routes (AsyncSession, no threadpool hop)."""
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = _decode_token(token)
+    principal = _principal_from_row((await db.execute(_principal_query(payload["sub"]))).first())
+    if principal is None:
+        raise _credentials_exception()
+    principal_cache.set(token, principal, payload.get("exp"))
+    return principal
+
+async def get_current_active_principal(principal: Principal = Depends(get_current_principal_async)) -> Principal:
+    if principal.is_active is False:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+    return principal
+
+def get_current_user(principal: Principal = Depends(get_current_principal), db: Session = Depends(database.get_db)):
+    """
+    ORM User for the principal, attached to the request session without a query.
+
+    Columns not in the principal (password_hash) and relationships load lazily on access.
+    """
+    user = models.User(id=principal.id, username=principal.username,
+                       role=principal.role, is_active=principal.is_active)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
 
 def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+    if current_user.is_active is False:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
 class RoleChecker:
@@ -66,3 +135,34 @@ class RoleChecker:
                 detail="Operation not permitted"
             )
         return user
+
+class PrincipalRoleChecker:
+    """RoleChecker for async routes; yields the Principal instead of an ORM User."""
+    def __init__(self, allowed_roles: list[str]):
+        self.allowed_roles = allowed_roles
+
+    async def __call__(self, principal: Principal = Depends(get_current_active_principal)) -> Principal:
+        if principal.role not in self.allowed_roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Operation not permitted"
+            )
+        return principal
+
+# Drop cached principals when a user's active flag or role changes: immediately,
+# and again after commit so a request racing the write cannot re-cache old state.
+@event.listens_for(models.User.is_active, "set", active_history=True)
+@event.listens_for(models.User.role, "set", active_history=True)
+def _invalidate_principal_on_change(target, value, oldvalue, initiator):
+    # NO_VALUE: initial assignment on a new object (including get_current_user's own)
+    if target.id is None or oldvalue is NO_VALUE or value == oldvalue:
+        return
+    principal_cache.invalidate_user(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("principal_invalidations", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals_after_commit(session):
+    for user_id in session.info.pop("principal_invalidations", ()):
+        principal_cache.invalidate_user(user_id)
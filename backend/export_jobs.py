@@ -0,0 +1,332 @@
+"""
+Background Export Jobs
+
+Large marks exports can outlive a proxy timeout when generated inside the
+request. This module runs them in a worker pool instead: a job writes the
+report (any format supported by reporting.py) to local disk, clients poll its
+status/progress, and the finished file is served from disk (with HTTP range
+support via FileResponse).
+
+Identical filter sets submitted while a job is still running, or while its
+artifact is fresh, reuse that job instead of generating the file again.
+
+Job state is also written as JSON next to the artifacts (EXPORT_DIR/jobs), so
+with several API workers a status poll or download that lands on another
+worker still finds the job. EXPORT_DIR must therefore be shared by all
+workers (same host or shared volume). Running jobs are deduplicated per
+worker; completed artifacts are reused across workers.
+
+A worker refreshes the state file of each job it runs every
+EXPORT_LEASE_SECONDS / 4; a queued/running job whose state file is older than
+the lease (its worker died) is reported as failed. The same maintenance pass
+deletes artifacts, partial (.part) files and state files in EXPORT_DIR older
+than EXPORT_TTL_SECONDS, whichever worker or earlier server run wrote them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+import reporting
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(BASE_DIR, "exports"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+# Finished artifacts younger than this are reused for identical requests
+EXPORT_TTL_SECONDS = int(os.getenv("EXPORT_TTL_SECONDS", "900"))
+
+# A running job rewrites its state file every this many rows (progress for other workers)
+EXPORT_PROGRESS_SAVE_ROWS = int(os.getenv("EXPORT_PROGRESS_SAVE_ROWS", "1000"))
+# State-file age after which a queued/running job counts as abandoned by its worker
+EXPORT_LEASE_SECONDS = float(os.getenv("EXPORT_LEASE_SECONDS", "60"))
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class ExportJob:
+    """State of one background export."""
+
+    def __init__(self, key: str, fmt: str, filters: Dict[str, Optional[int]]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.format = fmt
+        self.filters = filters
+        self.status = QUEUED
+        self.total_rows: Optional[int] = None
+        self.rows_written = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.path: Optional[str] = None
+
+    @property
+    def filename(self) -> str:
+        _, extension = reporting.EXPORT_FORMATS[self.format]
+        return f"student_performance_report.{extension}"
+
+    def is_fresh(self, now: float, ttl: int) -> bool:
+        if self.status in (QUEUED, RUNNING):
+            return True
+        if self.status == COMPLETED and self.finished_at is not None:
+            return now - self.finished_at < ttl and self.path is not None and os.path.exists(self.path)
+        return False
+
+    def to_state(self) -> Dict[str, Any]:
+        """Everything needed to rebuild the job in another process."""
+        return {**self.to_dict(), "key": self.key, "path": self.path, "updated_at": self.updated_at}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ExportJob":
+        job = cls(state["key"], state["format"], state["filters"])
+        job.id = state["job_id"]
+        job.status = state["status"]
+        job.total_rows = state["total_rows"]
+        job.rows_written = state["rows_written"]
+        job.created_at = state["created_at"]
+        job.updated_at = state.get("updated_at", job.created_at)
+        job.finished_at = state["finished_at"]
+        job.error = state["error"]
+        job.path = state["path"]
+        return job
+
+    def to_dict(self) -> Dict[str, Any]:
+        progress = None
+        if self.total_rows:
+            progress = min(1.0, self.rows_written / self.total_rows)
+        elif self.status == COMPLETED:
+            progress = 1.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "filters": self.filters,
+            "total_rows": self.total_rows,
+            "rows_written": self.rows_written,
+            "progress": progress,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class ExportJobManager:
+    """Worker pool plus job table (in memory, mirrored to EXPORT_DIR/jobs) for background exports."""
+
+    def __init__(self, export_dir: str = EXPORT_DIR, max_workers: int = EXPORT_WORKERS,
+                 ttl_seconds: int = EXPORT_TTL_SECONDS, lease_seconds: float = EXPORT_LEASE_SECONDS):
+        self.export_dir = export_dir
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._jobs: Dict[str, ExportJob] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Serialises state-file writes, so a heartbeat cannot overwrite a newer final state
+        self._save_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._maintenance_thread = threading.Thread(target=self._maintenance_loop, daemon=True,
+                                                    name="export-maintenance")
+        self._maintenance_thread.start()
+
+    def _state_path(self, name: str) -> str:
+        return os.path.join(self.export_dir, "jobs", f"{name}.json")
+
+    def _save(self, job: ExportJob) -> None:
+        """Write the job's state file (atomically) and point its key at it."""
+        os.makedirs(os.path.join(self.export_dir, "jobs"), exist_ok=True)
+        with self._save_lock:
+            job.updated_at = time.time()
+            for name, payload in ((job.id, job.to_state()), (f"key-{job.key}", {"job_id": job.id})):
+                path = self._state_path(name)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, path)
+
+    def _load(self, job_id: str) -> Optional[ExportJob]:
+        """Job written by any worker, or None; a job whose worker stopped heartbeating is FAILED."""
+        if not _JOB_ID.match(job_id or ""):
+            return None
+        try:
+            with open(self._state_path(job_id), encoding="utf-8") as f:
+                job = ExportJob.from_state(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        if job.status in (QUEUED, RUNNING) and time.time() - job.updated_at > self.lease_seconds:
+            job.status = FAILED
+            job.error = "Interrupted before completion (the worker running it stopped)"
+            job.finished_at = job.updated_at
+        return job
+
+    def _load_by_key(self, key: str) -> Optional[ExportJob]:
+        try:
+            with open(self._state_path(f"key-{key}"), encoding="utf-8") as f:
+                return self._load(json.load(f)["job_id"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def job_key(fmt: str, filters: Dict[str, Optional[int]]) -> str:
+        payload = json.dumps({"format": fmt, **filters}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, engine: Engine, fmt: str, filters: Dict[str, Optional[int]]) -> ExportJob:
+        """Start an export job, or return the fresh job for the same format + filters."""
+        reporting.check_export_format(fmt)
+        key = self.job_key(fmt, filters)
+        now = time.time()
+
+        with self._lock:
+            self._prune(now)
+            existing_id = self._by_key.get(key)
+            if existing_id:
+                existing = self._jobs.get(existing_id)
+                if existing and existing.is_fresh(now, self.ttl_seconds):
+                    return existing
+            # Another worker's finished artifact (its running jobs are not visible as live here)
+            shared = self._load_by_key(key)
+            if shared and shared.status == COMPLETED and shared.is_fresh(now, self.ttl_seconds):
+                return shared
+
+            job = ExportJob(key, fmt, filters)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            self._save(job)
+
+        self._executor.submit(self._run, job, engine)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job or self._load(job_id)
+
+    def _run(self, job: ExportJob, engine: Engine) -> None:
+        job.status = RUNNING
+        os.makedirs(self.export_dir, exist_ok=True)
+        self._save(job)
+        final_path = os.path.join(self.export_dir, f"{job.id}.{reporting.EXPORT_FORMATS[job.format][1]}")
+        tmp_path = final_path + ".part"
+
+        try:
+            stmt = reporting.build_marks_export_query(**job.filters)
+            with engine.connect() as conn:
+                job.total_rows = conn.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+
+            def counted(rows):
+                for row in rows:
+                    job.rows_written += 1
+                    if job.rows_written % EXPORT_PROGRESS_SAVE_ROWS == 0:
+                        self._save(job)
+                    yield row
+
+            rows = counted(reporting.iter_export_rows(engine, stmt))
+            mode = "w" if job.format == "csv" else "wb"
+            encoding = "utf-8" if job.format == "csv" else None
+            with open(tmp_path, mode, encoding=encoding, newline="" if encoding else None) as f:
+                for chunk in reporting.iter_export_chunks(job.format, rows):
+                    f.write(chunk)
+            os.replace(tmp_path, final_path)
+
+            job.path = final_path
+            job.status = COMPLETED
+        except Exception as e:
+            logger.error(f"Export job {job.id} failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+
+    def _maintenance_loop(self) -> None:
+        """Heartbeat this process's unfinished jobs and sweep expired files from EXPORT_DIR."""
+        while not self._stopped.wait(self.lease_seconds / 4):
+            with self._lock:
+                active = [job for job in self._jobs.values() if job.status in (QUEUED, RUNNING)]
+            try:
+                for job in active:
+                    if job.status in (QUEUED, RUNNING):
+                        self._save(job)
+                self.sweep(time.time())
+            except OSError as e:
+                logger.warning(f"Export maintenance failed: {e}")
+
+    def _prune(self, now: float) -> None:
+        """Forget finished in-memory jobs past their TTL (lock held); their files go in sweep()."""
+        for job_id, job in list(self._jobs.items()):
+            if job.status in (QUEUED, RUNNING) or job.finished_at is None:
+                continue
+            if now - job.finished_at < self.ttl_seconds:
+                continue
+            del self._jobs[job_id]
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+
+    def sweep(self, now: float) -> int:
+        """
+        Delete artifacts, .part files and state files not modified for ttl_seconds.
+
+        Works from the files on disk, so leftovers of other workers and earlier
+        runs are removed too. A running job keeps its state file fresh through
+        the heartbeat and its .part file through writes; files of this process's
+        unfinished jobs are never touched. Returns the number of files deleted.
+        """
+        with self._lock:
+            active = {job_id for job_id, job in self._jobs.items() if job.status in (QUEUED, RUNNING)}
+        removed = 0
+        for directory in (self.export_dir, os.path.join(self.export_dir, "jobs")):
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.is_file() or entry.name.split(".", 1)[0] in active:
+                    continue
+                try:
+                    if now - entry.stat().st_mtime < self.ttl_seconds:
+                        continue
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass  # another worker swept it first
+                except OSError as e:
+                    logger.warning(f"Could not remove expired export file {entry.path}: {e}")
+        return removed
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._executor.shutdown(wait=True)
+
+
+# Global instance for reuse
+_manager_instance: Optional[ExportJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_export_manager() -> ExportJobManager:
+    """Get or create the global export job manager."""
+    global _manager_instance
+    with _manager_lock:
+        if _manager_instance is None:
+            _manager_instance = ExportJobManager()
+        return _manager_instance
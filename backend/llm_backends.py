@@ -0,0 +1,211 @@
+"""
+LLM Backends
+
+Text-generation backends behind ai_service. Each backend turns a prompt into
+text and raises on failure; ai_service adds caching, concurrency limits,
+deadlines, the circuit breaker and the rule-based fallback on top.
+
+Backends:
+- gemini: Google Generative AI (needs google-generativeai and GEMINI_API_KEY)
+- openai: any OpenAI-compatible /chat/completions endpoint (llama.cpp, vLLM, ...)
+- stub: deterministic local stub with configurable latency and failure rate,
+  for load tests and benchmarks that must not depend on a provider
+
+Configuration (environment):
+- AI_BACKEND: gemini | openai | stub (default: gemini when GEMINI_API_KEY is set)
+- GEMINI_API_KEY, GEMINI_MODEL (default: gemini-pro)
+- LLM_BASE_URL (e.g. http://localhost:8080/v1), LLM_API_KEY (optional), LLM_MODEL
+- AI_STUB_LATENCY_MS (default: 200), AI_STUB_JITTER_MS (default: 0),
+  AI_STUB_FAILURE_RATE (0.0-1.0, default: 0), AI_STUB_SEED (default: 0)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Try to import Google Generative AI
+try:
+    import google.generativeai as genai
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+
+# Last line of batched prompts: "<marker> S1, S2, ..." (the JSON keys the reply must use)
+JSON_KEYS_MARKER = "JSON keys:"
+
+
+class LLMBackendError(Exception):
+    """Raised when a backend cannot produce text for a prompt."""
+
+
+class LLMBackend:
+    """Interface: generate text for a prompt or raise."""
+
+    name = "base"
+
+    def generate(self, prompt: str, max_output_tokens: int = 300, temperature: float = 0.7,
+                 timeout: Optional[float] = None) -> str:
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via google-generativeai."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str = "gemini-pro"):
+        if not GENAI_AVAILABLE:
+            raise LLMBackendError("google-generativeai not installed")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str, max_output_tokens: int = 300, temperature: float = 0.7,
+                 timeout: Optional[float] = None) -> str:
+        response = self.model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                max_output_tokens=max_output_tokens,
+                temperature=temperature,
+            ),
+            request_options={"timeout": timeout} if timeout else None
+        )
+        if not response or not response.text:
+            raise LLMBackendError("Empty response from AI model")
+        return response.text
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server implementing the OpenAI /chat/completions API."""
+
+    name = "openai"
+
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.api_key = api_key
+
+    def generate(self, prompt: str, max_output_tokens: int = 300, temperature: float = 0.7,
+                 timeout: Optional[float] = None) -> str:
+        body = json.dumps({
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_output_tokens,
+            "temperature": temperature,
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                payload = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise LLMBackendError(f"LLM endpoint returned HTTP {e.code}")
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise LLMBackendError(f"LLM endpoint unreachable: {e}")
+
+        try:
+            text = payload["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise LLMBackendError("Malformed response from LLM endpoint")
+        if not text:
+            raise LLMBackendError("Empty response from AI model")
+        return text
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic stand-in for a provider.
+
+    The text depends only on the prompt; latency, jitter and the sequence of
+    injected failures are reproducible for a given seed. Batched prompts (ending
+    in a JSON_KEYS_MARKER line) are answered with a JSON object of those keys.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_seconds: float = 0.2, jitter_seconds: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def generate(self, prompt: str, max_output_tokens: int = 300, temperature: float = 0.7,
+                 timeout: Optional[float] = None) -> str:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency_seconds + self._rng.uniform(0, self.jitter_seconds)
+            fail = self._rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+
+        time.sleep(delay)
+        if fail:
+            raise LLMBackendError("Stub backend injected failure")
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        marker = prompt.rfind(JSON_KEYS_MARKER)
+        if marker != -1:
+            keys = [k.strip() for k in prompt[marker + len(JSON_KEYS_MARKER):].strip().split(",") if k.strip()]
+            return json.dumps({key: f"[stub {digest} {key}] Generated response." for key in keys})
+        return f"[stub {digest}] Generated response for a {len(prompt)}-character prompt."
+
+
+def create_backend(kind: Optional[str] = None) -> Optional[LLMBackend]:
+    """
+    Build the backend selected by AI_BACKEND (or `kind`).
+
+    Returns:
+        The backend, or None when no backend is configured/usable (fallback mode)
+    """
+    kind = (kind or os.getenv("AI_BACKEND") or ("gemini" if os.getenv("GEMINI_API_KEY") else "")).lower()
+
+    if not kind:
+        logger.info("No AI backend configured. Using fallback mode.")
+        return None
+
+    try:
+        if kind == "gemini":
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                logger.info("GEMINI_API_KEY not found. Using fallback mode.")
+                return None
+            backend = GeminiBackend(api_key, os.getenv("GEMINI_MODEL", "gemini-pro"))
+        elif kind == "openai":
+            base_url = os.getenv("LLM_BASE_URL")
+            if not base_url:
+                logger.info("LLM_BASE_URL not set. Using fallback mode.")
+                return None
+            backend = OpenAICompatibleBackend(base_url, os.getenv("LLM_MODEL", "default"),
+                                              os.getenv("LLM_API_KEY"))
+        elif kind == "stub":
+            backend = StubBackend(
+                latency_seconds=float(os.getenv("AI_STUB_LATENCY_MS", "200")) / 1000,
+                jitter_seconds=float(os.getenv("AI_STUB_JITTER_MS", "0")) / 1000,
+                failure_rate=float(os.getenv("AI_STUB_FAILURE_RATE", "0")),
+                seed=int(os.getenv("AI_STUB_SEED", "0")),
+            )
+        else:
+            logger.error(f"Unknown AI_BACKEND '{kind}'. Using fallback mode.")
+            return None
+    except Exception as e:
+        logger.error(f"Failed to initialize {kind} AI backend: {e}")
+        return None
+
+    logger.info(f"AI service initialized with {kind} backend")
+    return backend
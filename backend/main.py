@@ -1,12 +1,21 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from database import engine, Base
 from routers import auth_router, admin_router, teacher_router, student_router
+from marks_import import check_marks_upsert_index
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Performance Analyzer API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # create_all does not add indexes to existing tables; refuse to start on an unmigrated database
+    check_marks_upsert_index(engine)
+    yield
+
+app = FastAPI(title="Performance Analyzer API", lifespan=lifespan)
 
 # CORS (Allow all for development)
 app.add_middleware(
@@ -0,0 +1,391 @@
+"""
+Marks Import Module
+
+Streams a CSV or XLSX results file into the marks table. Rows are parsed one at
+a time by a generator, resolved against roll-number/subject-code dictionaries
+built once per import, and written in fixed-size chunks with executemany. Only
+one chunk is held in memory at a time, so a 50k-row university results file
+imports in bounded memory without one request per row.
+
+Expected columns (header row, case-insensitive):
+    roll_number, subject_code, exam_type, marks_obtained, total_marks
+"""
+
+import csv
+import io
+import os
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import models, schemas
+from access_control import get_subject_offering_for_teacher_subject, map_exam_type_to_session
+from transcript_cache import transcript_cache
+
+logger = logging.getLogger(__name__)
+
+# openpyxl is only needed for .xlsx uploads
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("MARKS_IMPORT_CHUNK_SIZE", "1000"))
+MAX_CHUNK_SIZE = 10000
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_COLUMNS = ["roll_number", "subject_code", "exam_type", "marks_obtained", "total_marks"]
+
+# Unique key of a marks row (uq_marks_student_subject_exam) and the columns an upload overwrites
+MARKS_KEY = ("student_id", "subject_id", "exam_type")
+MARKS_VALUE_COLUMNS = ("marks_obtained", "total_marks", "max_marks",
+                       "subject_offering_id", "exam_session_id", "uploaded_by")
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class MarksImportError(Exception):
+    """
+    Raised when the uploaded file cannot be read (bad format, header or encoding).
+
+    When the failure happens mid-file, `report` holds the partial import: chunks
+    before the failure stay committed and are counted in created/updated.
+    """
+
+    status_code = 400
+
+    def __init__(self, message: str, report: Optional[schemas.MarksImportReport] = None):
+        super().__init__(message)
+        self.report = report
+
+    def detail(self):
+        """HTTP error detail: the message, plus the partial report when there is one."""
+        if self.report is None:
+            return str(self)
+        return {"message": str(self), "report": self.report.model_dump()}
+
+
+class MarksImportWriteError(MarksImportError):
+    """Raised when writing a chunk fails; earlier chunks stay committed."""
+
+    status_code = 500
+
+
+def check_marks_upsert_index(bind) -> None:
+    """
+    Fail fast when marks has no unique index on MARKS_KEY.
+
+    marks_upsert's ON CONFLICT needs uq_marks_student_subject_exam (migration
+    c5d2e8a91f37); without it every marks write fails. create_all only adds it to
+    a new marks table, so existing databases must run `alembic upgrade head`.
+
+    Raises:
+        RuntimeError: If the index is missing
+    """
+    inspector = inspect(bind)
+    unique = inspector.get_unique_constraints("marks") + [
+        ix for ix in inspector.get_indexes("marks") if ix.get("unique")
+    ]
+    if not any(tuple(item["column_names"]) == MARKS_KEY for item in unique):
+        raise RuntimeError(
+            "marks has no unique index on (student_id, subject_id, exam_type); "
+            "run `alembic upgrade head` (revision c5d2e8a91f37) before starting the API"
+        )
+
+
+def marks_upsert(db: Session):
+    """
+    INSERT ... ON CONFLICT (student_id, subject_id, exam_type) DO UPDATE on marks.
+
+    Execute with one dict or a list of dicts holding MARKS_KEY + MARKS_VALUE_COLUMNS.
+    An existing row keeps its id and gets the new values, so concurrent uploads of
+    the same mark cannot create duplicates.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in _DIALECT_INSERTS:
+        raise NotImplementedError(f"Marks upsert is not supported on {dialect}")
+    stmt = _DIALECT_INSERTS[dialect](models.Marks)
+    return stmt.on_conflict_do_update(
+        index_elements=list(MARKS_KEY),
+        set_={column: stmt.excluded[column] for column in MARKS_VALUE_COLUMNS}
+    )
+
+
+def _normalize_header(header) -> List[str]:
+    return [str(h).strip().lower().replace(" ", "_") if h is not None else "" for h in header]
+
+
+def _check_header(header: List[str]) -> None:
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise MarksImportError(f"Missing required columns: {', '.join(missing)}")
+
+
+def iter_csv_rows(fileobj) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line_number, row_dict) from a binary CSV file object."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        header = _normalize_header(next(reader))
+    except StopIteration:
+        raise MarksImportError("File is empty")
+    except UnicodeDecodeError:
+        raise MarksImportError("CSV file must be UTF-8 encoded")
+    _check_header(header)
+
+    try:
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, dict(zip(header, row))
+    except UnicodeDecodeError:
+        raise MarksImportError(f"CSV file must be UTF-8 encoded (line {reader.line_num + 1})")
+
+
+def iter_xlsx_rows(fileobj) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row_number, row_dict) from the first sheet of an XLSX file."""
+    if not OPENPYXL_AVAILABLE:
+        raise MarksImportError("XLSX import requires openpyxl (pip install openpyxl)")
+
+    try:
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise MarksImportError(f"Could not read XLSX file: {e}")
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        try:
+            header = _normalize_header(next(rows))
+        except StopIteration:
+            raise MarksImportError("File is empty")
+        _check_header(header)
+
+        for row_number, row in enumerate(rows, start=2):
+            if all(cell is None or str(cell).strip() == "" for cell in row):
+                continue
+            yield row_number, dict(zip(header, row))
+    finally:
+        workbook.close()
+
+
+def iter_upload_rows(filename: str, fileobj) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Pick the row generator from the upload's file extension."""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        return iter_xlsx_rows(fileobj)
+    if name.endswith(".csv") or "." not in name:
+        return iter_csv_rows(fileobj)
+    raise MarksImportError("Unsupported file type (expected .csv or .xlsx)")
+
+
+class MarksImporter:
+    """
+    Resolves and writes parsed rows for one import.
+
+    Lookup dictionaries (roll number -> student, subject code -> subject) are
+    built once up front; exam sessions and offerings are memoized per distinct key.
+    """
+
+    def __init__(self, db: Session, current_user: models.User, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.db = db
+        self.current_user = current_user
+        self.teacher = current_user.teacher_profile
+        self.is_admin = current_user.role == models.UserRole.ADMIN
+        self.chunk_size = max(1, chunk_size)
+
+        self.total_rows = 0
+        self.created = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors: List[schemas.MarksImportRowError] = []
+        self.touched_students = set()
+
+        # roll_number -> (student_id, regulation_id)
+        self.students = {
+            row.roll_number: (row.id, row.regulation_id if row.regulation_id else 1)
+            for row in db.query(
+                models.Student.roll_number, models.Student.id, models.Batch.regulation_id
+            ).outerjoin(models.Batch, models.Student.batch_id == models.Batch.id)
+        }
+        # subject code -> (subject_id, semester_id, teacher_id)
+        self.subjects = {
+            row.code: (row.id, row.semester_id, row.teacher_id)
+            for row in db.query(models.Subject.code, models.Subject.id,
+                                models.Subject.semester_id, models.Subject.teacher_id)
+        }
+        self._sessions: Dict[Tuple[str, int, int], Optional[int]] = {}
+        self._offerings: Dict[int, Optional[int]] = {}
+
+    def _reject(self, line: int, row: Dict[str, Any], error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(schemas.MarksImportRowError(
+                row=line,
+                roll_number=_clean(row.get("roll_number")),
+                subject_code=_clean(row.get("subject_code")),
+                error=error
+            ))
+
+    def _exam_session_id(self, exam_type: str, semester_id: int, regulation_id: int) -> Optional[int]:
+        key = (exam_type, semester_id, regulation_id)
+        if key not in self._sessions:
+            session = map_exam_type_to_session(self.db, exam_type, semester_id, regulation_id)
+            self._sessions[key] = session.id if session else None
+        return self._sessions[key]
+
+    def _offering_id(self, subject_id: int) -> Optional[int]:
+        if not self.teacher:
+            return None
+        if subject_id not in self._offerings:
+            offering = get_subject_offering_for_teacher_subject(self.db, self.teacher.id, subject_id)
+            self._offerings[subject_id] = offering.id if offering else None
+        return self._offerings[subject_id]
+
+    def _resolve(self, line: int, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validate one parsed row and turn it into marks column values (None if rejected)."""
+        roll_number = _clean(row.get("roll_number"))
+        subject_code = _clean(row.get("subject_code"))
+        exam_type = _clean(row.get("exam_type"))
+
+        student = self.students.get(roll_number)
+        if not student:
+            self._reject(line, row, "Unknown roll number")
+            return None
+        subject = self.subjects.get(subject_code)
+        if not subject:
+            self._reject(line, row, "Unknown subject code")
+            return None
+        if not exam_type:
+            self._reject(line, row, "Missing exam type")
+            return None
+
+        try:
+            marks_obtained = float(row.get("marks_obtained"))
+            total_marks = float(row.get("total_marks"))
+        except (TypeError, ValueError):
+            self._reject(line, row, "Marks must be numeric")
+            return None
+        if total_marks <= 0 or marks_obtained < 0 or marks_obtained > total_marks:
+            self._reject(line, row, "Marks out of range")
+            return None
+
+        student_id, regulation_id = student
+        subject_id, semester_id, teacher_id = subject
+
+        # Same rules as POST /teacher/marks
+        if not self.is_admin and (not self.teacher or teacher_id != self.teacher.id):
+            self._reject(line, row, "You are not assigned to this subject")
+            return None
+        if exam_type == "University" and not self.is_admin:
+            self._reject(line, row, "Teachers cannot modify University marks")
+            return None
+
+        return {
+            "student_id": student_id,
+            "subject_id": subject_id,                   # Legacy
+            "exam_type": exam_type,                     # Legacy
+            "marks_obtained": marks_obtained,
+            "total_marks": total_marks,                 # Legacy
+            "max_marks": total_marks,                   # New model
+            "subject_offering_id": self._offering_id(subject_id),
+            "exam_session_id": self._exam_session_id(exam_type, semester_id, regulation_id),
+            "uploaded_by": self.current_user.id
+        }
+
+    def _write_chunk(self, chunk: Dict[Tuple[int, int, str], Dict[str, Any]]) -> None:
+        """Upsert one chunk of resolved rows and commit it."""
+        # Updated rows keep their id and new rows get ids above the current maximum,
+        # so the ids returned by the upsert tell the two apart without reading the chunk's keys
+        max_id = self.db.execute(select(func.max(models.Marks.id))).scalar() or 0
+        ids = self.db.execute(marks_upsert(self.db).returning(models.Marks.id),
+                              list(chunk.values())).scalars().all()
+        self.db.commit()
+
+        created = sum(1 for marks_id in ids if marks_id > max_id)
+        self.created += created
+        self.updated += len(ids) - created
+        self.touched_students.update(key[0] for key in chunk)
+
+    def _report(self, completed: bool = True) -> schemas.MarksImportReport:
+        return schemas.MarksImportReport(
+            total_rows=self.total_rows,
+            created=self.created,
+            updated=self.updated,
+            rejected=self.rejected,
+            errors=self.errors,
+            completed=completed
+        )
+
+    def run(self, rows: Iterator[Tuple[int, Dict[str, Any]]]) -> schemas.MarksImportReport:
+        chunk: Dict[Tuple[int, int, str], Dict[str, Any]] = {}
+        try:
+            for line, row in rows:
+                self.total_rows += 1
+                values = self._resolve(line, row)
+                if values is None:
+                    continue
+                # Later rows for the same student/subject/exam win within a chunk
+                chunk[(values["student_id"], values["subject_id"], values["exam_type"])] = values
+                if len(chunk) >= self.chunk_size:
+                    self._write_chunk(chunk)
+                    chunk = {}
+            if chunk:
+                self._write_chunk(chunk)
+        except MarksImportError as e:
+            self.db.rollback()
+            if not self.total_rows:
+                raise  # header/format error: nothing was read
+            # The pending chunk is dropped; committed chunks are reported
+            raise MarksImportError(str(e), report=self._report(completed=False)) from e
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.exception(f"Marks import by user {self.current_user.id} failed writing a chunk")
+            raise MarksImportWriteError(
+                f"Database error after {self.created + self.updated} committed rows",
+                report=self._report(completed=False)
+            ) from e
+        finally:
+            # Committed chunks are visible even when the import stops early
+            transcript_cache.invalidate_many(self.touched_students)
+
+        logger.info(
+            f"Marks import by user {self.current_user.id}: {self.total_rows} rows, "
+            f"{self.created} created, {self.updated} updated, {self.rejected} rejected"
+        )
+        return self._report()
+
+
+def _clean(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # XLSX cells holding numeric roll numbers / codes
+        value = int(value)
+    return str(value).strip()
+
+
+def import_marks_file(db: Session, filename: str, fileobj, current_user: models.User,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> schemas.MarksImportReport:
+    """
+    Import a CSV/XLSX marks file.
+
+    Args:
+        db: Database session
+        filename: Uploaded file name (extension selects the parser)
+        fileobj: Binary file object
+        current_user: Uploading user (teacher or admin)
+        chunk_size: Rows per write/commit
+
+    Returns:
+        MarksImportReport with counts and rejected rows
+
+    Raises:
+        MarksImportError: If the file cannot be parsed
+    """
+    rows = iter_upload_rows(filename, fileobj)
+    return MarksImporter(db, current_user, chunk_size).run(rows)
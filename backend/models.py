@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Float, Boolean, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base  # Changed from relative to absolute import for Alembic compatibility
@@ -99,7 +99,12 @@ class Student(Base):
     department_id = Column(Integer, ForeignKey("departments.id"))
     current_semester_id = Column(Integer, ForeignKey("semesters.id"))
     batch_id = Column(Integer, ForeignKey("batches.id"))  # Phase 3 addition
-    section_id = Column(Integer, ForeignKey("sections.id"))  # Phase 3 addition
+    section_id = Column(Integer, ForeignKey("sections.id"), index=True)  # Phase 3 addition
+    
+    # Class roster lookup (legacy dept/semester filter)
+    __table_args__ = (
+        Index("ix_students_department_semester", "department_id", "current_semester_id"),
+    )
     
     user = relationship("User", back_populates="student_profile")
     department = relationship("Department", back_populates="students")
@@ -138,6 +143,12 @@ class ExamSession(Base):
     academic_year = Column(String, nullable=False, index=True)
     exam_date = Column(DateTime, nullable=True)
     
+    # Also serves map_exam_type_to_session lookups
+    __table_args__ = (
+        UniqueConstraint("exam_type_id", "semester_id", "regulation_id", "academic_year",
+                         name="uq_exam_session_type_sem_reg_year"),
+    )
+    
     exam_type = relationship("ExamType", back_populates="exam_sessions")
     semester = relationship("Semester", back_populates="exam_sessions")
     regulation = relationship("Regulation", back_populates="exam_sessions")
@@ -168,6 +179,11 @@ class SubjectOffering(Base):
     teacher_id = Column(Integer, ForeignKey("teachers.id"), nullable=False)
     academic_year = Column(String, nullable=False, index=True)
     
+    # Teacher -> offering lookups in access_control
+    __table_args__ = (
+        Index("ix_subject_offerings_teacher_subject_year", "teacher_id", "subject_id", "academic_year"),
+    )
+    
     subject = relationship("Subject", back_populates="subject_offerings")
     section = relationship("Section", back_populates="subject_offerings")
     teacher = relationship("Teacher", back_populates="subject_offerings")
@@ -187,6 +203,12 @@ class Marks(Base):
     max_marks = Column(Float)
     uploaded_by = Column(Integer, ForeignKey("users.id"))
     
+    # One row per student/subject/exam: the ON CONFLICT target of marks uploads.
+    # Leading student_id also serves per-student transcript queries.
+    __table_args__ = (
+        Index("uq_marks_student_subject_exam", "student_id", "subject_id", "exam_type", unique=True),
+    )
+    
     student = relationship("Student", back_populates="marks")
     subject = relationship("Subject", back_populates="marks")
     subject_offering = relationship("SubjectOffering", back_populates="marks")
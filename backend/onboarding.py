@@ -0,0 +1,284 @@
+"""
+Bulk Onboarding Module
+
+Creates many student or teacher accounts in one request. Every reference
+(department, semester, section) is resolved with one IN query per table,
+username collisions are found with a single IN query on users, passwords are
+hashed in parallel on the password service workers, and the users plus their
+profiles are written with bulk inserts inside one transaction.
+
+Rows that fail validation are reported and skipped; the valid ones are created.
+
+CSV columns (header row, case-insensitive):
+    students: roll_number, name, department_id, current_semester_id, password
+              [, section_id, batch_id]
+    teachers: email, name, department_id, password
+"""
+
+import csv
+import io
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models, schemas
+from password_service import get_password_service
+
+logger = logging.getLogger(__name__)
+
+MAX_ROWS = int(os.getenv("ONBOARDING_MAX_ROWS", "5000"))
+
+STUDENT_COLUMNS = ["roll_number", "name", "department_id", "current_semester_id", "password"]
+TEACHER_COLUMNS = ["email", "name", "department_id", "password"]
+
+
+class OnboardingError(Exception):
+    """Raised when the request as a whole cannot be processed (bad file, too many rows)."""
+
+
+class OnboardingConflict(OnboardingError):
+    """Raised when accounts created concurrently collide with this batch while it is written."""
+
+
+def iter_csv_rows(fileobj, required_columns: List[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line_number, row_dict) from a binary CSV file; blank cells become None."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        header = [h.strip().lower().replace(" ", "_") for h in next(reader)]
+    except StopIteration:
+        raise OnboardingError("File is empty")
+    except UnicodeDecodeError:
+        raise OnboardingError("CSV file must be UTF-8 encoded")
+    missing = [c for c in required_columns if c not in header]
+    if missing:
+        raise OnboardingError(f"Missing required columns: {', '.join(missing)}")
+
+    try:
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, {k: (v.strip() or None) for k, v in zip(header, row)}
+    except UnicodeDecodeError:
+        raise OnboardingError(f"CSV file must be UTF-8 encoded (line {reader.line_num + 1})")
+
+
+def parse_rows(rows: Iterator[Tuple[int, Dict[str, Any]]],
+               model: Type[BaseModel]) -> List[Tuple[int, Any, Optional[BaseModel], Optional[str]]]:
+    """Validate raw rows into (row, raw, parsed, error) with `model`."""
+    parsed = []
+    for line, row in rows:
+        if len(parsed) >= MAX_ROWS:
+            raise OnboardingError(f"Too many rows (limit {MAX_ROWS})")
+        try:
+            parsed.append((line, row, model.model_validate(row), None))
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first["loc"])
+            parsed.append((line, row, None, f"{field}: {first['msg']}"))
+    return parsed
+
+
+class _Onboarding:
+    """Shared validation/report plumbing for one bulk request."""
+
+    username_field = ""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.results: Dict[int, schemas.OnboardingRowResult] = {}
+
+    def _reject(self, line: int, username: str, error: str) -> None:
+        self.results[line] = schemas.OnboardingRowResult(
+            row=line, username=username, status="rejected", error=error
+        )
+
+    def _accept_unique(self, parsed) -> List[Tuple[int, BaseModel]]:
+        """Drop rows that failed parsing or whose username is taken (DB or earlier in the batch)."""
+        usernames = {getattr(item, self.username_field).strip()
+                     for _, _, item, _ in parsed if item is not None}
+        taken = {
+            row.username for row in
+            self.db.query(models.User.username).filter(models.User.username.in_(usernames))
+        } if usernames else set()
+
+        accepted, seen = [], set()
+        for line, raw, item, error in parsed:
+            if item is None:
+                self._reject(line, str((raw or {}).get(self.username_field) or ""), error)
+                continue
+            username = getattr(item, self.username_field).strip()
+            if not username:
+                self._reject(line, username, f"{self.username_field} is required")
+            elif username in taken:
+                self._reject(line, username, "Username already exists")
+            elif username in seen:
+                self._reject(line, username, "Duplicate in this upload")
+            else:
+                seen.add(username)
+                accepted.append((line, item))
+        return accepted
+
+    def _insert_users(self, usernames: List[str], passwords: List[str], role: str) -> Dict[str, int]:
+        """Hash in parallel, bulk insert users, return username -> user id."""
+        hashes = get_password_service().hash_many(passwords)
+        rows = self.db.execute(
+            insert(models.User).returning(models.User.id, models.User.username),
+            [{"username": u, "password_hash": h, "role": role, "is_active": True}
+             for u, h in zip(usernames, hashes)]
+        )
+        return {row.username: row.id for row in rows}
+
+    @contextmanager
+    def _write(self):
+        """
+        Wrap the bulk inserts and the commit: a username taken after _accept_unique
+        checked it fails at the INSERT, so the whole batch is rolled back.
+        """
+        try:
+            yield
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise OnboardingConflict("Some accounts were created concurrently; nothing was saved, please retry")
+
+    def _report(self, total: int) -> schemas.OnboardingReport:
+        results = [self.results[line] for line in sorted(self.results)]
+        created = sum(1 for r in results if r.status == "created")
+        return schemas.OnboardingReport(
+            total_rows=total, created=created, rejected=total - created, results=results
+        )
+
+
+class StudentOnboarding(_Onboarding):
+    username_field = "roll_number"
+
+    def run(self, parsed) -> schemas.OnboardingReport:
+        items = [item for _, _, item, _ in parsed if item is not None]
+        departments = self._existing_ids(models.Department, {i.department_id for i in items})
+        semesters = self._existing_ids(models.Semester, {i.current_semester_id for i in items})
+        section_ids = {i.section_id for i in items if i.section_id is not None}
+        # section id -> (department_id, batch_id)
+        sections = {
+            row.id: (row.department_id, row.batch_id)
+            for row in self.db.query(models.Section.id, models.Section.department_id, models.Section.batch_id)
+                              .filter(models.Section.id.in_(section_ids))
+        } if section_ids else {}
+
+        valid = []
+        for line, item in self._accept_unique(parsed):
+            roll_number = item.roll_number.strip()
+            if item.department_id not in departments:
+                self._reject(line, roll_number, "Department not found")
+            elif item.current_semester_id not in semesters:
+                self._reject(line, roll_number, "Semester not found")
+            elif item.section_id is not None and item.section_id not in sections:
+                self._reject(line, roll_number, "Section not found")
+            elif item.section_id is not None and sections[item.section_id][0] != item.department_id:
+                self._reject(line, roll_number, "Section belongs to another department")
+            else:
+                valid.append((line, roll_number, item))
+
+        if valid:
+            with self._write():
+                user_ids = self._insert_users([r for _, r, _ in valid], [i.password for _, _, i in valid],
+                                              models.UserRole.STUDENT.value)
+                created = self.db.execute(
+                    insert(models.Student).returning(models.Student.id, models.Student.roll_number),
+                    [{
+                        "user_id": user_ids[roll_number],
+                        "roll_number": roll_number,
+                        "name": item.name,
+                        "department_id": item.department_id,
+                        "current_semester_id": item.current_semester_id,
+                        "section_id": item.section_id,
+                        "batch_id": item.batch_id if item.batch_id is not None
+                                    else sections.get(item.section_id, (None, None))[1],
+                    } for _, roll_number, item in valid]
+                )
+                student_ids = {row.roll_number: row.id for row in created}
+            for line, roll_number, _ in valid:
+                self.results[line] = schemas.OnboardingRowResult(
+                    row=line, username=roll_number, status="created", id=student_ids[roll_number]
+                )
+
+        return self._report(len(parsed))
+
+    def _existing_ids(self, model, ids) -> set:
+        if not ids:
+            return set()
+        return {row.id for row in self.db.query(model.id).filter(model.id.in_(ids))}
+
+
+class TeacherOnboarding(_Onboarding):
+    username_field = "email"
+
+    def run(self, parsed) -> schemas.OnboardingReport:
+        department_ids = {item.department_id for _, _, item, _ in parsed if item is not None}
+        departments = {
+            row.id for row in self.db.query(models.Department.id).filter(models.Department.id.in_(department_ids))
+        } if department_ids else set()
+
+        valid = []
+        for line, item in self._accept_unique(parsed):
+            email = item.email.strip()
+            if item.department_id not in departments:
+                self._reject(line, email, "Department not found")
+            else:
+                valid.append((line, email, item))
+
+        if valid:
+            with self._write():
+                user_ids = self._insert_users([e for _, e, _ in valid], [i.password for _, _, i in valid],
+                                              models.UserRole.TEACHER.value)
+                created = self.db.execute(
+                    insert(models.Teacher).returning(models.Teacher.id, models.Teacher.email),
+                    [{
+                        "user_id": user_ids[email],
+                        "email": email,
+                        "name": item.name,
+                        "department_id": item.department_id,
+                    } for _, email, item in valid]
+                )
+                teacher_ids = {row.email: row.id for row in created}
+            for line, email, _ in valid:
+                self.results[line] = schemas.OnboardingRowResult(
+                    row=line, username=email, status="created", id=teacher_ids[email]
+                )
+
+        return self._report(len(parsed))
+
+
+def onboard_students(db: Session, rows: Iterator[Tuple[int, Dict[str, Any]]]) -> schemas.OnboardingReport:
+    """
+    Create students (and their user accounts) from raw rows.
+
+    Args:
+        db: Database session
+        rows: (row_number, field dict) pairs from JSON or CSV
+
+    Returns:
+        OnboardingReport with one result per row
+
+    Raises:
+        OnboardingError: Too many rows
+        OnboardingConflict: Concurrent inserts collided with the batch (nothing saved)
+    """
+    report = StudentOnboarding(db).run(parse_rows(rows, schemas.BulkStudentCreate))
+    logger.info(f"Bulk student onboarding: {report.total_rows} rows, {report.created} created, "
+                f"{report.rejected} rejected")
+    return report
+
+
+def onboard_teachers(db: Session, rows: Iterator[Tuple[int, Dict[str, Any]]]) -> schemas.OnboardingReport:
+    """Create teachers (and their user accounts) from raw rows; see onboard_students."""
+    report = TeacherOnboarding(db).run(parse_rows(rows, schemas.TeacherCreate))
+    logger.info(f"Bulk teacher onboarding: {report.total_rows} rows, {report.created} created, "
+                f"{report.rejected} rejected")
+    return report
@@ -0,0 +1,185 @@
+"""
+Password Service
+
+bcrypt hashing and verification run in a dedicated worker pool instead of on
+the request thread or event loop. bcrypt is CPU-bound by design, so a login
+storm used to pin every request thread; with a process pool the work spreads
+across cores and the API keeps answering other endpoints.
+
+Configuration (environment):
+- BCRYPT_ROUNDS: cost factor for new hashes (default: 12, bcrypt's own default;
+  4-31). Existing hashes keep verifying at the cost they were created with.
+- PASSWORD_HASH_WORKERS: worker processes (default: number of CPUs). 0 runs
+  the work on a small in-process thread pool instead (tests, single-core boxes).
+- PASSWORD_HASH_MAX_PENDING: reject new work with PasswordServiceBusy once
+  this many operations are queued or running (default: 0 = unbounded)
+
+Metrics (see stats()): pending, queue_depth (waiting for a free worker),
+submitted/completed/failed/rejected counters and average latency.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+DEFAULT_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0"))
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+# Worker functions live at module level so the process pool can pickle them.
+def hash_password(password: str, rounds: int = DEFAULT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    except ValueError:
+        # Malformed or legacy non-bcrypt hash
+        return False
+
+
+class PasswordService:
+    """Pool-backed bcrypt with queue-depth accounting and optional backpressure."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, rounds: int = DEFAULT_ROUNDS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        if not 4 <= rounds <= 31:
+            raise ValueError("bcrypt rounds must be between 4 and 31")
+        self.workers = workers
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # spawn: forking a multi-threaded server process is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="password")
+            return self._executor
+
+    @property
+    def concurrency(self) -> int:
+        return self.workers if self.workers > 0 else 2
+
+    def _submit(self, func, *args) -> Future:
+        with self._lock:
+            if self.max_pending > 0 and self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordServiceBusy("Password hashing queue is full")
+            self.pending += 1
+            self.submitted += 1
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+                self.failed += 1
+            raise
+
+        def _done(f: Future) -> None:
+            with self._lock:
+                self.pending -= 1
+                self.total_seconds += time.perf_counter() - started
+                if f.cancelled() or f.exception() is not None:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+        future.add_done_callback(_done)
+        return future
+
+    # Async API (event loop is free while a worker hashes)
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(hash_password, password, self.rounds))
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(verify_password, password, hashed_password))
+
+    # Sync API for threadpool handlers and jobs (the calling thread waits, the CPU work runs in the pool)
+
+    def hash_sync(self, password: str) -> str:
+        return self._submit(hash_password, password, self.rounds).result()
+
+    def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash a batch in parallel across the workers; results keep input order.
+
+        At most two operations per worker are queued at a time, so a large
+        batch never sits in front of interactive logins for long.
+        """
+        window = self.concurrency * 2
+        hashes: List[str] = []
+        for start in range(0, len(passwords), window):
+            futures = [self._submit(hash_password, password, self.rounds)
+                       for password in passwords[start:start + window]]
+            hashes.extend(future.result() for future in futures)
+        return hashes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "mode": "process" if self.workers > 0 else "thread",
+                "workers": self.concurrency,
+                "rounds": self.rounds,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "queue_depth": max(0, self.pending - self.concurrency),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_seconds": round(self.total_seconds / finished, 4) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Global instance
+_password_service: Optional[PasswordService] = None
+_service_lock = threading.Lock()
+
+
+def get_password_service() -> PasswordService:
+    """Get or create the global password service."""
+    global _password_service
+    with _service_lock:
+        if _password_service is None:
+            _password_service = PasswordService()
+            logger.info(f"Password service started ({_password_service.stats()['mode']} pool, "
+                        f"{_password_service.concurrency} workers, bcrypt cost {_password_service.rounds})")
+        return _password_service
@@ -0,0 +1,92 @@
+"""
+Offering Performance Snapshot
+
+Set-based aggregation of one subject offering's marks (subject + section):
+class average, per-exam averages and per-student percentages, computed in a
+fixed number of grouped queries regardless of section size.
+
+Used by /teacher/ai-insights; reusable anywhere an offering-level summary is needed.
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+
+
+def _max_marks_expr():
+    # Use max_marks from new model if available, else total_marks from legacy
+    return func.coalesce(func.nullif(models.Marks.max_marks, 0), models.Marks.total_marks)
+
+
+def get_offering_performance_snapshot(db: Session, subject_id: int, section_id: int) -> Dict[str, Any]:
+    """
+    Aggregate marks for a subject within a section.
+
+    Args:
+        db: Database session
+        subject_id: Subject ID
+        section_id: Section ID
+
+    Returns:
+        Dictionary with:
+            - total_students: int (students enrolled in the section)
+            - has_marks: bool
+            - class_average: float (percentage over all marks)
+            - exam_sessions: list of {"exam_type", "avg_marks"} (marks linked to an exam session)
+            - students: list of {"student_id", "name", "percentage"} (students with marks)
+    """
+    total_students = db.query(func.count(models.Student.id)).filter(
+        models.Student.section_id == section_id
+    ).scalar()
+
+    max_marks = _max_marks_expr()
+    in_offering = (
+        models.Student.section_id == section_id,
+        models.Marks.subject_id == subject_id,
+    )
+
+    # Per-student sums (ordered by first mark, matching the old row-by-row walk)
+    student_rows = db.query(
+        models.Student.id,
+        models.Student.name,
+        func.sum(models.Marks.marks_obtained).label("obtained"),
+        func.sum(max_marks).label("max"),
+    ).join(
+        models.Student, models.Marks.student_id == models.Student.id
+    ).filter(*in_offering).group_by(
+        models.Student.id, models.Student.name
+    ).order_by(func.min(models.Marks.id)).all()
+
+    # Per-exam sums for marks mapped to an exam session
+    exam_name = func.coalesce(models.ExamType.name, "Unknown")
+    exam_rows = db.query(
+        exam_name.label("exam_type"),
+        func.sum(models.Marks.marks_obtained).label("obtained"),
+        func.sum(max_marks).label("max"),
+    ).join(
+        models.Student, models.Marks.student_id == models.Student.id
+    ).join(
+        models.ExamSession, models.Marks.exam_session_id == models.ExamSession.id
+    ).outerjoin(
+        models.ExamType, models.ExamSession.exam_type_id == models.ExamType.id
+    ).filter(*in_offering).group_by(exam_name).order_by(func.min(models.Marks.id)).all()
+
+    total_obtained = sum(row.obtained or 0 for row in student_rows)
+    total_max = sum(row.max or 0 for row in student_rows)
+
+    return {
+        "total_students": total_students,
+        "has_marks": bool(student_rows),
+        "class_average": (total_obtained / total_max * 100) if total_max > 0 else 0,
+        "exam_sessions": [
+            {"exam_type": row.exam_type, "avg_marks": (row.obtained / row.max) * 100}
+            for row in exam_rows if row.max and row.max > 0
+        ],
+        "students": [
+            {"student_id": row.id, "name": row.name, "percentage": (row.obtained / row.max) * 100}
+            for row in student_rows if row.max and row.max > 0
+        ],
+    }
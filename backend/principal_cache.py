@@ -0,0 +1,120 @@
+"""
+Principal Cache
+
+In-process cache from bearer token to the authenticated user's identity. A
+dashboard fires several API calls on load, each carrying the same token; with
+this cache only the first one decodes the JWT and looks the user up, the rest
+are dictionary lookups.
+
+Entries live for PRINCIPAL_CACHE_TTL seconds (default: 60), never past the
+token's own expiry, and the cache holds at most PRINCIPAL_CACHE_SIZE tokens
+(LRU).
+
+Invalidation rules:
+- A user's is_active or role changes -> every token of that user is dropped
+
+Like the transcript cache, each API worker keeps its own copy; the short TTL
+bounds how long another worker can serve a stale principal.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+
+DEFAULT_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable identity of an authenticated user."""
+    id: int
+    username: str
+    role: str
+    is_active: Optional[bool]
+    student_id: Optional[int] = None
+    teacher_id: Optional[int] = None
+
+
+class PrincipalCache:
+    """Bounded TTL + LRU cache keyed by token, with a per-user index for invalidation."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        """Return the cached principal for a token, or None on a miss/expiry."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token: str, principal: Principal, token_expires_at: Optional[float] = None) -> None:
+        """Cache a principal until the TTL or the token's expiry, whichever comes first."""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (principal, expires_at)
+            self._by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token of one user (deactivation, role change)."""
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._drop(token)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _drop(self, token: str) -> None:
+        # Lock held by caller
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[entry[0].id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global instance shared by the auth dependencies
+principal_cache = PrincipalCache()
@@ -0,0 +1,295 @@
+"""
+Reporting Module
+
+Builds the marks performance report used by /admin/reports/export.
+
+The export is a generator pipeline: a column-only SELECT is streamed from the
+database in batches (server-side cursor where the driver supports it), each
+row is formatted as it arrives and CSV text is flushed in fixed-size chunks.
+Memory stays flat and the header goes out immediately, regardless of how many
+mark rows the filters match.
+
+Columnar formats (Parquet, Arrow IPC stream) are built from the same row stream
+as record batches. They need pyarrow (in requirements.txt; without it those
+formats are rejected with a 400). Parquet output buffers batches into row
+groups of PARQUET_ROW_GROUP_ROWS rows, so large exports keep Parquet's size and
+scan benefits; each row group is streamed out as soon as it is written.
+"""
+
+import csv
+import io
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+import models
+
+# pyarrow is only needed for the columnar export formats
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_HEADER = [
+    "Student Name", "Roll Number", "Department", "Semester",
+    "Subject Code", "Subject Name", "Exam Type", "Marks Obtained", "Total Marks", "Percentage"
+]
+
+EXPORT_FORMATS = {
+    # format: (media type, file extension)
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# Column names for the columnar formats (same order as EXPORT_HEADER)
+COLUMNAR_FIELDS = [
+    "student_name", "roll_number", "department", "semester_id",
+    "subject_code", "subject_name", "exam_type", "marks_obtained", "total_marks", "percentage"
+]
+
+# Rows fetched per round trip and bytes buffered per yielded CSV chunk
+EXPORT_BATCH_SIZE = 2000
+CSV_CHUNK_BYTES = 64 * 1024
+# Rows per Parquet row group (bounds the rows buffered before bytes are yielded)
+PARQUET_ROW_GROUP_ROWS = 128 * 1024
+
+
+def build_marks_export_query(department_id: Optional[int] = None,
+                             semester_id: Optional[int] = None,
+                             subject_id: Optional[int] = None):
+    """
+    Column-only SELECT for the marks report.
+
+    Department/semester filters apply to the student's properties (the "class"
+    view); the subject filter applies to the mark itself.
+    """
+    stmt = select(
+        models.Student.name,
+        models.Student.roll_number,
+        models.Department.code,
+        models.Student.current_semester_id,
+        models.Subject.code,
+        models.Subject.name,
+        models.Marks.exam_type,
+        models.Marks.marks_obtained,
+        models.Marks.total_marks,
+    ).join(
+        models.Student, models.Marks.student_id == models.Student.id
+    ).join(
+        models.Subject, models.Marks.subject_id == models.Subject.id
+    ).join(
+        models.Department, models.Student.department_id == models.Department.id
+    )
+
+    if department_id:
+        stmt = stmt.where(models.Student.department_id == department_id)
+    if semester_id:
+        stmt = stmt.where(models.Student.current_semester_id == semester_id)
+    if subject_id:
+        stmt = stmt.where(models.Marks.subject_id == subject_id)
+
+    return stmt
+
+
+def iter_export_rows(engine: Engine, stmt, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Sequence]:
+    """
+    Stream plain row tuples for the export query on a dedicated connection.
+
+    Uses its own connection (not the request Session) so the stream is not
+    tied to the lifetime of the request dependency.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        for partition in result.partitions():
+            for row in partition:
+                yield row
+
+
+def format_export_row(row: Sequence) -> list:
+    """Apply report formatting (percentage) to one raw export row."""
+    (student_name, roll_number, dept_code, semester_id,
+     subject_code, subject_name, exam_type, marks_obtained, total_marks) = row
+    percentage = (marks_obtained / total_marks) * 100 if total_marks > 0 else 0
+    return [
+        student_name,
+        roll_number,
+        dept_code,
+        semester_id,
+        subject_code,
+        subject_name,
+        exam_type,
+        marks_obtained,
+        total_marks,
+        f"{percentage:.2f}"
+    ]
+
+
+def iter_csv_chunks(rows: Iterator[Sequence], chunk_bytes: int = CSV_CHUNK_BYTES) -> Iterator[str]:
+    """Turn raw export rows into CSV text chunks of roughly `chunk_bytes`."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_HEADER)
+    # Flush the header straight away so time-to-first-byte does not depend on the query
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    for row in rows:
+        writer.writerow(format_export_row(row))
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class ExportFormatError(Exception):
+    """Raised for unknown export formats or when the format's dependency is missing."""
+
+
+def check_export_format(fmt: str) -> None:
+    if fmt not in EXPORT_FORMATS:
+        raise ExportFormatError(f"Unknown export format '{fmt}' (expected one of: {', '.join(EXPORT_FORMATS)})")
+    if fmt != "csv" and not PYARROW_AVAILABLE:
+        raise ExportFormatError(f"'{fmt}' export requires pyarrow (pip install pyarrow)")
+
+
+def _arrow_schema():
+    return pa.schema([
+        ("student_name", pa.string()),
+        ("roll_number", pa.string()),
+        ("department", pa.string()),
+        ("semester_id", pa.int64()),
+        ("subject_code", pa.string()),
+        ("subject_name", pa.string()),
+        ("exam_type", pa.string()),
+        ("marks_obtained", pa.float64()),
+        ("total_marks", pa.float64()),
+        ("percentage", pa.float64()),
+    ])
+
+
+def iter_record_batches(rows: Iterator[Sequence], batch_size: int = EXPORT_BATCH_SIZE):
+    """Group raw export rows into Arrow record batches of `batch_size` rows."""
+    schema = _arrow_schema()
+    columns = [[] for _ in COLUMNAR_FIELDS]
+
+    def build():
+        return pa.record_batch([pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                               schema=schema)
+
+    count = 0
+    for row in rows:
+        marks_obtained, total_marks = row[7], row[8]
+        percentage = (marks_obtained / total_marks) * 100 if total_marks > 0 else 0.0
+        for col, value in zip(columns, (*row, percentage)):
+            col.append(value)
+        count += 1
+        if count >= batch_size:
+            yield build()
+            columns = [[] for _ in COLUMNAR_FIELDS]
+            count = 0
+    if count:
+        yield build()
+
+
+class _ChunkSink:
+    """
+    Write-only file object that hands written bytes back to a generator.
+
+    pyarrow writers only append, so bytes can be drained after every batch while
+    tell() keeps reporting the absolute position used for file metadata.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet_chunks(rows: Iterator[Sequence], batch_size: int = EXPORT_BATCH_SIZE,
+                        row_group_rows: int = PARQUET_ROW_GROUP_ROWS) -> Iterator[bytes]:
+    """Encode export rows as a Parquet file, yielding bytes as each row group is written."""
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), _arrow_schema(), compression="snappy")
+    pending, pending_rows = [], 0
+    try:
+        for batch in iter_record_batches(rows, batch_size):
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows < row_group_rows:
+                continue
+            # Write whole row groups only; the remainder starts the next one
+            table = pa.Table.from_batches(pending)
+            full = pending_rows - pending_rows % row_group_rows
+            writer.write_table(table.slice(0, full), row_group_size=row_group_rows)
+            pending, pending_rows = table.slice(full).to_batches(), pending_rows - full
+            data = sink.drain()
+            if data:
+                yield data
+        if pending_rows:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_rows)
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def iter_arrow_chunks(rows: Iterator[Sequence], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """Encode export rows as an Arrow IPC stream, yielding bytes per record batch."""
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), _arrow_schema())
+    try:
+        for batch in iter_record_batches(rows, batch_size):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def iter_export_chunks(fmt: str, rows: Iterator[Sequence]) -> Iterator:
+    """Dispatch to the chunk encoder for `fmt` (validated with check_export_format)."""
+    if fmt == "parquet":
+        return iter_parquet_chunks(rows)
+    if fmt == "arrow":
+        return iter_arrow_chunks(rows)
+    return iter_csv_chunks(rows)
@@ -1,108 +1,144 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import database, models, auth, schemas
+from transcript_cache import transcript_cache
+from principal_cache import Principal
+from marks_import import import_marks_file, MarksImportError, DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
 
 router = APIRouter()
 
 @router.get("/stats")
-def read_admin_stats(current_user: models.User = Depends(auth.RoleChecker(["admin"])), db: Session = Depends(database.get_db)):
+async def read_admin_stats(
+    principal: Principal = Depends(auth.PrincipalRoleChecker(["admin"])),
+    db: AsyncSession = Depends(database.get_async_read_db)
+):
     # LEGACY COMPAT: Stats now include new academic model entities
-    
-    student_count = db.query(models.Student).count()
-    teacher_count = db.query(models.Teacher).count()
-    dept_count = db.query(models.Department).count()
-    subject_count = db.query(models.Subject).count()
-    
-    # NEW MODEL: Add counts for new entities
-    batch_count = db.query(models.Batch).count()
-    section_count = db.query(models.Section).count()
-    offering_count = db.query(models.SubjectOffering).count()
-    exam_session_count = db.query(models.ExamSession).count()
-    
-    return {
-        "students": student_count,
-        "teachers": teacher_count,
-        "departments": dept_count,
-        "subjects": subject_count,
-        "batches": batch_count,
-        "sections": section_count,
-        "subject_offerings": offering_count,
-        "exam_sessions": exam_session_count
+    # (NEW MODEL: batches, sections, subject offerings, exam sessions)
+    # All counts in one round trip
+    counted = {
+        "students": models.Student,
+        "teachers": models.Teacher,
+        "departments": models.Department,
+        "subjects": models.Subject,
+        "batches": models.Batch,
+        "sections": models.Section,
+        "subject_offerings": models.SubjectOffering,
+        "exam_sessions": models.ExamSession,
     }
+    row = (await db.execute(select(*(
+        select(func.count()).select_from(model).scalar_subquery().label(name)
+        for name, model in counted.items()
+    )))).one()
+    return dict(row._mapping)
 
 @router.get("/reports/export")
 def export_marks_csv(
     department_id: int = None,
     semester_id: int = None,
     subject_id: int = None,
+    format: str = "csv",
     current_user: models.User = Depends(auth.RoleChecker(["admin"])),
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_read_db)
 ):
-        
-    # Start query
-    query = db.query(
-        models.Marks, models.Student, models.Subject, models.Department
-    ).join(
-        models.Student, models.Marks.student_id == models.Student.id
-    ).join(
-        models.Subject, models.Marks.subject_id == models.Subject.id
-    ).join(
-        models.Department, models.Student.department_id == models.Department.id
-    )
-
-    # Apply filters
-    if department_id:
-        query = query.filter(models.Student.department_id == department_id)
-    if semester_id:
-        query = query.filter(models.Student.current_semester_id == semester_id)
-    # Note: Filtering by Student's semester might not be enough if we want specific subject marks regardless of current sem,
-    # but usually "Semester Filter" means "Students in this semester" OR "Marks for subjects in this semester".
-    # Given the context of "Performance Report", usually we want to filter by the Subject's semester or Student's semester.
-    # Let's filter by Student's current semester for now as it aligns with "Class Report".
-    # Wait, if I filter by Subject ID, that's specific.
-    # If I filter by Semester ID, I probably want marks for subjects IN that semester OR students IN that semester.
-    # Let's stick to Student's properties for Department/Semester filters as per standard "Class" view.
+    # Department/Semester filters use the Student's properties (standard "Class" view);
+    # Subject filter is specific to the mark.
+    # Streams straight from a server-side cursor: rows are formatted and flushed
+    # in chunks as they arrive instead of materializing the whole report.
+    # format: "csv" (default), "parquet" or "arrow" (IPC stream; needs pyarrow)
+    from fastapi.responses import StreamingResponse
+    from reporting import (build_marks_export_query, iter_export_rows, iter_export_chunks,
+                           check_export_format, ExportFormatError, EXPORT_FORMATS)
+    
+    try:
+        check_export_format(format)
+    except ExportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    stmt = build_marks_export_query(department_id, semester_id, subject_id)
+    rows = iter_export_rows(db.get_bind(), stmt)
     
-    if subject_id:
-        query = query.filter(models.Marks.subject_id == subject_id)
+    media_type, extension = EXPORT_FORMATS[format]
+    response = StreamingResponse(iter_export_chunks(format, rows), media_type=media_type)
+    response.headers["Content-Disposition"] = f"attachment; filename=student_performance_report.{extension}"
+    return response
 
-    results = query.all()
+@router.post("/reports/export-jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_export_job(
+    department_id: int = None,
+    semester_id: int = None,
+    subject_id: int = None,
+    format: str = "csv",
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    Generate the marks report in the background (same filters/formats as /reports/export).
     
-    import csv
-    import io
-    from fastapi.responses import StreamingResponse
+    Re-submitting identical filters while a job is running or its file is fresh
+    returns the existing job.
+    """
+    from export_jobs import get_export_manager
+    from reporting import ExportFormatError
     
-    output = io.StringIO()
-    writer = csv.writer(output)
+    filters = {"department_id": department_id, "semester_id": semester_id, "subject_id": subject_id}
+    try:
+        job = get_export_manager().submit(db.get_bind(), format, filters)
+    except ExportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.to_dict()
+
+@router.get("/reports/export-jobs/{job_id}")
+def get_export_job(
+    job_id: str,
+    current_user: models.User = Depends(auth.RoleChecker(["admin"]))
+):
+    """Poll status and progress of a background export."""
+    from export_jobs import get_export_manager
     
-    # Header
-    writer.writerow([
-        "Student Name", "Roll Number", "Department", "Semester", 
-        "Subject Code", "Subject Name", "Exam Type", "Marks Obtained", "Total Marks", "Percentage"
-    ])
+    job = get_export_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_dict()
+
+@router.get("/reports/export-jobs/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    current_user: models.User = Depends(auth.RoleChecker(["admin"]))
+):
+    """Serve a finished export (supports HTTP Range requests)."""
+    from fastapi.responses import FileResponse
+    from export_jobs import get_export_manager, COMPLETED
+    from reporting import EXPORT_FORMATS
+    import os
     
-    # Rows
-    for mark, student, subject, dept in results:
-        percentage = (mark.marks_obtained / mark.total_marks) * 100 if mark.total_marks > 0 else 0
-        writer.writerow([
-            student.name,
-            student.roll_number,
-            dept.code,
-            student.current_semester_id, # optimizing to avoid extra join if just ID is needed, but let's assume we want name if available. simplistic for now.
-            subject.code,
-            subject.name,
-            mark.exam_type,
-            mark.marks_obtained,
-            mark.total_marks,
-            f"{percentage:.2f}"
-        ])
-        
-    output.seek(0)
+    job = get_export_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != COMPLETED or not job.path or not os.path.exists(job.path):
+        raise HTTPException(status_code=409, detail=f"Export is not ready (status: {job.status})")
     
-    response = StreamingResponse(iter([output.getvalue()]), media_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=student_performance_report.csv"
-    return response
+    media_type, _ = EXPORT_FORMATS[job.format]
+    return FileResponse(job.path, media_type=media_type, filename=job.filename)
+
+@router.post("/marks/import", response_model=schemas.MarksImportReport)
+def import_marks(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Import marks from a CSV or XLSX file (columns: roll_number, subject_code,
+    exam_type, marks_obtained, total_marks). Rows are streamed and written in
+    chunks of `chunk_size`; rejected rows are listed in the report.
+    """
+    try:
+        return import_marks_file(db, file.filename, file.file, current_user, chunk_size)
+    except MarksImportError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail())
 
 @router.post("/departments", response_model=schemas.DepartmentResponse, status_code=status.HTTP_201_CREATED)
 def create_department(
@@ -223,6 +259,14 @@ def get_subjects(
 ):
     return db.query(models.Subject).all()
 
+def _hash_password(password: str) -> str:
+    """bcrypt in the password worker pool; 503 when its queue is full."""
+    from password_service import get_password_service, PasswordServiceBusy
+    try:
+        return get_password_service().hash_sync(password)
+    except PasswordServiceBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
 @router.post("/students", response_model=schemas.StudentResponse, status_code=status.HTTP_201_CREATED)
 def create_student(
     student: schemas.StudentCreate,
@@ -242,7 +286,7 @@ def create_student(
         raise HTTPException(status_code=400, detail="Student with this Roll Number already exists")
 
     # Create User
-    hashed_password = auth.get_password_hash(student.password)
+    hashed_password = _hash_password(student.password)
     db_user = models.User(
         username=student.roll_number,
         password_hash=hashed_password,
@@ -288,7 +332,7 @@ def create_teacher(
         raise HTTPException(status_code=400, detail="User with this email already exists")
 
     # Create User
-    hashed_password = auth.get_password_hash(teacher.password)
+    hashed_password = _hash_password(teacher.password)
     db_user = models.User(
         username=teacher.email,
         password_hash=hashed_password,
@@ -318,6 +362,61 @@ def get_teachers(
 ):
     return db.query(models.Teacher).all()
 
+def _run_onboarding(onboard, db: Session, rows):
+    from onboarding import OnboardingError, OnboardingConflict
+    from password_service import PasswordServiceBusy
+    try:
+        return onboard(db, rows)
+    except OnboardingConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except OnboardingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PasswordServiceBusy as e:
+        db.rollback()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+@router.post("/students/bulk", response_model=schemas.OnboardingReport)
+def bulk_create_students(
+    students: List[schemas.BulkStudentCreate],
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """Create many students in one transaction; invalid rows are reported, not created."""
+    from onboarding import onboard_students
+    rows = ((i, student.model_dump()) for i, student in enumerate(students, start=1))
+    return _run_onboarding(onboard_students, db, rows)
+
+@router.post("/students/bulk/upload", response_model=schemas.OnboardingReport)
+def bulk_upload_students(
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """CSV variant of /students/bulk (columns: roll_number, name, department_id, current_semester_id, password[, section_id, batch_id])."""
+    from onboarding import onboard_students, iter_csv_rows, STUDENT_COLUMNS
+    return _run_onboarding(onboard_students, db, iter_csv_rows(file.file, STUDENT_COLUMNS))
+
+@router.post("/teachers/bulk", response_model=schemas.OnboardingReport)
+def bulk_create_teachers(
+    teachers: List[schemas.TeacherCreate],
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """Create many teachers in one transaction; invalid rows are reported, not created."""
+    from onboarding import onboard_teachers
+    rows = ((i, teacher.model_dump()) for i, teacher in enumerate(teachers, start=1))
+    return _run_onboarding(onboard_teachers, db, rows)
+
+@router.post("/teachers/bulk/upload", response_model=schemas.OnboardingReport)
+def bulk_upload_teachers(
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """CSV variant of /teachers/bulk (columns: email, name, department_id, password)."""
+    from onboarding import onboard_teachers, iter_csv_rows, TEACHER_COLUMNS
+    return _run_onboarding(onboard_teachers, db, iter_csv_rows(file.file, TEACHER_COLUMNS))
+
 @router.post("/teacher-subjects", response_model=schemas.MessageResponse, status_code=status.HTTP_201_CREATED)
 def assign_subject_to_teacher(
     assignment: schemas.TeacherSubjectAssignment,
@@ -365,9 +464,99 @@ def update_settings(
     settings.pass_percentage = settings_update.pass_percentage
     settings.weak_threshold = settings_update.weak_threshold
     db.commit()
+    # Thresholds feed every cached transcript/analysis
+    transcript_cache.clear()
     db.refresh(settings)
     return settings
 
+@router.get("/cache/stats")
+def get_cache_stats(
+    current_user: models.User = Depends(auth.RoleChecker(["admin"]))
+):
+    """Hit/miss counters for the per-student transcript cache and the auth principal cache."""
+    from principal_cache import principal_cache
+    return {"transcript_cache": transcript_cache.stats(), "principal_cache": principal_cache.stats()}
+
+@router.get("/auth/password-service")
+def get_password_service_stats(
+    current_user: models.User = Depends(auth.RoleChecker(["admin"]))
+):
+    """Worker pool size, bcrypt cost and queue depth of the password hashing service."""
+    from password_service import get_password_service
+    return get_password_service().stats()
+
+@router.get("/ai/circuit-breaker")
+def get_ai_circuit_breaker(
+    current_user: models.User = Depends(auth.RoleChecker(["admin"]))
+):
+    """State and counters of the circuit breaker guarding AI model calls."""
+    from ai_service import get_circuit_breaker, get_summarizer
+    return {
+        "ai_enabled": get_summarizer().ai_enabled,
+        "circuit_breaker": get_circuit_breaker().snapshot()
+    }
+
+@router.post("/ai/circuit-breaker/reset")
+def reset_ai_circuit_breaker(
+    current_user: models.User = Depends(auth.RoleChecker(["admin"]))
+):
+    """Force the AI circuit breaker closed (e.g. after a provider incident is resolved)."""
+    from ai_service import get_circuit_breaker
+    breaker = get_circuit_breaker()
+    breaker.reset()
+    return {"circuit_breaker": breaker.snapshot()}
+
+@router.post("/ai/precompute-jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_summary_precompute_job(
+    section_id: int = None,
+    semester_id: int = None,
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Generate student AI summaries in the background (all students, or one section/semester).
+
+    Re-submitting the same filters while a job is unfinished returns (and, if
+    interrupted, resumes) that job.
+    """
+    from summary_precompute import get_precompute_manager, PrecomputeError
+
+    filters = {"section_id": section_id, "semester_id": semester_id}
+    try:
+        return get_precompute_manager().submit(db.get_bind(), filters)
+    except PrecomputeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/ai/precompute-jobs/{job_id}")
+def get_summary_precompute_job(
+    job_id: str,
+    current_user: models.User = Depends(auth.RoleChecker(["admin"]))
+):
+    """Poll progress, throughput and failure counts of a precompute job."""
+    from summary_precompute import get_precompute_manager
+
+    job = get_precompute_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Precompute job not found")
+    return job
+
+@router.post("/ai/precompute-jobs/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+def resume_summary_precompute_job(
+    job_id: str,
+    current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """Continue an interrupted or failed precompute job from its last checkpoint."""
+    from summary_precompute import get_precompute_manager, PrecomputeError
+
+    manager = get_precompute_manager()
+    if not manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Precompute job not found")
+    try:
+        return manager.resume(db.get_bind(), job_id)
+    except PrecomputeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 
 # ============================================================================
 # NEW MODEL ENDPOINTS: Sections
@@ -1,40 +1,55 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import database, models, auth, schemas, analysis
+from transcript_cache import transcript_cache
+from principal_cache import Principal
 
 router = APIRouter()
 
-@router.get("/marks", response_model=List[schemas.SemesterPerformance])
-def get_student_marks(
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(database.get_db)
-):
-    # LEGACY COMPAT: Response shape remains same (SemesterPerformance)
-    # INTERNAL: Uses exam_sessions for exam categorization instead of string-based exam_type
-    
-    if current_user.role != models.UserRole.STUDENT:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    student = current_user.student_profile
-    if not student:
-        raise HTTPException(status_code=404, detail="Student profile not found")
-        
+
+def build_transcript(db: Session, student_id: int) -> List[schemas.SemesterPerformance]:
+    """Build the semester -> subject transcript for a student (uncached)."""
+    # Single joined query over the transcript columns only; avoids lazy-loading
+    # subject/semester/exam_session/exam_type once per mark row.
+    rows = db.query(
+        models.Marks.marks_obtained,
+        models.Marks.max_marks,
+        models.Marks.total_marks,
+        models.Marks.exam_type,
+        models.Subject.name.label("subject_name"),
+        models.Subject.code.label("subject_code"),
+        models.Semester.name.label("semester_name"),
+        models.ExamType.name.label("session_exam_type"),
+    ).join(
+        models.Subject, models.Marks.subject_id == models.Subject.id
+    ).join(
+        models.Semester, models.Subject.semester_id == models.Semester.id
+    ).outerjoin(
+        models.ExamSession, models.Marks.exam_session_id == models.ExamSession.id
+    ).outerjoin(
+        models.ExamType, models.ExamSession.exam_type_id == models.ExamType.id
+    ).filter(
+        models.Marks.student_id == student_id
+    ).order_by(models.Marks.id).all()
+
     # Group marks by Semester -> Subject
     # Structure: { sem_name: { subj_code: { internal: 0, uni: 0, total_max: 0, name: "" } } }
     sem_data = {}
     
-    for mark in student.marks:
-        sem_name = mark.subject.semester.name
-        subj_code = mark.subject.code
+    for row in rows:
+        sem_name = row.semester_name
+        subj_code = row.subject_code
         
         if sem_name not in sem_data:
             sem_data[sem_name] = {}
             
         if subj_code not in sem_data[sem_name]:
             sem_data[sem_name][subj_code] = {
-                "subject_name": mark.subject.name,
-                "subject_code": mark.subject.code,
+                "subject_name": row.subject_name,
+                "subject_code": row.subject_code,
                 "internal_marks": 0.0,
                 "university_marks": 0.0,
                 "total_marks": 0.0,
@@ -44,21 +59,18 @@ def get_student_marks(
         target = sem_data[sem_name][subj_code]
         
         # NEW MODEL: Use exam_session if available, fallback to legacy exam_type
-        if mark.exam_session and mark.exam_session.exam_type:
-            exam_type_name = mark.exam_session.exam_type.name
-        else:
-            exam_type_name = mark.exam_type  # Legacy fallback
+        exam_type_name = row.session_exam_type or row.exam_type
         
         # Categorize by exam type
         if exam_type_name and "Semester" in exam_type_name:
-            target["university_marks"] += mark.marks_obtained
+            target["university_marks"] += row.marks_obtained
         else:
-            target["internal_marks"] += mark.marks_obtained
+            target["internal_marks"] += row.marks_obtained
             
-        target["total_marks"] += mark.marks_obtained
+        target["total_marks"] += row.marks_obtained
         
         # Use max_marks from new model if available, else total_marks from legacy
-        max_marks_value = mark.max_marks if mark.max_marks else mark.total_marks
+        max_marks_value = row.max_marks if row.max_marks else row.total_marks
         target["max_total_marks"] += max_marks_value
 
     # Build Response
@@ -68,15 +80,15 @@ def get_student_marks(
     # Sort semesters
     sorted_semesters = sorted(sem_data.keys(), key=lambda x: semester_order.index(x) if x in semester_order else 99)
 
+    # Calculate Pass/Fail: Fetch percentage from settings (once per request)
+    settings = db.query(models.Settings).first()
+    pass_percentage = settings.pass_percentage if settings else 40.0
+
     for sem in sorted_semesters:
         subjects_list = []
         backlog_count = 0
         
         for code, data in sem_data[sem].items():
-            # Calculate Pass/Fail: Fetch percentage from settings
-            settings = db.query(models.Settings).first()
-            pass_percentage = settings.pass_percentage if settings else 40.0
-            
             pass_threshold = (pass_percentage / 100.0) * data["max_total_marks"] if data["max_total_marks"] > 0 else 0
             is_passed = data["total_marks"] >= pass_threshold
             if not is_passed:
@@ -101,62 +113,87 @@ def get_student_marks(
         
     return response
 
-@router.get("/analysis")
-def get_student_analysis(
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(database.get_db)
-):
-    # LEGACY COMPAT: Analysis uses exam_session-based marks grouping internally
-    
-    if current_user.role != models.UserRole.STUDENT:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    student = current_user.student_profile
-    if not student:
-        raise HTTPException(status_code=404, detail="Student profile not found")
+
+def build_analysis(db: Session, student_id: int) -> dict:
+    """Run analyze_performance over a student's marks (uncached)."""
+    rows = db.query(
+        models.Marks.marks_obtained,
+        models.Marks.max_marks,
+        models.Marks.total_marks,
+        models.Subject.name.label("subject_name"),
+        models.Semester.name.label("semester_name"),
+    ).join(
+        models.Subject, models.Marks.subject_id == models.Subject.id
+    ).join(
+        models.Semester, models.Subject.semester_id == models.Semester.id
+    ).filter(
+        models.Marks.student_id == student_id
+    ).order_by(models.Marks.id).all()
 
     # Build marks data for analysis
     marks_data = []
-    for m in student.marks:
+    for m in rows:
         # Use max_marks from new model if available, else total_marks from legacy
         total_marks = m.max_marks if m.max_marks else m.total_marks
         marks_data.append({
-            "subject": m.subject.name,
+            "subject": m.subject_name,
             "marks": m.marks_obtained,
             "total": total_marks,
-            "semester": m.subject.semester.name
+            "semester": m.semester_name
         })
         
     settings = db.query(models.Settings).first()
     weak_threshold = settings.weak_threshold if settings else 50.0
-    return analysis.analyze_performance(student.id, marks_data, weak_threshold)
+    return analysis.analyze_performance(student_id, marks_data, weak_threshold)
 
 
-@router.get("/ai-summary")
-def get_ai_performance_summary(
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(database.get_db)
+def _principal_student_id(principal: Principal) -> int:
+    if principal.role != models.UserRole.STUDENT:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not principal.student_id:
+        raise HTTPException(status_code=404, detail="Student profile not found")
+    return principal.student_id
+
+@router.get("/marks", response_model=List[schemas.SemesterPerformance])
+async def get_student_marks(
+    principal: Principal = Depends(auth.get_current_active_principal),
+    db: AsyncSession = Depends(database.get_async_db)
 ):
+    # LEGACY COMPAT: Response shape remains same (SemesterPerformance)
+    # INTERNAL: Uses exam_sessions for exam categorization instead of string-based exam_type
+    student_id = _principal_student_id(principal)
+
+    generation = transcript_cache.generation()  # before reading marks; see TranscriptCache.set
+    transcript = transcript_cache.get(student_id, "transcript")
+    if transcript is None:
+        transcript = await db.run_sync(build_transcript, student_id)
+        transcript_cache.set(student_id, "transcript", transcript, generation)
+    return transcript
+
+@router.get("/analysis")
+async def get_student_analysis(
+    principal: Principal = Depends(auth.get_current_active_principal),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    # LEGACY COMPAT: Analysis uses exam_session-based marks grouping internally
+    student_id = _principal_student_id(principal)
+
+    generation = transcript_cache.generation()  # before reading marks; see TranscriptCache.set
+    result = transcript_cache.get(student_id, "analysis")
+    if result is None:
+        result = await db.run_sync(build_analysis, student_id)
+        transcript_cache.set(student_id, "analysis", result, generation)
+    return result
+
+
+def build_student_summary_data(db: Session, student: models.Student,
+                               pass_percentage: Optional[float] = None) -> dict:
     """
-    Generate AI-powered performance summary for the student.
-    
-    READ-ONLY: Uses existing marks and analysis data.
-    Returns natural-language summary with insights and suggestions.
-    
-    Response:
-        {
-            "summary": "AI-generated text with performance insights",
-            "generated_at": "2025-12-26T20:05:00Z",
-            "source": "ai" | "fallback"
-        }
+    Build the student_data dict the AI summary is generated from (READ-ONLY).
+
+    Batch callers load marks/subjects/semesters eagerly and pass pass_percentage,
+    so no query is issued per student.
     """
-    if current_user.role != models.UserRole.STUDENT:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    student = current_user.student_profile
-    if not student:
-        raise HTTPException(status_code=404, detail="Student profile not found")
-    
     # Prepare data from existing endpoints (READ-ONLY)
     # 1. Get marks data
     marks_list = []
@@ -189,8 +226,7 @@ def get_ai_performance_summary(
     # Calculate overall and subject-wise metrics
     if not marks_list:
         # No marks available - return encouraging message
-        from ai_service import generate_student_summary
-        return generate_student_summary({
+        return {
             "student_name": student.name,
             "total_subjects": 0,
             "current_semester": student.current_semester.name if student.current_semester else "N/A",
@@ -199,7 +235,7 @@ def get_ai_performance_summary(
             "weak_subjects": [],
             "exam_trend": "N/A - No marks recorded yet",
             "backlogs": 0
-        })
+        }
     
     # Calculate average percentage
     total_obtained = sum(m['marks'] for m in marks_list)
@@ -248,8 +284,9 @@ def get_ai_performance_summary(
         exam_trend = "stable"
     
     # Calculate backlogs (subjects with < 40% - using settings)
-    settings = db.query(models.Settings).first()
-    pass_percentage = settings.pass_percentage if settings else 40.0
+    if pass_percentage is None:
+        settings = db.query(models.Settings).first()
+        pass_percentage = settings.pass_percentage if settings else 40.0
     
     backlogs = sum(1 for perf in subject_performance.values() 
                    if perf['total_max'] > 0 and 
@@ -267,7 +304,41 @@ def get_ai_performance_summary(
         "backlogs": backlogs
     }
     
-    # Generate AI summary (with fallback)
-    from ai_service import generate_student_summary
-    return generate_student_summary(student_data)
+    return student_data
 
+
+def _student_summary_data_for_user(db: Session, current_user: models.User) -> dict:
+    if current_user.role != models.UserRole.STUDENT:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    student = current_user.student_profile
+    if not student:
+        raise HTTPException(status_code=404, detail="Student profile not found")
+    
+    return build_student_summary_data(db, student)
+
+
+@router.get("/ai-summary")
+async def get_ai_performance_summary(
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Generate AI-powered performance summary for the student.
+    
+    READ-ONLY: Uses existing marks and analysis data.
+    Returns natural-language summary with insights and suggestions.
+    
+    Response:
+        {
+            "summary": "AI-generated text with performance insights",
+            "generated_at": "2025-12-26T20:05:00Z",
+            "source": "ai" | "fallback"
+        }
+    """
+    # Data preparation uses the sync session, so keep it off the event loop
+    student_data = await run_in_threadpool(_student_summary_data_for_user, db, current_user)
+    
+    # Generate AI summary (bounded concurrency and deadline, with fallback)
+    from ai_service import agenerate_student_summary
+    return await agenerate_student_summary(student_data)
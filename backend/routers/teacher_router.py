@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 import database, models, auth, schemas, analysis
+from transcript_cache import transcript_cache
+from principal_cache import Principal
+from marks_import import import_marks_file, marks_upsert, MarksImportError, DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
 
 
 router = APIRouter()
@@ -39,9 +45,9 @@ def get_teacher_subjects(
     return list(subjects_dict.values())
 
 @router.get("/subject-offerings", response_model=List[dict])
-def get_teacher_subject_offerings_enriched(
-    current_user: models.User = Depends(auth.RoleChecker(["teacher"])),
-    db: Session = Depends(database.get_db)
+async def get_teacher_subject_offerings_enriched(
+    principal: Principal = Depends(auth.PrincipalRoleChecker(["teacher"])),
+    db: AsyncSession = Depends(database.get_async_db)
 ):
     """
     NEW ENDPOINT: Get enriched subject offerings for the logged-in teacher.
@@ -61,39 +67,53 @@ def get_teacher_subject_offerings_enriched(
         "semester_name": "1-1"
     }
     """
-    teacher = current_user.teacher_profile
-    if not teacher:
+    if not principal.teacher_id:
         raise HTTPException(status_code=404, detail="Teacher profile not found")
     
-    # Use NEW MODEL: Get subject offerings from access_control helper
-    from access_control import get_teacher_subject_offerings
-    subject_offerings = get_teacher_subject_offerings(db, teacher.id)
-    
-    # Enrich with subject, section, and semester data
-    enriched_offerings = []
-    for offering in subject_offerings:
-        subject = offering.subject
-        section = offering.section
-        semester = subject.semester if subject else None
-        
-        enriched_offerings.append({
-            "subject_offering_id": offering.id,
+    # Same offerings as access_control.get_teacher_subject_offerings, joined in one query
+    rows = (await db.execute(
+        select(
+            models.SubjectOffering.id,
+            models.SubjectOffering.academic_year,
+            models.Subject.id.label("subject_id"),
+            models.Subject.name.label("subject_name"),
+            models.Subject.code.label("subject_code"),
+            models.Subject.semester_id,
+            models.Subject.department_id,
+            models.Section.id.label("section_id"),
+            models.Section.name.label("section_name"),
+            models.Semester.name.label("semester_name"),
+        ).outerjoin(
+            models.Subject, models.SubjectOffering.subject_id == models.Subject.id
+        ).outerjoin(
+            models.Section, models.SubjectOffering.section_id == models.Section.id
+        ).outerjoin(
+            models.Semester, models.Subject.semester_id == models.Semester.id
+        ).where(
+            models.SubjectOffering.teacher_id == principal.teacher_id,
+            models.SubjectOffering.academic_year == "2024-25"
+        ).order_by(models.SubjectOffering.id)
+    )).all()
+    
+    return [
+        {
+            "subject_offering_id": row.id,
             "subject": {
-                "id": subject.id,
-                "name": subject.name,
-                "code": subject.code,
-                "semester_id": subject.semester_id,
-                "department_id": subject.department_id
-            } if subject else None,
+                "id": row.subject_id,
+                "name": row.subject_name,
+                "code": row.subject_code,
+                "semester_id": row.semester_id,
+                "department_id": row.department_id
+            } if row.subject_id is not None else None,
             "section": {
-                "id": section.id,
-                "name": section.name
-            } if section else None,
-            "academic_year": offering.academic_year,
-            "semester_name": semester.name if semester else None
-        })
-    
-    return enriched_offerings
+                "id": row.section_id,
+                "name": row.section_name
+            } if row.section_id is not None else None,
+            "academic_year": row.academic_year,
+            "semester_name": row.semester_name
+        }
+        for row in rows
+    ]
 
 @router.post("/marks", response_model=schemas.MarksResponse, status_code=status.HTTP_201_CREATED)
 def upload_marks(
@@ -143,41 +163,158 @@ def upload_marks(
         db, marks.exam_type, subject.semester_id, regulation_id
     )
 
-    # Check if marks already exist for this student, subject, and exam type
-    existing_marks = db.query(models.Marks).filter(
-        models.Marks.student_id == marks.student_id,
-        models.Marks.subject_id == marks.subject_id,
-        models.Marks.exam_type == marks.exam_type
-    ).first()
+    # Insert or update the student/subject/exam row in one statement (no read-then-write race)
+    marks_id = db.execute(marks_upsert(db).values(
+        student_id=marks.student_id,
+        subject_id=marks.subject_id,                # Legacy
+        exam_type=marks.exam_type,                  # Legacy
+        marks_obtained=marks.marks_obtained,
+        total_marks=marks.total_marks,              # Legacy
+        max_marks=marks.total_marks,                # New model
+        subject_offering_id=subject_offering.id if subject_offering else None,  # New model
+        exam_session_id=exam_session.id if exam_session else None,              # New model
+        uploaded_by=current_user.id
+    ).returning(models.Marks.id)).scalar_one()
+    db.commit()
+    transcript_cache.invalidate(marks.student_id)
+    return db.get(models.Marks, marks_id)
 
-    if existing_marks:
-        # Update existing marks (both legacy and new fields)
-        existing_marks.marks_obtained = marks.marks_obtained
-        existing_marks.total_marks = marks.total_marks  # Legacy
-        existing_marks.max_marks = marks.total_marks     # New model
-        existing_marks.subject_offering_id = subject_offering.id if subject_offering else None
-        existing_marks.exam_session_id = exam_session.id if exam_session else None
-        existing_marks.uploaded_by = current_user.id
-        db.commit()
-        db.refresh(existing_marks)
-        return existing_marks
-    else:
-        # Create new marks (populate both legacy and new fields)
-        db_marks = models.Marks(
-            student_id=marks.student_id,
-            subject_id=marks.subject_id,                # Legacy
-            exam_type=marks.exam_type,                  # Legacy
-            marks_obtained=marks.marks_obtained,
-            total_marks=marks.total_marks,              # Legacy
-            max_marks=marks.total_marks,                # New model
-            subject_offering_id=subject_offering.id if subject_offering else None,  # New model
-            exam_session_id=exam_session.id if exam_session else None,              # New model
-            uploaded_by=current_user.id
-        )
-        db.add(db_marks)
-        db.commit()
-        db.refresh(db_marks)
-        return db_marks
+@router.post("/marks/bulk", response_model=schemas.MarksBulkResponse)
+def upload_marks_bulk(
+    payload: schemas.MarksBulkCreate,
+    current_user: models.User = Depends(auth.RoleChecker(["teacher", "admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Upload marks for many students in one subject/exam (e.g. a whole section).
+    
+    Same authorization rules as POST /marks, but the offering, exam sessions and
+    existing rows are resolved once with set-based queries and everything is
+    written in a single transaction. Unknown students, and repeats of a student
+    already in the payload (the first entry is kept), are reported per row.
+    """
+    teacher = current_user.teacher_profile
+    subject = db.query(models.Subject).filter(models.Subject.id == payload.subject_id).first()
+    
+    if not subject:
+         raise HTTPException(status_code=404, detail="Subject not found")
+         
+    # allow admin or the assigned teacher to upload
+    if current_user.role != models.UserRole.ADMIN and subject.teacher_id != teacher.id:
+         raise HTTPException(status_code=403, detail="You are not assigned to this subject")
+         
+    # Prevent modification of University marks (unless Admin)
+    if payload.exam_type == "University" and current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Teachers cannot modify University marks")
+
+    from access_control import get_subject_offering_for_teacher_subject, map_exam_type_to_sessions
+    
+    student_ids = {entry.student_id for entry in payload.entries}
+    
+    # Students with their regulation (via batch) in one query
+    student_rows = db.query(
+        models.Student.id, models.Batch.regulation_id
+    ).outerjoin(
+        models.Batch, models.Student.batch_id == models.Batch.id
+    ).filter(models.Student.id.in_(student_ids)).all()
+    regulation_by_student = {
+        row.id: row.regulation_id if row.regulation_id else 1  # Default to regulation 1 if no batch
+        for row in student_rows
+    }
+    
+    # Offering depends only on teacher + subject
+    subject_offering = None
+    if teacher:
+        subject_offering = get_subject_offering_for_teacher_subject(db, teacher.id, payload.subject_id)
+    offering_id = subject_offering.id if subject_offering else None
+    
+    sessions = map_exam_type_to_sessions(
+        db, payload.exam_type, subject.semester_id, regulation_by_student.values()
+    )
+    
+    # student_id -> existing marks id for this subject/exam
+    existing_by_student = dict(db.query(models.Marks.student_id, models.Marks.id).filter(
+        models.Marks.student_id.in_(student_ids),
+        models.Marks.subject_id == payload.subject_id,
+        models.Marks.exam_type == payload.exam_type
+    ).all())
+    
+    results = []
+    rows = {}   # student_id -> row values
+    for entry in payload.entries:
+        if entry.student_id not in regulation_by_student:
+            results.append(schemas.MarksBulkRowResult(
+                student_id=entry.student_id, status="error", detail="Student not found"
+            ))
+            continue
+        if entry.student_id in rows:
+            results.append(schemas.MarksBulkRowResult(
+                student_id=entry.student_id, status="error", detail="Duplicate in this upload"
+            ))
+            continue
+        
+        exam_session = sessions.get(regulation_by_student[entry.student_id])
+        values = {
+            "marks_obtained": entry.marks_obtained,
+            "total_marks": payload.total_marks,     # Legacy
+            "max_marks": payload.total_marks,       # New model
+            "subject_offering_id": offering_id,     # New model
+            "exam_session_id": exam_session.id if exam_session else None,  # New model
+            "uploaded_by": current_user.id
+        }
+        
+        existing_id = existing_by_student.get(entry.student_id)
+        row_status = "updated" if existing_id else "created"
+        rows[entry.student_id] = {
+            "student_id": entry.student_id,
+            "subject_id": payload.subject_id,   # Legacy
+            "exam_type": payload.exam_type,     # Legacy
+            **values
+        }
+        results.append(schemas.MarksBulkRowResult(
+            student_id=entry.student_id, status=row_status, marks_id=existing_id
+        ))
+    
+    # One executemany upsert instead of one round trip per row
+    if rows:
+        db.execute(marks_upsert(db), list(rows.values()))
+    created_ids = set(rows) - set(existing_by_student)
+    if created_ids:
+        new_ids = dict(db.query(models.Marks.student_id, models.Marks.id).filter(
+            models.Marks.student_id.in_(created_ids),
+            models.Marks.subject_id == payload.subject_id,
+            models.Marks.exam_type == payload.exam_type
+        ).all())
+        for result in results:
+            if result.status == "created" and result.student_id in new_ids:
+                result.marks_id = new_ids[result.student_id]
+    
+    db.commit()
+    transcript_cache.invalidate_many(regulation_by_student.keys())
+    
+    return schemas.MarksBulkResponse(
+        created=sum(1 for r in results if r.status == "created"),
+        updated=sum(1 for r in results if r.status == "updated"),
+        failed=sum(1 for r in results if r.status == "error"),
+        results=results
+    )
+
+@router.post("/marks/import", response_model=schemas.MarksImportReport)
+def import_marks(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+    current_user: models.User = Depends(auth.RoleChecker(["teacher", "admin"])),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Import marks from a CSV or XLSX file (columns: roll_number, subject_code,
+    exam_type, marks_obtained, total_marks). Rows are streamed and written in
+    chunks of `chunk_size`; rejected rows are listed in the report.
+    """
+    try:
+        return import_marks_file(db, file.filename, file.file, current_user, chunk_size)
+    except MarksImportError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail())
 
 @router.get("/student/{roll_number}", response_model=List[schemas.MarksResponse])
 def get_student_performance(
@@ -231,95 +368,114 @@ def get_class_analysis(
     semester_id: int,
     section_id: int = None,  # NEW: Optional section_id param for new model
     current_user: models.User = Depends(auth.RoleChecker(["teacher"])),
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_read_db)
 ):
     # LEGACY COMPAT: Analysis now section-aware, maintains dept/sem fallback
     
-    # Get all students in this class
+    # Aggregate in the database: one grouped query instead of loading every mark
+    # (and lazily its subject) into Python. Same per-row percentage as
+    # analyze_class_performance, averaged per subject name. Rows with total_marks = 0
+    # have no percentage (NULL, skipped by AVG) instead of a division-by-zero error.
+    percentage = models.Marks.marks_obtained * 100.0 / func.nullif(models.Marks.total_marks, 0)
+    query = db.query(
+        models.Subject.name, func.avg(percentage)
+    ).join(
+        models.Student, models.Marks.student_id == models.Student.id
+    ).join(
+        models.Subject, models.Marks.subject_id == models.Subject.id
+    )
+    
+    # Students in this class
     if section_id:
-        from access_control import get_students_by_section
-        students = get_students_by_section(db, section_id)
+        query = query.filter(models.Student.section_id == section_id)
     else:
-        from access_control import get_students_by_dept_semester
-        students = get_students_by_dept_semester(db, department_id, semester_id)
-    
-    student_ids = [s.id for s in students]
-    
-    # Get all marks for these students
-    marks = db.query(models.Marks).filter(models.Marks.student_id.in_(student_ids)).all()
+        query = query.filter(
+            models.Student.department_id == department_id,
+            models.Student.current_semester_id == semester_id
+        )
     
-    marks_data = []
-    for m in marks:
-         marks_data.append({
-            "subject": m.subject.name,
-            "marks": m.marks_obtained,
-            "total": m.total_marks,
-            "student_id": m.student_id
-        })
-        
-    return analysis.analyze_class_performance(marks_data)
+    rows = query.group_by(models.Subject.name).order_by(models.Subject.name).all()
+    # Subjects whose only marks have total_marks = 0 have no average
+    return analysis.summarize_class_performance({name: avg for name, avg in rows if avg is not None})
 
 
-@router.get("/ai-insights")
-def get_ai_class_insights(
-    subject_offering_id: int,
+@router.get("/sections/{section_id}/student-analysis")
+def get_section_student_analysis(
+    section_id: int,
     current_user: models.User = Depends(auth.RoleChecker(["teacher"])),
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_read_db)
 ):
     """
-    Generate AI-powered class insights for a specific subject offering.
+    Per-student analysis (analyze_performance output) for every student in a section.
     
-    READ-ONLY: Uses existing marks data for the section.
-    Returns natural-language insights about class performance.
+    One query for the roster, one for all marks and a single grouped pass via
+    analysis.analyze_many, instead of one query + DataFrame per student.
     
-    Query Params:
-        subject_offering_id: ID of the subject offering
-    
-    Response:
-        {
-            "insights": "AI-generated class analysis text",
-            "generated_at": "2025-12-26T20:15:00Z",
-            "scope": {
-                "subject": "OOPS",
-                "section": "05-a",
-                "academic_year": "2024-25"
-            },
-            "source": "ai" | "fallback"
-        }
+    Response: [{"student_id", "roll_number", "name", "analysis": {...}}, ...]
     """
     teacher = current_user.teacher_profile
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher profile not found")
     
-    # Verify subject offering exists
-    subject_offering = db.query(models.SubjectOffering).filter(
-        models.SubjectOffering.id == subject_offering_id
-    ).first()
-    
-    if not subject_offering:
-        raise HTTPException(status_code=404, detail="Subject offering not found")
-    
-    # Verify teacher has access to this subject offering
-    if subject_offering.teacher_id != teacher.id:
-        raise HTTPException(
-            status_code=403, 
-            detail="You do not have access to this subject offering"
-        )
-    
+    from access_control import verify_teacher_can_access_section
+    if not verify_teacher_can_access_section(db, teacher.id, section_id):
+        raise HTTPException(status_code=403, detail="You do not teach in this section")
+    
+    students = db.query(
+        models.Student.id, models.Student.roll_number, models.Student.name
+    ).filter(models.Student.section_id == section_id).order_by(models.Student.roll_number).all()
+    
+    rows = db.query(
+        models.Marks.student_id,
+        models.Marks.marks_obtained,
+        models.Marks.max_marks,
+        models.Marks.total_marks,
+        models.Subject.name.label("subject_name"),
+        models.Semester.name.label("semester_name"),
+    ).join(
+        models.Student, models.Marks.student_id == models.Student.id
+    ).join(
+        models.Subject, models.Marks.subject_id == models.Subject.id
+    ).join(
+        models.Semester, models.Subject.semester_id == models.Semester.id
+    ).filter(models.Student.section_id == section_id).all()
+    
+    marks_data = [{
+        "student_id": r.student_id,
+        "subject": r.subject_name,
+        "marks": r.marks_obtained,
+        # Use max_marks from new model if available, else total_marks from legacy
+        "total": r.max_marks if r.max_marks else r.total_marks,
+        "semester": r.semester_name
+    } for r in rows]
+    
+    settings = db.query(models.Settings).first()
+    weak_threshold = settings.weak_threshold if settings else 50.0
+    results = analysis.analyze_many(marks_data, weak_threshold)
+    
+    no_marks = {"weak_subjects": [], "trend": "Insufficent Data"}  # same as analyze_performance
+    return [{
+        "student_id": s.id,
+        "roll_number": s.roll_number,
+        "name": s.name,
+        "analysis": results.get(s.id, no_marks)
+    } for s in students]
+
+
+def build_class_insights_data(db: Session, subject_offering: models.SubjectOffering) -> dict:
+    """Build the class_data dict the AI insights are generated from (READ-ONLY)."""
     # Extract scope information
     subject = subject_offering.subject
     section = subject_offering.section
     academic_year = subject_offering.academic_year
     
-    # Get all students in this section
-    from access_control import get_students_by_section
-    students = get_students_by_section(db, section.id)
-    student_ids = [s.id for s in students]
+    # One set-based snapshot: class average, per-exam and per-student percentages
+    from performance_snapshot import get_offering_performance_snapshot
+    snapshot = get_offering_performance_snapshot(db, subject.id, section.id)
     
-    if not student_ids:
+    if not snapshot["total_students"]:
         # No students in section - return early
-        from ai_service import generate_teacher_insights
-        return generate_teacher_insights({
+        return {
             "subject_name": subject.name,
             "section_name": section.name,
             "academic_year": academic_year,
@@ -329,87 +485,36 @@ def get_ai_class_insights(
             "high_performers": [],
             "low_performers": [],
             "improvement_trend": "N/A - No students enrolled yet"
-        })
-    
-    # Get all marks for these students in this subject
-    marks = db.query(models.Marks).filter(
-        models.Marks.student_id.in_(student_ids),
-        models.Marks.subject_id == subject.id
-    ).all()
+        }
     
-    if not marks:
+    if not snapshot["has_marks"]:
         # No marks data - return early
-        from ai_service import generate_teacher_insights
-        return generate_teacher_insights({
+        return {
             "subject_name": subject.name,
             "section_name": section.name,
             "academic_year": academic_year,
-            "total_students": len(students),
+            "total_students": snapshot["total_students"],
             "class_average": 0,
             "exam_sessions": [],
             "high_performers": [],
             "low_performers": [],
             "improvement_trend": "N/A - No marks recorded yet"
-        })
-    
-    # Calculate class metrics
-    # 1. Overall average
-    total_obtained = 0
-    total_max = 0
-    
-    for mark in marks:
-        total_obtained += mark.marks_obtained
-        max_marks = mark.max_marks if mark.max_marks else mark.total_marks
-        total_max += max_marks
-    
-    class_average = (total_obtained / total_max * 100) if total_max > 0 else 0
-    
-    # 2. Exam session comparison
-    exam_session_data = {}
-    for mark in marks:
-        if mark.exam_session:
-            exam_name = mark.exam_session.exam_type.name if mark.exam_session.exam_type else "Unknown"
-            if exam_name not in exam_session_data:
-                exam_session_data[exam_name] = {"obtained": 0, "max": 0}
-            
-            max_marks = mark.max_marks if mark.max_marks else mark.total_marks
-            exam_session_data[exam_name]["obtained"] += mark.marks_obtained
-            exam_session_data[exam_name]["max"] += max_marks
-    
-    exam_sessions = []
-    for exam_type, data in exam_session_data.items():
-        if data["max"] > 0:
-            avg_marks = (data["obtained"] / data["max"]) * 100
-            exam_sessions.append({
-                "exam_type": exam_type,
-                "avg_marks": avg_marks
-            })
-    
-    # 3. Student-wise performance for high/low performers
-    student_performance = {}
-    for mark in marks:
-        student_id = mark.student_id
-        if student_id not in student_performance:
-            student_performance[student_id] = {"obtained": 0, "max": 0}
-        
-        max_marks = mark.max_marks if mark.max_marks else mark.total_marks
-        student_performance[student_id]["obtained"] += mark.marks_obtained
-        student_performance[student_id]["max"] += max_marks
+        }
+    
+    class_average = snapshot["class_average"]
+    exam_sessions = snapshot["exam_sessions"]
     
+    # High/low performers from per-student percentages (names come with the snapshot)
     high_performers = []
     low_performers = []
     
-    for student_id, perf in student_performance.items():
-        if perf["max"] > 0:
-            percentage = (perf["obtained"] / perf["max"]) * 100
-            student = db.query(models.Student).filter(models.Student.id == student_id).first()
-            
-            if percentage >= 75:
-                high_performers.append(student.name if student else f"Student {student_id}")
-            elif percentage < 50:
-                low_performers.append(student.name if student else f"Student {student_id}")
-    
-    # 4. Determine improvement trend (if multiple exam sessions)
+    for perf in snapshot["students"]:
+        if perf["percentage"] >= 75:
+            high_performers.append(perf["name"] or f"Student {perf['student_id']}")
+        elif perf["percentage"] < 50:
+            low_performers.append(perf["name"] or f"Student {perf['student_id']}")
+    
+    # Determine improvement trend (if multiple exam sessions)
     if len(exam_sessions) >= 2:
         # Sort by exam type (assuming Mid-1, Mid-2, Semester order)
         exam_sessions_sorted = sorted(exam_sessions, key=lambda x: x["exam_type"])
@@ -430,7 +535,7 @@ def get_ai_class_insights(
         "subject_name": subject.name,
         "section_name": section.name,
         "academic_year": academic_year,
-        "total_students": len(students),
+        "total_students": snapshot["total_students"],
         "class_average": class_average,
         "exam_sessions": exam_sessions,
         "high_performers": high_performers,
@@ -438,8 +543,62 @@ def get_ai_class_insights(
         "improvement_trend": improvement_trend
     }
     
-    # Generate AI insights (with fallback)
-    from ai_service import generate_teacher_insights
-    return generate_teacher_insights(class_data)
+    return class_data
 
 
+def _class_insights_data_for_teacher(db: Session, current_user: models.User, subject_offering_id: int) -> dict:
+    teacher = current_user.teacher_profile
+    if not teacher:
+        raise HTTPException(status_code=404, detail="Teacher profile not found")
+    
+    # Verify subject offering exists
+    subject_offering = db.query(models.SubjectOffering).filter(
+        models.SubjectOffering.id == subject_offering_id
+    ).first()
+    
+    if not subject_offering:
+        raise HTTPException(status_code=404, detail="Subject offering not found")
+    
+    # Verify teacher has access to this subject offering
+    if subject_offering.teacher_id != teacher.id:
+        raise HTTPException(
+            status_code=403, 
+            detail="You do not have access to this subject offering"
+        )
+    
+    return build_class_insights_data(db, subject_offering)
+
+
+@router.get("/ai-insights")
+async def get_ai_class_insights(
+    subject_offering_id: int,
+    current_user: models.User = Depends(auth.RoleChecker(["teacher"])),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Generate AI-powered class insights for a specific subject offering.
+    
+    READ-ONLY: Uses existing marks data for the section.
+    Returns natural-language insights about class performance.
+    
+    Query Params:
+        subject_offering_id: ID of the subject offering
+    
+    Response:
+        {
+            "insights": "AI-generated class analysis text",
+            "generated_at": "2025-12-26T20:15:00Z",
+            "scope": {
+                "subject": "OOPS",
+                "section": "05-a",
+                "academic_year": "2024-25"
+            },
+            "source": "ai" | "fallback"
+        }
+    """
+    # Data preparation uses the sync session, so keep it off the event loop
+    class_data = await run_in_threadpool(_class_insights_data_for_teacher, db, current_user, subject_offering_id)
+    
+    # Generate AI insights (bounded concurrency and deadline, with fallback)
+    from ai_service import agenerate_teacher_insights
+    return await agenerate_teacher_insights(class_data)
@@ -72,6 +72,60 @@ class MarksResponse(MarksCreate):
     class Config:
         from_attributes = True
 
+class MarksBulkEntry(BaseModel):
+    student_id: int
+    marks_obtained: float
+
+class MarksBulkCreate(BaseModel):
+    # One subject/exam per batch (e.g. Mid-1 marks for a whole section)
+    subject_id: int
+    exam_type: str
+    total_marks: float
+    entries: List[MarksBulkEntry]
+
+class MarksBulkRowResult(BaseModel):
+    student_id: int
+    status: str # "created", "updated" or "error"
+    marks_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class MarksBulkResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[MarksBulkRowResult]
+
+class MarksImportRowError(BaseModel):
+    row: int # line number in the uploaded file
+    roll_number: str
+    subject_code: str
+    error: str
+
+class MarksImportReport(BaseModel):
+    total_rows: int
+    created: int
+    updated: int
+    rejected: int
+    errors: List[MarksImportRowError] # capped; see rejected for the full count
+    completed: bool = True # False: import stopped early, created/updated count committed chunks only
+
+class BulkStudentCreate(StudentCreate):
+    section_id: Optional[int] = None # must belong to department_id
+    batch_id: Optional[int] = None # defaults to the section's batch
+
+class OnboardingRowResult(BaseModel):
+    row: int # 1-based position in the JSON list, line number in a CSV
+    username: str
+    status: str # "created" | "rejected"
+    id: Optional[int] = None # Student/Teacher id when created
+    error: Optional[str] = None
+
+class OnboardingReport(BaseModel):
+    total_rows: int
+    created: int
+    rejected: int
+    results: List[OnboardingRowResult]
+
 class DepartmentBase(BaseModel):
     name: str
     code: str
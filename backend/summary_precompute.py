@@ -0,0 +1,475 @@
+"""
+AI Summary Precompute Jobs
+
+Generating /student/ai-summary on demand for every student right after marks
+are published means thousands of slow model calls on the request path. This
+module runs an admin-triggered batch instead: it walks all students (or one
+section/semester), builds the same student_data the endpoint builds, and
+generates summaries through a rate-limited worker pool, AI_BATCH_SIZE students
+per model call (see ai_service.generate_summaries_batch). Results land in the AI
+summary cache under the same content key the endpoint uses, so later views are
+plain cache reads.
+
+Job state (counters and a student-id cursor) is persisted next to the summary
+cache, so a job interrupted by a restart or an open circuit breaker resumes
+from where it stopped. Students whose current data already has a stored
+summary are skipped. Students whose generation failed are recorded and retried
+once at the end of the run (and again by a later resume).
+
+A running job holds a lease: the worker process running it refreshes
+heartbeat_at every AI_PRECOMPUTE_LEASE_SECONDS / 4. A QUEUED/RUNNING job whose
+heartbeat is older than the lease is reported as interrupted, and resume claims
+it atomically in the store, so with several API workers exactly one of them
+picks it up. Reading a job never changes it.
+
+Configuration (environment):
+- AI_PRECOMPUTE_WORKERS: concurrent model calls per job (default: 2)
+- AI_PRECOMPUTE_RATE: model calls started per second (default: 1.0, 0 = unlimited)
+- AI_PRECOMPUTE_BATCH_SIZE: students loaded and checkpointed together (default: 50)
+- AI_PRECOMPUTE_LEASE_SECONDS: heartbeat age after which a job counts as orphaned (default: 60)
+
+Note: AI_SUMMARY_CACHE_MAX_ENTRIES / AI_SUMMARY_CACHE_TTL must be large enough
+to hold the precomputed population until it is viewed.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, selectinload, sessionmaker
+
+import models
+from ai_summary_cache import DEFAULT_PATH, content_key, get_summary_cache
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_WORKERS = int(os.getenv("AI_PRECOMPUTE_WORKERS", "2"))
+PRECOMPUTE_RATE = float(os.getenv("AI_PRECOMPUTE_RATE", "1.0"))
+PRECOMPUTE_BATCH_SIZE = int(os.getenv("AI_PRECOMPUTE_BATCH_SIZE", "50"))
+PRECOMPUTE_LEASE_SECONDS = float(os.getenv("AI_PRECOMPUTE_LEASE_SECONDS", "60"))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+
+class PrecomputeError(Exception):
+    """Raised when a precompute job cannot be started or resumed."""
+
+
+class _BreakerOpen(Exception):
+    """The AI circuit breaker opened during a batch; stop at the last checkpoint."""
+
+
+class RateLimiter:
+    """Spaces call starts at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class PrecomputeJobStore:
+    """SQLite persistence for job rows (lives in the summary cache file)."""
+
+    FIELDS = ["id", "filters", "status", "total", "processed", "succeeded", "skipped", "failed",
+              "cursor", "elapsed", "created_at", "updated_at", "finished_at", "error",
+              "failed_ids", "owner", "heartbeat_at"]
+
+    # Columns added after the first release (ALTER TABLE on older store files)
+    ADDED_COLUMNS = {
+        "failed_ids": "TEXT NOT NULL DEFAULT '[]'",
+        "owner": "TEXT",
+        "heartbeat_at": "REAL",
+    }
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS summary_precompute_jobs (
+                    id TEXT PRIMARY KEY,
+                    filters TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    processed INTEGER NOT NULL DEFAULT 0,
+                    succeeded INTEGER NOT NULL DEFAULT 0,
+                    skipped INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    cursor INTEGER NOT NULL DEFAULT 0,
+                    elapsed REAL NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL,
+                    error TEXT
+                )
+            """)
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(summary_precompute_jobs)")}
+            for name, definition in self.ADDED_COLUMNS.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE summary_precompute_jobs ADD COLUMN {name} {definition}")
+            self._conn.commit()
+        return self._conn
+
+    def create(self, filters: Dict[str, Optional[int]], total: int, owner: str) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO summary_precompute_jobs "
+                "(id, filters, status, total, created_at, updated_at, owner, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(filters, sort_keys=True), QUEUED, total, now, now, owner, now)
+            )
+            conn.commit()
+        return self.get(job_id)
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Atomically take over a resumable job (interrupted, failed, completed with
+        failed students, or in flight with an expired lease). False if another
+        worker holds or just claimed it.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE summary_precompute_jobs "
+                "SET status = ?, owner = ?, heartbeat_at = ?, updated_at = ?, error = NULL, finished_at = NULL "
+                "WHERE id = ? AND (status IN (?, ?) OR (status = ? AND failed_ids != '[]') "
+                "OR (status IN (?, ?) AND (heartbeat_at IS NULL OR heartbeat_at < ?)))",
+                (QUEUED, owner, now, now, job_id, INTERRUPTED, FAILED, COMPLETED,
+                 QUEUED, RUNNING, now - lease_seconds)
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_ids: List[str], owner: str) -> None:
+        """Refresh the lease of jobs this owner is running."""
+        if not job_ids:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"UPDATE summary_precompute_jobs SET heartbeat_at = ? "
+                f"WHERE owner = ? AND id IN ({', '.join('?' * len(job_ids))})",
+                (time.time(), owner, *job_ids)
+            )
+            conn.commit()
+
+    def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"UPDATE summary_precompute_jobs SET {assignments} WHERE id = ?",
+                         (*fields.values(), job_id))
+            conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {', '.join(self.FIELDS)} FROM summary_precompute_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.FIELDS, row))
+        job["filters"] = json.loads(job["filters"])
+        job["failed_ids"] = json.loads(job["failed_ids"])
+        return job
+
+    def find_unfinished(self, filters: Dict[str, Optional[int]]) -> Optional[Dict[str, Any]]:
+        """Most recent job for the same filters that has not completed."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id FROM summary_precompute_jobs WHERE filters = ? AND status != ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (json.dumps(filters, sort_keys=True), COMPLETED)
+            ).fetchone()
+        return self.get(row[0]) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _student_query(db, filters: Dict[str, Optional[int]]):
+    # Everything build_student_summary_data reads, loaded per batch instead of per student
+    query = db.query(models.Student).options(
+        selectinload(models.Student.marks).joinedload(models.Marks.subject).joinedload(models.Subject.semester),
+        joinedload(models.Student.current_semester),
+    )
+    if filters.get("section_id"):
+        query = query.filter(models.Student.section_id == filters["section_id"])
+    if filters.get("semester_id"):
+        query = query.filter(models.Student.current_semester_id == filters["semester_id"])
+    return query
+
+
+class SummaryPrecomputeManager:
+    """Runs precompute jobs one at a time; model calls fan out to a rate-limited pool."""
+
+    def __init__(self, store: Optional[PrecomputeJobStore] = None, workers: int = PRECOMPUTE_WORKERS,
+                 rate_per_second: float = PRECOMPUTE_RATE, batch_size: int = PRECOMPUTE_BATCH_SIZE,
+                 lease_seconds: float = PRECOMPUTE_LEASE_SECONDS):
+        self.store = store or PrecomputeJobStore()
+        self.batch_size = max(1, batch_size)
+        self.lease_seconds = lease_seconds
+        self.rate_limiter = RateLimiter(rate_per_second)
+        # Identifies this process's jobs in the store (heartbeats, claims)
+        self.owner = uuid.uuid4().hex
+        self._runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-precompute")
+        self._workers = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ai-precompute-call")
+        self._active = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def submit(self, engine: Engine, filters: Dict[str, Optional[int]]) -> Dict[str, Any]:
+        """Start a job, or return/resume the unfinished job for the same filters."""
+        self._check_ai_enabled()
+        existing = self.store.find_unfinished(filters)
+        if existing:
+            return self.resume(engine, existing["id"])
+
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        db = Session()
+        try:
+            total = _student_query(db, filters).count()
+        finally:
+            db.close()
+
+        job = self.store.create(filters, total, self.owner)
+        self._start(engine, job["id"])
+        return self.get(job["id"])
+
+    def resume(self, engine: Engine, job_id: str) -> Dict[str, Any]:
+        """
+        Continue an interrupted/failed job after its cursor, or retry the failed
+        students of a completed one (no-op if another worker is running it).
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            raise PrecomputeError("Precompute job not found")
+        status = self._to_dict(job)["status"]
+        if status in (INTERRUPTED, FAILED) or (status == COMPLETED and job["failed_ids"]):
+            self._check_ai_enabled()
+            if self.store.claim(job_id, self.owner, self.lease_seconds):
+                self._start(engine, job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current job state (read-only; an expired lease is reported as interrupted)."""
+        job = self.store.get(job_id)
+        return self._to_dict(job) if job else None
+
+    def _to_dict(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        status, error = job["status"], job["error"]
+        if status in (QUEUED, RUNNING) and (
+            job["heartbeat_at"] is None or time.time() - job["heartbeat_at"] > self.lease_seconds
+        ):
+            # The worker running it stopped without recording a final state
+            status, error = INTERRUPTED, "Interrupted before completion (no heartbeat)"
+        progress = None
+        if job["total"]:
+            progress = min(1.0, job["processed"] / job["total"])
+        elif status == COMPLETED:
+            progress = 1.0
+        return {
+            "job_id": job["id"],
+            "status": status,
+            "filters": job["filters"],
+            "total": job["total"],
+            "processed": job["processed"],
+            "succeeded": job["succeeded"],
+            "skipped": job["skipped"],
+            "failed": job["failed"],
+            "failed_student_ids": job["failed_ids"],
+            "progress": progress,
+            "throughput_per_second": job["processed"] / job["elapsed"] if job["elapsed"] else None,
+            "elapsed_seconds": job["elapsed"],
+            "created_at": job["created_at"],
+            "finished_at": job["finished_at"],
+            "error": error,
+        }
+
+    @staticmethod
+    def _check_ai_enabled() -> None:
+        from ai_service import get_summarizer
+        if not get_summarizer().ai_enabled:
+            raise PrecomputeError("AI backend is not enabled; summaries would only be rule-based fallbacks")
+
+    def _start(self, engine: Engine, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._active:
+                return
+            self._active.add(job_id)
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True,
+                                                          name="ai-precompute-heartbeat")
+                self._heartbeat_thread.start()
+        self._runner.submit(self._run, job_id, engine)
+
+    def _heartbeat_loop(self) -> None:
+        """Keep the lease of queued and running jobs of this process fresh."""
+        while not self._stopped.wait(self.lease_seconds / 4):
+            with self._lock:
+                job_ids = list(self._active)
+            try:
+                self.store.heartbeat(job_ids, self.owner)
+            except sqlite3.Error as e:
+                logger.warning(f"Summary precompute heartbeat failed: {e}")
+
+    def _generate_group(self, summarizer, group: List[Dict[str, Any]]) -> List[str]:
+        """
+        Generate and store summaries for a group of students (one batched model call).
+
+        Returns 'succeeded', 'skipped' or 'failed' per student, in order.
+        """
+        from ai_service import STUDENT_PROMPT_VERSION
+        cache = get_summary_cache()
+        outcomes = ["skipped"] * len(group)
+        missing = [
+            index for index, data in enumerate(group)
+            if cache.get(content_key("student_summary", data, STUDENT_PROMPT_VERSION)) is None
+        ]
+        if missing:
+            # Stores "ai" results in the cache; the lookup above is the only cache read
+            results = summarizer.generate_summaries_batch([group[i] for i in missing],
+                                                          throttle=self.rate_limiter.wait,
+                                                          check_cache=False)
+            for index, result in zip(missing, results):
+                outcomes[index] = "succeeded" if result["source"] == "ai" else "failed"
+        return outcomes
+
+    def _generate_students(self, db, summarizer, students) -> List[str]:
+        """Outcomes for a batch of students; raises _BreakerOpen if the breaker opened meanwhile."""
+        import ai_service
+        from routers.student_router import build_student_summary_data
+
+        settings = db.query(models.Settings).first()
+        pass_percentage = settings.pass_percentage if settings else 40.0
+        batch = [build_student_summary_data(db, s, pass_percentage) for s in students]
+        # One worker task per AI_BATCH_SIZE students (one prompt each)
+        group_size = max(1, ai_service.AI_BATCH_SIZE)
+        groups = [batch[i:i + group_size] for i in range(0, len(batch), group_size)]
+        outcomes = [
+            outcome
+            for group_outcomes in self._workers.map(
+                lambda group: self._generate_group(summarizer, group), groups)
+            for outcome in group_outcomes
+        ]
+        if ai_service.get_circuit_breaker().snapshot()["state"] == "open":
+            raise _BreakerOpen()
+        return outcomes
+
+    def _run(self, job_id: str, engine: Engine) -> None:
+        from ai_service import get_summarizer
+
+        job = self.store.get(job_id)
+        counts = {name: job[name] for name in ("processed", "succeeded", "skipped", "failed")}
+        cursor, prior_elapsed = job["cursor"], job["elapsed"]
+        failed_ids = set(job["failed_ids"])
+        run_started = time.monotonic()
+        self.store.update(job_id, status=RUNNING, owner=self.owner, heartbeat_at=time.time())
+
+        def checkpoint(**fields):
+            self.store.update(job_id, failed_ids=json.dumps(sorted(failed_ids)),
+                              elapsed=prior_elapsed + time.monotonic() - run_started, **counts, **fields)
+
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        db = Session()
+        summarizer = get_summarizer()
+        try:
+            while True:
+                students = _student_query(db, job["filters"]).filter(
+                    models.Student.id > cursor
+                ).order_by(models.Student.id).limit(self.batch_size).all()
+                if not students:
+                    break
+
+                outcomes = self._generate_students(db, summarizer, students)
+                for student, outcome in zip(students, outcomes):
+                    counts[outcome] += 1
+                    if outcome == "failed":
+                        failed_ids.add(student.id)
+                counts["processed"] += len(students)
+                cursor = students[-1].id
+                checkpoint(cursor=cursor)
+                db.expunge_all()
+
+            # One retry pass over students that failed in this or an earlier run
+            retry_ids = sorted(failed_ids)
+            for start in range(0, len(retry_ids), self.batch_size):
+                students = _student_query(db, job["filters"]).filter(
+                    models.Student.id.in_(retry_ids[start:start + self.batch_size])
+                ).order_by(models.Student.id).all()
+                outcomes = self._generate_students(db, summarizer, students)
+                for student, outcome in zip(students, outcomes):
+                    if outcome != "failed":
+                        failed_ids.discard(student.id)
+                        counts["failed"] -= 1
+                        counts[outcome] += 1
+                checkpoint()
+                db.expunge_all()
+
+            checkpoint(status=COMPLETED, finished_at=time.time())
+            logger.info(f"Summary precompute {job_id} completed: {counts}")
+        except _BreakerOpen:
+            # Keep the last checkpoint; stored summaries are skipped on resume
+            self.store.update(job_id, status=INTERRUPTED, error="AI circuit breaker is open",
+                              elapsed=prior_elapsed + time.monotonic() - run_started,
+                              finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Summary precompute {job_id} failed: {e}")
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time(),
+                              elapsed=prior_elapsed + time.monotonic() - run_started)
+        finally:
+            db.close()
+            with self._lock:
+                self._active.discard(job_id)
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._runner.shutdown(wait=True)
+        self._workers.shutdown(wait=True)
+
+
+# Global instance for reuse
+_manager_instance: Optional[SummaryPrecomputeManager] = None
+
+
+def get_precompute_manager() -> SummaryPrecomputeManager:
+    """Get or create the global summary precompute manager."""
+    global _manager_instance
+    if _manager_instance is None:
+        _manager_instance = SummaryPrecomputeManager()
+    return _manager_instance
@@ -0,0 +1,206 @@
+import os
+import sys
+
+# Add backend directory to path (same layout the app and Alembic use)
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Cheap bcrypt on an in-process pool; tests that need worker processes build their own service
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+# main.py touches the bundled database at import; keep it in its committed journal mode
+os.environ.setdefault("SQLITE_PROFILE", "default")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+
+import database, models, auth
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Fresh database file per test (keeps the bundled .db untouched); shared with async_engine."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    database.Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_engine(db_engine):
+    """Async engine over the same database file, for routes using get_async_db."""
+    engine = database.create_async_database_engine(str(db_engine.url), profile="default", poolclass=NullPool)
+    yield engine
+    engine.sync_engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    db = Session()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def client(db_engine, async_engine):
+    from main import app
+    from transcript_cache import transcript_cache
+    from principal_cache import principal_cache
+
+    transcript_cache.clear()
+    transcript_cache.reset_stats()
+    principal_cache.clear()  # tokens can repeat across tests; ids are per-database
+
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Read routes share the test engines but keep their read-only sessions
+    ReadSession = sessionmaker(class_=database.ReadOnlySession, autocommit=False, autoflush=False,
+                               bind=db_engine)
+
+    def override_get_read_db():
+        db = ReadSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSession = async_sessionmaker(async_engine, sync_session_class=database.ReadOnlySession,
+                                          autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    async def override_get_async_read_db():
+        async with AsyncReadSession() as db:
+            yield db
+
+    app.dependency_overrides[database.get_db] = override_get_db
+    app.dependency_overrides[database.get_read_db] = override_get_read_db
+    app.dependency_overrides[database.get_async_db] = override_get_async_db
+    app.dependency_overrides[database.get_async_read_db] = override_get_async_read_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def query_counter(db_engine, async_engine):
+    """Counts SQL statements issued against the test engines (sync and async)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = [db_engine, async_engine.sync_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def academic_data(db_session):
+    """Minimal academic structure: one department, section, teacher and student."""
+    db = db_session
+    institute = models.Institute(name="Test Institute", location="Test")
+    regulation = models.Regulation(code="R20", is_active=True)
+    db.add_all([institute, regulation])
+    db.flush()
+
+    dept = models.Department(name="Computer Science", code="CSE", institute_id=institute.id)
+    batch = models.Batch(admission_year=2020, regulation_id=regulation.id, institute_id=institute.id)
+    db.add_all([dept, batch])
+    db.flush()
+
+    semesters = [models.Semester(name=name, sequence=i + 1)
+                 for i, name in enumerate(["1-1", "1-2", "2-1", "2-2"])]
+    exam_types = [models.ExamType(name=name) for name in ["Mid-1", "Mid-2", "Semester"]]
+    section = models.Section(name="A", department_id=dept.id, batch_id=batch.id)
+    db.add_all(semesters + exam_types + [section, models.Settings(pass_percentage=40.0, weak_threshold=50.0)])
+    db.flush()
+
+    teacher_user = models.User(username="teacher@test.edu", password_hash="x", role="teacher")
+    admin_user = models.User(username="admin", password_hash="x", role="admin")
+    db.add_all([teacher_user, admin_user])
+    db.flush()
+    teacher = models.Teacher(user_id=teacher_user.id, email=teacher_user.username,
+                             name="Test Teacher", department_id=dept.id)
+    db.add(teacher)
+    db.flush()
+
+    exam_sessions = {}
+    for sem in semesters:
+        for exam_type in exam_types:
+            session = models.ExamSession(exam_type_id=exam_type.id, semester_id=sem.id,
+                                         regulation_id=regulation.id, academic_year="2024-25")
+            db.add(session)
+            exam_sessions[(sem.id, exam_type.name)] = session
+    db.commit()
+
+    return {
+        "department": dept,
+        "regulation": regulation,
+        "batch": batch,
+        "section": section,
+        "semesters": semesters,
+        "exam_types": exam_types,
+        "exam_sessions": exam_sessions,
+        "teacher": teacher,
+        "teacher_user": teacher_user,
+        "admin_user": admin_user,
+    }
+
+
+def make_student(db, data, roll_number, name=None):
+    user = models.User(username=roll_number, password_hash="x", role="student")
+    db.add(user)
+    db.flush()
+    student = models.Student(
+        user_id=user.id,
+        roll_number=roll_number,
+        name=name or f"Student {roll_number}",
+        department_id=data["department"].id,
+        current_semester_id=data["semesters"][0].id,
+        batch_id=data["batch"].id,
+        section_id=data["section"].id,
+    )
+    db.add(student)
+    db.commit()
+    return student
+
+
+def make_subject(db, data, code, semester, name=None):
+    subject = models.Subject(
+        name=name or f"Subject {code}",
+        code=code,
+        department_id=data["department"].id,
+        semester_id=semester.id,
+        teacher_id=data["teacher"].id,
+        regulation_id=data["regulation"].id,
+    )
+    db.add(subject)
+    db.commit()
+    return subject
+
+
+def auth_headers(user):
+    token = auth.create_access_token(data={"sub": user.username, "role": user.role, "user_id": user.id})
+    return {"Authorization": f"Bearer {token}"}
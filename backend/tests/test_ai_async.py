@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import ai_service
+from ai_summary_cache import SummaryCache
+from conftest import make_student, auth_headers
+
+
+STUDENT_DATA = {
+    "student_name": "Test Student",
+    "total_subjects": 1,
+    "current_semester": "1-1",
+    "average_percentage": 55.0,
+    "strong_subjects": [],
+    "weak_subjects": [],
+    "exam_trend": "stable",
+    "backlogs": 0,
+}
+
+
+def _slow_summarizer(monkeypatch, tmp_path, delay):
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=0, max_entries=0)  # disabled
+    monkeypatch.setattr(ai_service, "get_summary_cache", lambda: cache)
+    summarizer = ai_service.AIPerformanceSummarizer()
+    summarizer.ai_enabled = True
+    summarizer.backend = object()
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow_generate(student_data):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(delay)
+        with lock:
+            state["active"] -= 1
+        return "AI text"
+
+    monkeypatch.setattr(summarizer, "_generate_ai_summary", slow_generate)
+    return summarizer, state
+
+
+def test_deadline_returns_fallback_immediately(monkeypatch, tmp_path):
+    monkeypatch.setattr(ai_service, "AI_TIMEOUT_SECONDS", 0.1)
+    summarizer, _ = _slow_summarizer(monkeypatch, tmp_path, delay=1.0)
+
+    start = time.perf_counter()
+    result = asyncio.run(summarizer.agenerate_summary(STUDENT_DATA))
+    assert time.perf_counter() - start < 0.5
+    assert result["source"] == "fallback"
+
+
+def test_concurrency_is_bounded(monkeypatch, tmp_path):
+    monkeypatch.setattr(ai_service, "AI_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(ai_service, "AI_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(ai_service, "_ai_executor", None)
+    summarizer, state = _slow_summarizer(monkeypatch, tmp_path, delay=0.05)
+
+    async def burst():
+        return await asyncio.gather(*(summarizer.agenerate_summary(STUDENT_DATA) for _ in range(6)))
+
+    results = asyncio.run(burst())
+    assert all(r["source"] == "ai" for r in results)
+    assert state["peak"] <= 2
+    ai_service._get_ai_executor().shutdown(wait=True)
+    monkeypatch.setattr(ai_service, "_ai_executor", None)
+
+
+def test_ai_summary_route_awaits_service(client, db_session, academic_data):
+    student = make_student(db_session, academic_data, "ASYNC-001")
+    res = client.get("/student/ai-summary", headers=auth_headers(student.user))
+    assert res.status_code == 200
+    assert res.json()["source"] == "fallback"
+    assert "0.0%" in res.json()["summary"]
+
+
+def test_summary_cache_io_runs_off_the_event_loop(monkeypatch, tmp_path):
+    summarizer, _ = _slow_summarizer(monkeypatch, tmp_path, delay=0)
+    cache = SummaryCache(str(tmp_path / "threads.db"), ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(ai_service, "get_summary_cache", lambda: cache)
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+
+        def recorded(*args, _method=method):
+            threads.append(threading.current_thread())
+            return _method(*args)
+
+        monkeypatch.setattr(cache, name, recorded)
+
+    asyncio.run(summarizer.agenerate_summary(STUDENT_DATA))
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+    cache.close()
@@ -0,0 +1,103 @@
+import pytest
+
+import ai_service
+from ai_summary_cache import SummaryCache
+from llm_backends import StubBackend
+
+
+def student(i):
+    return {
+        "student_name": f"Student {i}",
+        "total_subjects": 4,
+        "current_semester": "1-2",
+        "average_percentage": 50.0 + i,
+        "strong_subjects": [{"name": "Maths", "percentage": 80.0}],
+        "weak_subjects": [],
+        "exam_trend": "stable",
+        "backlogs": 0,
+    }
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=3600, max_entries=100)
+    monkeypatch.setattr(ai_service, "get_summary_cache", lambda: cache)
+    monkeypatch.setattr(ai_service, "_circuit_breaker", ai_service.CircuitBreaker())
+    monkeypatch.setattr(ai_service, "AI_BATCH_SIZE", 3)
+    yield cache
+    cache.close()
+
+
+def test_batch_packs_students_per_call(cache):
+    backend = StubBackend(latency_seconds=0)
+    summarizer = ai_service.AIPerformanceSummarizer(backend=backend)
+    throttled = []
+
+    results = summarizer.generate_summaries_batch([student(i) for i in range(7)],
+                                                  throttle=lambda: throttled.append(1))
+
+    assert backend.calls == 3        # 3 + 3 + 1 students
+    assert len(throttled) == 3
+    assert [r["source"] for r in results] == ["ai"] * 7
+    assert results[0]["summary"].endswith("S1] Generated response.")
+    assert results[4]["summary"].endswith("S2] Generated response.")
+
+    # Stored under the single-student key, so the endpoint path reads them
+    assert summarizer.generate_summary(student(4)) == results[4]
+    again = summarizer.generate_summaries_batch([student(i) for i in range(7)])
+    assert again == results
+    assert backend.calls == 3
+
+
+def test_unparseable_batch_falls_back_to_single_calls(cache):
+    class ProseBackend(StubBackend):
+        def generate(self, prompt, **kwargs):
+            text = super().generate(prompt, **kwargs)
+            return "Here you go!" if text.startswith("{") else text
+
+    backend = ProseBackend(latency_seconds=0)
+    summarizer = ai_service.AIPerformanceSummarizer(backend=backend)
+    results = summarizer.generate_summaries_batch([student(i) for i in range(3)])
+
+    assert backend.calls == 4        # one failed batch + 3 single calls
+    assert all(r["source"] == "ai" and r["summary"].startswith("[stub ") for r in results)
+
+
+def test_batch_prompt_lists_instructions_once():
+    summarizer = ai_service.AIPerformanceSummarizer(backend=StubBackend(latency_seconds=0))
+    prompt = summarizer._construct_batch_prompt([student(i) for i in range(3)], ["S1", "S2", "S3"])
+    assert prompt.count("Motivational closing remark") == 1
+    assert "S2 | 4 | 1-2 | 51.0% | 0 | stable | Maths (80.0%) | -" in prompt
+    assert prompt.rstrip().endswith("JSON keys: S1, S2, S3")
+
+
+def test_parse_batch_reply():
+    reply = 'Sure:\n```json\n{"S1": " First ", "S2": "Second"}\n```'
+    assert ai_service._parse_batch_reply(reply, ["S1", "S2"]) == ["First", "Second"]
+    with pytest.raises(ValueError):
+        ai_service._parse_batch_reply('{"S1": "only one"}', ["S1", "S2"])
+    with pytest.raises(ValueError):
+        ai_service._parse_batch_reply("no json here", ["S1"])
+
+
+def test_healthy_batch_is_not_a_slow_call(cache, monkeypatch):
+    # 0.1s is slow for one student but within budget for a batch of three
+    breaker = ai_service.CircuitBreaker(slow_call_seconds=0.05)
+    monkeypatch.setattr(ai_service, "_circuit_breaker", breaker)
+    timeouts = []
+
+    class RecordingBackend(StubBackend):
+        def generate(self, prompt, **kwargs):
+            timeouts.append(kwargs["timeout"])
+            return super().generate(prompt, **kwargs)
+
+    summarizer = ai_service.AIPerformanceSummarizer(backend=RecordingBackend(latency_seconds=0.1))
+    results = summarizer.generate_summaries_batch([student(i) for i in range(3)])
+
+    assert [r["source"] for r in results] == ["ai"] * 3
+    assert timeouts == [ai_service.AI_TIMEOUT_SECONDS * 3]
+    assert breaker.snapshot()["slow_calls"] == 0
+    assert breaker.snapshot()["state"] == "closed"
+
+    breaker.record_success(0.1)     # the same latency for a single call is slow
+    assert breaker.snapshot()["slow_calls"] == 1
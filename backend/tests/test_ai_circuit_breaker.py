@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import ai_service
+from ai_service import CircuitBreaker, CircuitOpenError
+from ai_summary_cache import SummaryCache
+from conftest import auth_headers
+
+
+STUDENT_DATA = {
+    "student_name": "Test Student",
+    "total_subjects": 1,
+    "current_semester": "1-1",
+    "average_percentage": 55.0,
+    "strong_subjects": [],
+    "weak_subjects": [],
+    "exam_trend": "stable",
+    "backlogs": 0,
+}
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.1, slow_call_seconds=1.0)
+    monkeypatch.setattr(ai_service, "_circuit_breaker", breaker)
+    return breaker
+
+
+def test_opens_after_consecutive_failures_and_recovers(breaker):
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure(RuntimeError("boom"))
+    assert breaker.snapshot()["state"] == "open"
+    assert not breaker.allow_request()
+
+    time.sleep(0.15)
+    assert breaker.allow_request()          # half-open trial call
+    assert not breaker.allow_request()      # only one trial at a time
+    breaker.record_success(0.01)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == "closed"
+    assert snapshot["times_opened"] == 1
+    assert snapshot["rejected"] == 2
+
+
+def test_slow_calls_count_as_failures(breaker):
+    for _ in range(3):
+        breaker.allow_request()
+        breaker.record_success(2.0)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == "open"
+    assert snapshot["slow_calls"] == 3
+
+
+def test_failed_half_open_trial_reopens(breaker):
+    for _ in range(3):
+        breaker.allow_request()
+        breaker.record_failure(RuntimeError("boom"))
+    time.sleep(0.15)
+    assert breaker.allow_request()
+    breaker.record_failure(RuntimeError("still down"))
+    assert breaker.snapshot()["state"] == "open"
+    assert breaker.snapshot()["times_opened"] == 2
+
+
+def test_open_circuit_serves_fallback_without_calling_model(breaker, monkeypatch, tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=0, max_entries=0)
+    monkeypatch.setattr(ai_service, "get_summary_cache", lambda: cache)
+    summarizer = ai_service.AIPerformanceSummarizer()
+    summarizer.ai_enabled = True
+    summarizer.backend = object()
+    calls = []
+
+    def failing_generate(student_data):
+        calls.append(1)
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(summarizer, "_generate_ai_summary", failing_generate)
+
+    for _ in range(3):
+        assert summarizer.generate_summary(STUDENT_DATA)["source"] == "fallback"
+    assert len(calls) == 3
+
+    result = asyncio.run(summarizer.agenerate_summary(STUDENT_DATA))
+    assert result["source"] == "fallback"
+    assert len(calls) == 3
+    with pytest.raises(CircuitOpenError):
+        ai_service.call_with_breaker(failing_generate, STUDENT_DATA)
+
+
+def test_admin_circuit_breaker_endpoints(client, academic_data, breaker):
+    headers = auth_headers(academic_data["admin_user"])
+    breaker.allow_request()
+    breaker.record_failure(RuntimeError("boom"))
+
+    res = client.get("/admin/ai/circuit-breaker", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["circuit_breaker"]["failures"] == 1
+
+    res = client.post("/admin/ai/circuit-breaker/reset", headers=headers)
+    assert res.json()["circuit_breaker"]["failures"] == 0
+
+    res = client.get("/admin/ai/circuit-breaker", headers=auth_headers(academic_data["teacher_user"]))
+    assert res.status_code == 403
+
+
+def test_queue_timeouts_do_not_count_against_backend(breaker, monkeypatch):
+    monkeypatch.setattr(ai_service, "AI_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(ai_service, "_ai_executor", None)
+
+    def healthy_call():
+        time.sleep(0.3)
+        return "ok"
+
+    async def burst():
+        running = asyncio.ensure_future(ai_service.run_with_deadline(healthy_call, timeout=2.0))
+        await asyncio.sleep(0.01)  # holds the only slot
+        queued = [ai_service.run_with_deadline(healthy_call, timeout=0.05) for _ in range(5)]
+        return await asyncio.gather(running, *queued, return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert results[0] == "ok"
+    assert all(isinstance(r, asyncio.TimeoutError) for r in results[1:])
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == "closed"
+    assert (snapshot["failures"], snapshot["successes"]) == (0, 1)
+    ai_service._get_ai_executor().shutdown(wait=True)
+    monkeypatch.setattr(ai_service, "_ai_executor", None)
+
+
+def test_timed_out_calls_keep_their_slot(breaker, monkeypatch):
+    monkeypatch.setattr(ai_service, "AI_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(ai_service, "_ai_executor", None)
+    state = {"active": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def stuck_call():
+        with lock:
+            state["calls"] += 1
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.3)
+        with lock:
+            state["active"] -= 1
+        return "late"
+
+    async def burst():
+        abandoned = [ai_service.run_with_deadline(stuck_call, timeout=0.05) for _ in range(2)]
+        results = await asyncio.gather(*abandoned, return_exceptions=True)
+        # The abandoned calls are still running: new callers wait for their slots
+        # instead of queueing in the executor and being blamed on the backend
+        later = [ai_service.run_with_deadline(stuck_call, timeout=0.05) for _ in range(4)]
+        return results + await asyncio.gather(*later, return_exceptions=True)
+
+    results = asyncio.run(burst())
+    ai_service._get_ai_executor().shutdown(wait=True)
+    monkeypatch.setattr(ai_service, "_ai_executor", None)
+
+    assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+    assert state["calls"] == 2
+    assert state["peak"] <= 2
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == "closed"
+    assert snapshot["failures"] == 2
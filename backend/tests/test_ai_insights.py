@@ -0,0 +1,59 @@
+import models
+from performance_snapshot import get_offering_performance_snapshot
+from principal_cache import principal_cache
+from conftest import make_student, make_subject, auth_headers
+
+
+def _offering_with_marks(db, data, code, n_students):
+    sem = data["semesters"][0]
+    subject = make_subject(db, data, code, sem)
+    offering = models.SubjectOffering(subject_id=subject.id, section_id=data["section"].id,
+                                      teacher_id=data["teacher"].id, academic_year="2024-25")
+    db.add(offering)
+    for i in range(n_students):
+        student = make_student(db, data, f"{code}-{i:03d}", name=f"Student {code} {i}")
+        for exam, obtained in (("Mid-1", 6 + i * 4), ("Mid-2", 10 + i * 4)):
+            session = data["exam_sessions"][(sem.id, exam)]
+            db.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type=exam,
+                                marks_obtained=min(obtained, 30), total_marks=30, max_marks=30,
+                                exam_session_id=session.id))
+    db.commit()
+    return subject, offering
+
+
+def test_snapshot_values(db_session, academic_data):
+    subject, _ = _offering_with_marks(db_session, academic_data, "AI1", 3)
+    snapshot = get_offering_performance_snapshot(db_session, subject.id, academic_data["section"].id)
+
+    assert snapshot["total_students"] == 3
+    # obtained: (6+10) + (10+14) + (14+18) = 72 of 180
+    assert snapshot["class_average"] == 40.0
+    assert snapshot["exam_sessions"] == [
+        {"exam_type": "Mid-1", "avg_marks": 30 / 90 * 100},
+        {"exam_type": "Mid-2", "avg_marks": 42 / 90 * 100},
+    ]
+    assert [s["name"] for s in snapshot["students"]] == ["Student AI1 0", "Student AI1 1", "Student AI1 2"]
+    assert snapshot["students"][2]["percentage"] == 32 / 60 * 100
+
+
+def test_ai_insights_query_count_is_constant(client, db_session, academic_data, query_counter):
+    data = academic_data
+    headers = auth_headers(data["teacher_user"])
+    _, small = _offering_with_marks(db_session, data, "AI2", 3)
+    small_url = f"/teacher/ai-insights?subject_offering_id={small.id}"
+
+    principal_cache.clear()  # both measurements include the auth lookup
+    query_counter.clear()
+    res = client.get(small_url, headers=headers)
+    assert res.status_code == 200
+    small_queries = len(query_counter)
+
+    _, large = _offering_with_marks(db_session, data, "AI3", 6)
+    large_url = f"/teacher/ai-insights?subject_offering_id={large.id}"
+
+    principal_cache.clear()  # both measurements include the auth lookup
+    query_counter.clear()
+    res = client.get(large_url, headers=headers)
+    assert res.status_code == 200
+    assert len(query_counter) == small_queries
+    assert res.json()["scope"]["subject"] == "Subject AI3"
@@ -0,0 +1,84 @@
+import time
+
+import ai_service
+from ai_summary_cache import SummaryCache, content_key
+
+
+STUDENT_DATA = {
+    "student_name": "Test Student",
+    "total_subjects": 2,
+    "current_semester": "1-1",
+    "average_percentage": 62.5,
+    "strong_subjects": [],
+    "weak_subjects": [{"name": "Physics", "percentage": 45.0}],
+    "exam_trend": "stable",
+    "backlogs": 0,
+}
+
+
+def test_content_key_is_order_independent_and_versioned():
+    reordered = dict(reversed(list(STUDENT_DATA.items())))
+    assert content_key("student_summary", STUDENT_DATA, "1") == content_key("student_summary", reordered, "1")
+    assert content_key("student_summary", STUDENT_DATA, "1") != content_key("student_summary", STUDENT_DATA, "2")
+    changed = {**STUDENT_DATA, "average_percentage": 63.0}
+    assert content_key("student_summary", STUDENT_DATA, "1") != content_key("student_summary", changed, "1")
+
+
+def test_cache_ttl_and_size_limit(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=60, max_entries=2, touch_interval=0)
+    cache.put("a", {"summary": "A"})
+    cache.put("b", {"summary": "B"})
+    assert cache.get("a") == {"summary": "A"}  # touches "a", so "b" is least recently used
+    cache.put("c", {"summary": "C"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"summary": "A"}
+    assert cache.stats()["entries"] == 2
+
+    cache.ttl_seconds = 0.05
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    cache.close()
+
+
+def test_cache_hits_touch_at_most_once_per_interval(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=60, max_entries=10, touch_interval=60)
+    cache.put("a", {"summary": "A"})
+    conn = cache._connection()
+    writes = conn.total_changes
+    for _ in range(5):
+        assert cache.get("a") == {"summary": "A"}
+    assert conn.total_changes == writes  # fresh accessed_at: hits stay read-only
+
+    conn.execute("UPDATE summary_cache SET accessed_at = accessed_at - 120")
+    conn.commit()
+    writes = conn.total_changes
+    cache.get("a")
+    cache.get("a")
+    assert conn.total_changes == writes + 1
+    cache.close()
+
+
+def test_summary_cache_hit_skips_model(tmp_path, monkeypatch):
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(ai_service, "get_summary_cache", lambda: cache)
+
+    summarizer = ai_service.AIPerformanceSummarizer()
+    summarizer.ai_enabled = True
+    summarizer.backend = object()
+    calls = []
+
+    def fake_generate(student_data):
+        calls.append(student_data)
+        return f"Summary {len(calls)}"
+
+    monkeypatch.setattr(summarizer, "_generate_ai_summary", fake_generate)
+
+    first = summarizer.generate_summary(STUDENT_DATA)
+    second = summarizer.generate_summary(dict(STUDENT_DATA))
+    assert first["source"] == "ai"
+    assert second == first  # same text and original generated_at
+    assert len(calls) == 1
+
+    summarizer.generate_summary({**STUDENT_DATA, "backlogs": 1})
+    assert len(calls) == 2
+    cache.close()
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import analysis
+
+
+def _marks(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"subject": f"S{rng.randint(0, 9)}", "marks": rng.randint(0, 30), "total": 30,
+         "semester": rng.choice(["1-1", "1-2", "2-1"]), "student_id": rng.randint(1, 20)}
+        for _ in range(n)
+    ]
+
+
+def _assert_same(a, b):
+    assert a.keys() == b.keys()
+    for key in a:
+        if isinstance(a[key], dict):
+            assert list(a[key]) == list(b[key])
+            assert list(a[key].values()) == pytest.approx(list(b[key].values()))
+        elif isinstance(a[key], float):
+            assert type(a[key]) is type(b[key])
+            assert a[key] == pytest.approx(b[key])
+        else:
+            assert a[key] == b[key]
+
+
+@pytest.mark.parametrize("n", [0, 1, 10, 500])
+def test_engines_match(n):
+    marks = _marks(n, seed=n)
+    _assert_same(analysis.analyze_performance(1, marks, 50.0, engine="pandas"),
+                 analysis.analyze_performance(1, marks, 50.0, engine="numpy"))
+    _assert_same(analysis.analyze_class_performance(marks, engine="pandas"),
+                 analysis.analyze_class_performance(marks, engine="numpy"))
+
+
+def test_engines_match_without_semester():
+    marks = [{"subject": "Math", "marks": 20, "total": 50}, {"subject": "Art", "marks": 40, "total": 50}]
+    result = analysis.analyze_performance(1, marks, 50.0, engine="numpy")
+    _assert_same(analysis.analyze_performance(1, marks, 50.0, engine="pandas"), result)
+    assert result["weak_subjects"] == ["Math"]
+    assert result["overall_trend"] == "stable"
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        analysis.analyze_performance(1, _marks(3), engine="polars")
+
+
+def test_analyze_many_matches_per_student():
+    marks = _marks(400, seed=7)
+    many = analysis.analyze_many(marks, 50.0)
+    assert set(many) == {m["student_id"] for m in marks}
+    for student_id, result in many.items():
+        own = [m for m in marks if m["student_id"] == student_id]
+        _assert_same(analysis.analyze_performance(student_id, own, 50.0, engine="pandas"), result)
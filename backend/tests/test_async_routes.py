@@ -0,0 +1,61 @@
+import database
+import models
+from principal_cache import principal_cache
+from conftest import make_student, make_subject, auth_headers
+
+
+def test_admin_stats_single_round_trip(client, db_session, academic_data, query_counter):
+    make_student(db_session, academic_data, "AS-001")
+    make_student(db_session, academic_data, "AS-002")
+    headers = auth_headers(academic_data["admin_user"])
+    principal_cache.clear()
+
+    query_counter.clear()
+    res = client.get("/admin/stats", headers=headers)
+    assert res.status_code == 200
+    assert res.json() == {
+        "students": 2, "teachers": 1, "departments": 1, "subjects": 0,
+        "batches": 1, "sections": 1, "subject_offerings": 0, "exam_sessions": 12,
+    }
+    assert len(query_counter) == 2  # principal lookup + one query for all counts
+
+
+def test_teacher_subject_offerings_enriched(client, db_session, academic_data):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS101", data["semesters"][0], name="Programming")
+    db_session.add(models.SubjectOffering(subject_id=subject.id, section_id=data["section"].id,
+                                          teacher_id=data["teacher"].id, academic_year="2024-25"))
+    db_session.add(models.SubjectOffering(subject_id=subject.id, section_id=data["section"].id,
+                                          teacher_id=data["teacher"].id, academic_year="2023-24"))
+    db_session.commit()
+
+    res = client.get("/teacher/subject-offerings", headers=auth_headers(data["teacher_user"]))
+    assert res.status_code == 200
+    offerings = res.json()
+    assert len(offerings) == 1
+    assert offerings[0]["subject"] == {
+        "id": subject.id, "name": "Programming", "code": "CS101",
+        "semester_id": data["semesters"][0].id, "department_id": data["department"].id,
+    }
+    assert offerings[0]["section"] == {"id": data["section"].id, "name": "A"}
+    assert (offerings[0]["academic_year"], offerings[0]["semester_name"]) == ("2024-25", "1-1")
+
+
+def test_async_routes_enforce_roles(client, db_session, academic_data):
+    student = make_student(db_session, academic_data, "AS-003")
+    teacher_headers = auth_headers(academic_data["teacher_user"])
+
+    assert client.get("/student/marks", headers=teacher_headers).status_code == 403
+    assert client.get("/admin/stats", headers=teacher_headers).status_code == 403
+    assert client.get("/teacher/subject-offerings", headers=auth_headers(student.user)).status_code == 403
+    assert client.get("/student/analysis").status_code == 401
+
+    student.user.is_active = False
+    db_session.commit()
+    assert client.get("/student/analysis", headers=auth_headers(student.user)).status_code == 400
+
+
+def test_async_database_url_mapping():
+    assert database.async_database_url("sqlite:///app.db") == "sqlite+aiosqlite:///app.db"
+    assert database.async_database_url("postgresql+psycopg2://u@db/app") == "postgresql+asyncpg://u@db/app"
+    assert database.async_database_url("postgres://u@db/app") == "postgresql+asyncpg://u@db/app"
@@ -0,0 +1,105 @@
+import models
+from principal_cache import principal_cache
+from conftest import make_student, make_subject, auth_headers
+
+
+def _payload(subject, students, exam_type="Internal-1", marks=20):
+    return {
+        "subject_id": subject.id,
+        "exam_type": exam_type,
+        "total_marks": 30,
+        "entries": [{"student_id": s.id, "marks_obtained": marks} for s in students],
+    }
+
+
+def test_bulk_upload_creates_and_updates(client, db_session, academic_data):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS201", data["semesters"][0])
+    students = [make_student(db_session, data, f"B{i:03d}") for i in range(5)]
+    headers = auth_headers(data["teacher_user"])
+
+    res = client.post("/teacher/marks/bulk", headers=headers, json=_payload(subject, students[:3]))
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["created"], body["updated"], body["failed"]) == (3, 0, 0)
+    assert all(r["marks_id"] for r in body["results"])
+
+    payload = _payload(subject, students, marks=25)
+    payload["entries"].append({"student_id": 9999, "marks_obtained": 10})
+    body = client.post("/teacher/marks/bulk", headers=headers, json=payload).json()
+    assert (body["created"], body["updated"], body["failed"]) == (2, 3, 1)
+    assert body["results"][-1] == {"student_id": 9999, "status": "error", "marks_id": None,
+                                   "detail": "Student not found"}
+
+    rows = db_session.query(models.Marks).filter(models.Marks.subject_id == subject.id).all()
+    assert len(rows) == 5
+    assert {r.marks_obtained for r in rows} == {25}
+    # Internal-1 maps to the Mid-1 session for the subject's semester
+    expected_session = data["exam_sessions"][(data["semesters"][0].id, "Mid-1")]
+    assert {r.exam_session_id for r in rows} == {expected_session.id}
+
+
+def test_bulk_upload_reports_repeated_students(client, db_session, academic_data):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS203", data["semesters"][0])
+    students = [make_student(db_session, data, f"D{i:03d}") for i in range(2)]
+    headers = auth_headers(data["teacher_user"])
+
+    payload = _payload(subject, students, marks=18)
+    payload["entries"].append({"student_id": students[0].id, "marks_obtained": 29})
+    body = client.post("/teacher/marks/bulk", headers=headers, json=payload).json()
+
+    assert (body["created"], body["updated"], body["failed"]) == (2, 0, 1)
+    assert body["results"][-1] == {"student_id": students[0].id, "status": "error", "marks_id": None,
+                                   "detail": "Duplicate in this upload"}
+    rows = db_session.query(models.Marks).filter(models.Marks.subject_id == subject.id).all()
+    assert sorted(r.marks_obtained for r in rows) == [18, 18]  # the first entry is kept
+
+
+def test_bulk_upload_query_count_is_constant(client, db_session, academic_data, query_counter):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS202", data["semesters"][0])
+    students = [make_student(db_session, data, f"Q{i:03d}") for i in range(40)]
+    headers = auth_headers(data["teacher_user"])
+
+    small_payload = _payload(subject, students[:4])
+    large_payload = _payload(subject, students[4:])
+
+    principal_cache.clear()  # both measurements include the auth lookup
+    query_counter.clear()
+    client.post("/teacher/marks/bulk", headers=headers, json=small_payload)
+    small = len(query_counter)
+
+    principal_cache.clear()  # both measurements include the auth lookup
+    query_counter.clear()
+    client.post("/teacher/marks/bulk", headers=headers, json=large_payload)
+    large = len(query_counter)
+
+    # INSERTs are batched into executemany; lookups do not scale with row count
+    assert small == large
+
+
+def test_bulk_upload_respects_authorization(client, db_session, academic_data):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS203", data["semesters"][0])
+    subject.teacher_id = None
+    db_session.commit()
+    student = make_student(db_session, data, "A001")
+    teacher_headers = auth_headers(data["teacher_user"])
+
+    res = client.post("/teacher/marks/bulk", headers=teacher_headers, json=_payload(subject, [student]))
+    assert res.status_code == 403
+    assert res.json()["detail"] == "You are not assigned to this subject"
+
+    # Assigned teacher still cannot write University marks
+    subject.teacher_id = data["teacher"].id
+    db_session.commit()
+    res = client.post("/teacher/marks/bulk", headers=teacher_headers,
+                      json=_payload(subject, [student], exam_type="University"))
+    assert res.status_code == 403
+    assert res.json()["detail"] == "Teachers cannot modify University marks"
+
+    res = client.post("/teacher/marks/bulk", headers=auth_headers(data["admin_user"]),
+                      json=_payload(subject, [student], exam_type="University"))
+    assert res.status_code == 200
+    assert res.json()["created"] == 1
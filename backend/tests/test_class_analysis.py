@@ -0,0 +1,64 @@
+import analysis
+import models
+from conftest import make_student, make_subject, auth_headers
+
+
+def test_class_analysis_aggregates_in_sql(client, db_session, academic_data, query_counter):
+    data = academic_data
+    sem = data["semesters"][0]
+    subjects = [make_subject(db_session, data, f"C{i}", sem, name=f"Subject {i}") for i in range(3)]
+    students = [make_student(db_session, data, f"K{i:03d}") for i in range(8)]
+    marks_data = []
+    for i, student in enumerate(students):
+        for j, subject in enumerate(subjects):
+            obtained = (i * 3 + j * 7) % 30
+            db_session.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type="Mid-1",
+                                        marks_obtained=obtained, total_marks=30, max_marks=30))
+            marks_data.append({"subject": subject.name, "marks": obtained, "total": 30,
+                               "student_id": student.id})
+    db_session.commit()
+    headers = auth_headers(data["teacher_user"])
+    url = f"/teacher/analysis/{data['department'].id}/{sem.id}"
+
+    query_counter.clear()
+    res = client.get(url, headers=headers)
+    assert res.status_code == 200
+    # auth (user) + one aggregate query
+    assert len(query_counter) == 2
+
+    body = res.json()
+    expected = analysis.analyze_class_performance(marks_data, engine="pandas")
+    assert list(body["subject_performance"]) == list(expected["subject_performance"])
+    for name, avg in expected["subject_performance"].items():
+        assert abs(body["subject_performance"][name] - avg) < 1e-9
+    assert body["weakest_subject"] == expected["weakest_subject"]
+
+    res = client.get(f"{url}?section_id={data['section'].id}", headers=headers)
+    assert res.json()["weakest_subject"] == expected["weakest_subject"]
+
+
+def test_class_analysis_empty(client, academic_data):
+    res = client.get("/teacher/analysis/999/999", headers=auth_headers(academic_data["teacher_user"]))
+    assert res.json() == {"subject_performance": {}, "weakest_subject": None}
+
+
+def test_class_analysis_ignores_zero_total_marks(client, db_session, academic_data):
+    data = academic_data
+    sem = data["semesters"][0]
+    graded = make_subject(db_session, data, "Z1", sem, name="Graded")
+    ungraded = make_subject(db_session, data, "Z2", sem, name="Ungraded")
+    student = make_student(db_session, data, "Z001")
+    db_session.add_all([
+        models.Marks(student_id=student.id, subject_id=graded.id, exam_type="Mid-1",
+                     marks_obtained=15, total_marks=30, max_marks=30),
+        models.Marks(student_id=student.id, subject_id=graded.id, exam_type="Mid-2",
+                     marks_obtained=0, total_marks=0, max_marks=0),
+        models.Marks(student_id=student.id, subject_id=ungraded.id, exam_type="Mid-1",
+                     marks_obtained=0, total_marks=0, max_marks=0),
+    ])
+    db_session.commit()
+
+    res = client.get(f"/teacher/analysis/{data['department'].id}/{sem.id}",
+                     headers=auth_headers(data["teacher_user"]))
+    assert res.status_code == 200
+    assert res.json() == {"subject_performance": {"Graded": 50.0}, "weakest_subject": "Graded"}
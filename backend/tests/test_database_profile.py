@@ -0,0 +1,61 @@
+from sqlalchemy import text
+
+import database
+
+
+def _pragma(conn, name):
+    return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_production_profile_pragmas(tmp_path):
+    engine = database.create_sqlite_engine(f"sqlite:///{tmp_path / 'prod.db'}", profile="production")
+    with engine.connect() as conn:
+        assert _pragma(conn, "journal_mode") == "wal"
+        assert _pragma(conn, "synchronous") == 1  # NORMAL
+        assert _pragma(conn, "cache_size") == -65536
+        assert _pragma(conn, "temp_store") == 2  # MEMORY
+        assert _pragma(conn, "busy_timeout") == 5000
+    engine.dispose()
+
+
+def test_default_profile_leaves_sqlite_defaults(tmp_path):
+    engine = database.create_sqlite_engine(f"sqlite:///{tmp_path / 'plain.db'}", profile="default")
+    with engine.connect() as conn:
+        assert _pragma(conn, "journal_mode") == "delete"
+    engine.dispose()
+
+
+def test_wal_readers_not_blocked_by_open_write(tmp_path):
+    engine = database.create_sqlite_engine(f"sqlite:///{tmp_path / 'wal.db'}", profile="production")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    writer = engine.connect()
+    writer.begin()
+    writer.execute(text("INSERT INTO t VALUES (2)"))
+    writer.execute(text("UPDATE t SET x = x + 10"))  # holds the write lock, uncommitted
+
+    with engine.connect() as reader:
+        assert reader.execute(text("SELECT x FROM t")).scalars().all() == [1]
+
+    writer.commit()
+    writer.close()
+    engine.dispose()
+
+
+def test_postgres_url_normalized_and_pooled():
+    assert database.normalize_database_url("postgres://u:p@db/app") == "postgresql://u:p@db/app"
+    assert not database.is_sqlite_url("postgresql://u:p@db/app")
+
+    options = database.server_engine_options()
+    assert options["poolclass"].__name__ == "QueuePool"
+    assert options["pool_pre_ping"] is True
+    assert (options["pool_size"], options["max_overflow"], options["pool_recycle"]) == (10, 20, 1800)
+
+
+def test_sqlite_url_uses_sqlite_profile(tmp_path):
+    engine = database.create_database_engine(f"sqlite:///{tmp_path / 'app.db'}", profile="production")
+    with engine.connect() as conn:
+        assert _pragma(conn, "journal_mode") == "wal"
+    engine.dispose()
@@ -0,0 +1,160 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import export_jobs
+import models
+import reporting
+from conftest import make_student, make_subject, auth_headers
+
+
+@pytest.fixture
+def export_manager(tmp_path, monkeypatch):
+    manager = export_jobs.ExportJobManager(export_dir=str(tmp_path), max_workers=1)
+    monkeypatch.setattr(export_jobs, "_manager_instance", manager)
+    yield manager
+    manager.shutdown()
+
+
+def _wait(client, headers, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/admin/reports/export-jobs/{job_id}", headers=headers).json()
+        if job["status"] in (export_jobs.COMPLETED, export_jobs.FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("export job did not finish")
+
+
+def test_export_job_lifecycle(client, db_session, academic_data, export_manager):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS501", data["semesters"][0])
+    for i in range(10):
+        student = make_student(db_session, data, f"J{i:03d}")
+        db_session.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type="Mid-1",
+                                    marks_obtained=20, total_marks=30, max_marks=30))
+    db_session.commit()
+    headers = auth_headers(data["admin_user"])
+
+    res = client.post(f"/admin/reports/export-jobs?subject_id={subject.id}", headers=headers)
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+
+    job = _wait(client, headers, job_id)
+    assert job["status"] == "completed"
+    assert job["total_rows"] == 10
+    assert job["rows_written"] == 10
+    assert job["progress"] == 1.0
+
+    # Same filters while the artifact is fresh -> same job
+    res = client.post(f"/admin/reports/export-jobs?subject_id={subject.id}", headers=headers)
+    assert res.json()["job_id"] == job_id
+    # Different filters -> new job
+    res = client.post(f"/admin/reports/export-jobs?subject_id={subject.id}&format=csv&department_id=1",
+                      headers=headers)
+    assert res.json()["job_id"] != job_id
+
+    res = client.get(f"/admin/reports/export-jobs/{job_id}/download", headers=headers)
+    assert res.status_code == 200
+    body = res.content.decode("utf-8")
+    assert body.splitlines()[0] == ",".join(reporting.EXPORT_HEADER)
+    assert len(body.splitlines()) == 11
+
+    res = client.get(f"/admin/reports/export-jobs/{job_id}/download",
+                     headers={**headers, "Range": "bytes=0-11"})
+    assert res.status_code == 206
+    assert res.content.decode("utf-8") == "Student Name"
+
+
+def test_export_job_unknown(client, academic_data, export_manager):
+    headers = auth_headers(academic_data["admin_user"])
+    assert client.get("/admin/reports/export-jobs/nope", headers=headers).status_code == 404
+    assert client.post("/admin/reports/export-jobs?format=xml", headers=headers).status_code == 400
+
+
+def test_export_job_visible_to_other_workers(client, db_session, academic_data, export_manager):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS502", data["semesters"][0])
+    student = make_student(db_session, data, "J100")
+    db_session.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type="Mid-1",
+                                marks_obtained=20, total_marks=30, max_marks=30))
+    db_session.commit()
+    headers = auth_headers(data["admin_user"])
+
+    job_id = client.post(f"/admin/reports/export-jobs?subject_id={subject.id}", headers=headers).json()["job_id"]
+    assert _wait(client, headers, job_id)["status"] == export_jobs.COMPLETED
+
+    # A second worker sharing EXPORT_DIR sees the job and reuses its artifact
+    other = export_jobs.ExportJobManager(export_dir=export_manager.export_dir, max_workers=1)
+    try:
+        job = other.get(job_id)
+        assert (job.status, job.total_rows, job.path) == (export_jobs.COMPLETED, 1, export_manager.get(job_id).path)
+        reused = other.submit(None, "csv", {"department_id": None, "semester_id": None, "subject_id": subject.id})
+        assert reused.id == job_id
+        assert other.get("../../etc/passwd") is None
+    finally:
+        other.shutdown()
+
+
+def test_job_of_dead_worker_is_reported_failed(tmp_path):
+    dead = export_jobs.ExportJobManager(export_dir=str(tmp_path), max_workers=1, lease_seconds=60)
+    job = export_jobs.ExportJob("k" * 64, "csv", {"department_id": None, "semester_id": None, "subject_id": None})
+    job.status = export_jobs.RUNNING
+    dead._save(job)
+    dead.shutdown()
+
+    other = export_jobs.ExportJobManager(export_dir=str(tmp_path), max_workers=1, lease_seconds=60)
+    try:
+        assert other.get(job.id).status == export_jobs.RUNNING  # heartbeat still within the lease
+        state_path = other._state_path(job.id)
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        state["updated_at"] -= 61
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+        stale = other.get(job.id)
+        assert stale.status == export_jobs.FAILED
+        assert "Interrupted" in stale.error
+    finally:
+        other.shutdown()
+
+
+def test_sweep_removes_expired_files_of_any_worker(tmp_path):
+    manager = export_jobs.ExportJobManager(export_dir=str(tmp_path), max_workers=1, ttl_seconds=60)
+    try:
+        (tmp_path / "jobs").mkdir()
+        old = time.time() - 120
+        expired = [tmp_path / f"{'a' * 32}.csv", tmp_path / f"{'b' * 32}.parquet.part",
+                   tmp_path / "jobs" / f"{'a' * 32}.json", tmp_path / "jobs" / f"key-{'c' * 64}.json"]
+        fresh = [tmp_path / f"{'d' * 32}.csv", tmp_path / "jobs" / f"{'d' * 32}.json"]
+        for path in expired + fresh:
+            path.write_text("x")
+        for path in expired:
+            os.utime(path, (old, old))
+
+        assert manager.sweep(time.time()) == len(expired)
+        assert not any(path.exists() for path in expired)
+        assert all(path.exists() for path in fresh)
+    finally:
+        manager.shutdown()
+
+
+def test_export_manager_singleton_is_created_once(monkeypatch):
+    created = []
+
+    class SlowManager:
+        def __init__(self):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(export_jobs, "_manager_instance", None)
+    monkeypatch.setattr(export_jobs, "ExportJobManager", SlowManager)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        managers = list(pool.map(lambda _: export_jobs.get_export_manager(), range(4)))
+
+    assert len(created) == 1
+    assert all(manager is created[0] for manager in managers)
@@ -0,0 +1,88 @@
+import csv
+import io
+
+import pytest
+
+import models
+import reporting
+from conftest import make_student, make_subject, auth_headers
+
+
+def _seed_marks(db, data, count):
+    subject = make_subject(db, data, "CS401", data["semesters"][0])
+    students = [make_student(db, data, f"E{i:04d}") for i in range(count)]
+    db.add_all([
+        models.Marks(student_id=s.id, subject_id=subject.id, exam_type="Mid-1",
+                     marks_obtained=15, total_marks=30, max_marks=30)
+        for s in students
+    ])
+    db.commit()
+    return subject
+
+
+def test_export_streams_csv(client, db_session, academic_data):
+    _seed_marks(db_session, academic_data, 25)
+
+    res = client.get("/admin/reports/export", headers=auth_headers(academic_data["admin_user"]))
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "text/csv; charset=utf-8"
+    assert "attachment; filename=student_performance_report.csv" in res.headers["content-disposition"]
+
+    reader = csv.reader(io.StringIO(res.content.decode("utf-8")))
+    assert next(reader) == reporting.EXPORT_HEADER
+    rows = list(reader)
+    assert len(rows) == 25
+    assert rows[0][2] == "CSE"
+    assert rows[0][-1] == "50.00"
+
+
+def test_csv_chunks_flush_incrementally(db_engine, db_session, academic_data):
+    subject = _seed_marks(db_session, academic_data, 200)
+
+    stmt = reporting.build_marks_export_query(subject_id=subject.id)
+    rows = reporting.iter_export_rows(db_engine, stmt, batch_size=50)
+    chunks = list(reporting.iter_csv_chunks(rows, chunk_bytes=1024))
+
+    # Header is flushed on its own, then rows in bounded chunks
+    assert chunks[0].strip() == ",".join(reporting.EXPORT_HEADER)
+    assert len(chunks) > 3
+    assert all(len(c) < 1024 + 200 for c in chunks)
+    assert sum(c.count("\n") for c in chunks) == 201
+
+
+def test_columnar_exports(client, db_session, academic_data):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    _seed_marks(db_session, academic_data, 30)
+    headers = auth_headers(academic_data["admin_user"])
+
+    res = client.get("/admin/reports/export?format=parquet", headers=headers)
+    assert res.status_code == 200
+    assert "student_performance_report.parquet" in res.headers["content-disposition"]
+    table = pq.read_table(io.BytesIO(res.content))
+    assert table.num_rows == 30
+    assert table.column_names == reporting.COLUMNAR_FIELDS
+    assert table.column("percentage").to_pylist()[0] == 50.0
+
+    res = client.get("/admin/reports/export?format=arrow", headers=headers)
+    assert res.status_code == 200
+    table = pa.ipc.open_stream(res.content).read_all()
+    assert table.num_rows == 30
+    assert table.column("department").to_pylist()[0] == "CSE"
+
+    res = client.get("/admin/reports/export?format=xml", headers=headers)
+    assert res.status_code == 400
+
+
+def test_parquet_batches_are_merged_into_row_groups():
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    row = ("Name", "R1", "CSE", 1, "CS401", "Subject", "Mid-1", 15.0, 30.0)
+    data = b"".join(reporting.iter_parquet_chunks(iter([row] * 5000), batch_size=100, row_group_rows=2048))
+    metadata = pq.ParquetFile(io.BytesIO(data)).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [2048, 2048, 904]
+
+    empty = b"".join(reporting.iter_parquet_chunks(iter([])))
+    assert pq.read_table(io.BytesIO(empty)).num_rows == 0
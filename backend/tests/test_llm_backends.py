@@ -0,0 +1,102 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ai_service
+import llm_backends
+from llm_backends import LLMBackendError, OpenAICompatibleBackend, StubBackend, create_backend
+
+
+def test_stub_is_deterministic():
+    a = StubBackend(latency_seconds=0, failure_rate=0.5, seed=7)
+    b = StubBackend(latency_seconds=0, failure_rate=0.5, seed=7)
+
+    def outcomes(backend):
+        result = []
+        for i in range(20):
+            try:
+                result.append(backend.generate(f"prompt {i}"))
+            except LLMBackendError:
+                result.append(None)
+        return result
+
+    first, second = outcomes(a), outcomes(b)
+    assert first == second
+    assert 0 < a.failures < 20
+    assert StubBackend(latency_seconds=0).generate("same") == StubBackend(latency_seconds=0).generate("same")
+
+
+def test_create_backend_from_env(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("AI_BACKEND", raising=False)
+    assert create_backend() is None
+
+    monkeypatch.setenv("AI_BACKEND", "stub")
+    monkeypatch.setenv("AI_STUB_LATENCY_MS", "5")
+    backend = create_backend()
+    assert isinstance(backend, StubBackend)
+    assert backend.latency_seconds == 0.005
+
+    monkeypatch.setenv("AI_BACKEND", "openai")
+    monkeypatch.delenv("LLM_BASE_URL", raising=False)
+    assert create_backend() is None
+
+
+@pytest.fixture
+def chat_server():
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests.append((self.path, self.headers.get("Authorization"), body))
+            if body["messages"][0]["content"] == "fail":
+                self.send_error(500)
+                return
+            payload = json.dumps({"choices": [{"message": {"content": "  Looks good.  "}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_openai_compatible_backend(chat_server):
+    base_url, requests = chat_server
+    backend = OpenAICompatibleBackend(base_url, "local-model", api_key="secret")
+
+    assert backend.generate("hello", max_output_tokens=50, timeout=5) == "  Looks good.  "
+    path, authorization, body = requests[0]
+    assert path == "/v1/chat/completions"
+    assert authorization == "Bearer secret"
+    assert body["model"] == "local-model" and body["max_tokens"] == 50
+
+    with pytest.raises(LLMBackendError):
+        backend.generate("fail", timeout=5)
+
+
+def test_summarizer_uses_injected_backend(monkeypatch, tmp_path):
+    from ai_summary_cache import SummaryCache
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=0, max_entries=0)
+    monkeypatch.setattr(ai_service, "get_summary_cache", lambda: cache)
+    monkeypatch.setattr(ai_service, "_circuit_breaker", ai_service.CircuitBreaker())
+
+    backend = StubBackend(latency_seconds=0)
+    summarizer = ai_service.AIPerformanceSummarizer(backend=backend)
+    result = summarizer.generate_summary({"student_name": "A", "average_percentage": 70})
+
+    assert summarizer.ai_enabled
+    assert result["source"] == "ai"
+    assert result["summary"].startswith("[stub ")
+    assert backend.calls == 1
@@ -0,0 +1,153 @@
+import io
+
+import pytest
+
+import models
+from conftest import make_student, make_subject, auth_headers
+
+
+def _csv(rows):
+    lines = ["roll_number,subject_code,exam_type,marks_obtained,total_marks"]
+    lines += [",".join(str(v) for v in row) for row in rows]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def test_csv_import_with_rejections(client, db_session, academic_data):
+    data = academic_data
+    make_subject(db_session, data, "CS301", data["semesters"][0])
+    for i in range(5):
+        make_student(db_session, data, f"I{i:03d}")
+
+    rows = [(f"I{i:03d}", "CS301", "Internal-1", 20 + i, 30) for i in range(5)]
+    rows += [
+        ("NOPE", "CS301", "Internal-1", 10, 30),     # unknown roll number
+        ("I000", "XX999", "Internal-1", 10, 30),     # unknown subject
+        ("I001", "CS301", "Internal-1", "abc", 30),  # not numeric
+        ("I002", "CS301", "University", 50, 70),     # teachers cannot upload University
+    ]
+    res = client.post(
+        "/teacher/marks/import?chunk_size=2",
+        headers=auth_headers(data["teacher_user"]),
+        files={"file": ("results.csv", _csv(rows), "text/csv")},
+    )
+    assert res.status_code == 200
+    report = res.json()
+    assert report["total_rows"] == 9
+    assert report["created"] == 5
+    assert report["rejected"] == 4
+    assert [e["row"] for e in report["errors"]] == [7, 8, 9, 10]
+    assert report["errors"][0]["error"] == "Unknown roll number"
+
+    # Re-import updates instead of duplicating
+    rows = [(f"I{i:03d}", "CS301", "Internal-1", 10, 30) for i in range(5)]
+    res = client.post(
+        "/admin/marks/import",
+        headers=auth_headers(data["admin_user"]),
+        files={"file": ("results.csv", _csv(rows), "text/csv")},
+    )
+    report = res.json()
+    assert (report["created"], report["updated"], report["rejected"]) == (0, 5, 0)
+
+    marks = db_session.query(models.Marks).all()
+    assert len(marks) == 5
+    assert {m.marks_obtained for m in marks} == {10}
+    expected_session = data["exam_sessions"][(data["semesters"][0].id, "Mid-1")]
+    assert {m.exam_session_id for m in marks} == {expected_session.id}
+
+
+def test_import_counts_from_upsert_without_reading_existing_marks(client, db_session, academic_data,
+                                                                  query_counter):
+    data = academic_data
+    subject = make_subject(db_session, data, "CS303", data["semesters"][0])
+    students = [make_student(db_session, data, f"U{i:03d}") for i in range(6)]
+    db_session.add_all([models.Marks(student_id=s.id, subject_id=subject.id, exam_type="Internal-1",
+                                     marks_obtained=5, total_marks=30) for s in students[:3]])
+    db_session.commit()
+
+    # Existing and new keys share a chunk
+    rows = [(f"U{i:03d}", "CS303", "Internal-1", 25, 30) for i in (0, 3, 1, 4, 2, 5)]
+    query_counter.clear()
+    res = client.post(
+        "/admin/marks/import?chunk_size=4",
+        headers=auth_headers(data["admin_user"]),
+        files={"file": ("results.csv", _csv(rows), "text/csv")},
+    )
+    report = res.json()
+    assert (report["created"], report["updated"], report["rejected"]) == (3, 3, 0)
+    assert not [s for s in query_counter if s.lstrip().upper().startswith("SELECT")
+                and "FROM marks" in s and "student_id IN" in s]
+    assert db_session.query(models.Marks).count() == 6
+
+
+def test_import_rejects_bad_header(client, academic_data):
+    res = client.post(
+        "/admin/marks/import",
+        headers=auth_headers(academic_data["admin_user"]),
+        files={"file": ("results.csv", b"roll,marks\nA,1\n", "text/csv")},
+    )
+    assert res.status_code == 400
+    assert "Missing required columns" in res.json()["detail"]
+
+
+def test_mid_file_error_reports_committed_chunks(client, db_session, academic_data):
+    from transcript_cache import transcript_cache
+
+    data = academic_data
+    make_subject(db_session, data, "CS302", data["semesters"][0])
+    students = [make_student(db_session, data, f"M{i:03d}") for i in range(5)]
+    # Past the text decoder's first read, so earlier chunks are already committed
+    rows = [(f"M{i % 5:03d}", "CS302", "Internal-1", 20, 30) for i in range(400)]
+    body = _csv(rows) + b"M000,CS302,Internal-1,\xff\xfe,30\n"
+    transcript_cache.set(students[0].id, "transcript", {"stale": True}, transcript_cache.generation())
+
+    res = client.post(
+        "/teacher/marks/import?chunk_size=5",
+        headers=auth_headers(data["teacher_user"]),
+        files={"file": ("results.csv", body, "text/csv")},
+    )
+    assert res.status_code == 400
+    detail = res.json()["detail"]
+    assert "UTF-8" in detail["message"]
+    report = detail["report"]
+    assert report["completed"] is False
+    assert report["created"] == 5 and report["updated"] > 0
+    assert db_session.query(models.Marks).count() == 5
+    assert transcript_cache.get(students[0].id, "transcript") is None
+
+
+def test_import_validates_chunk_size(client, academic_data):
+    for chunk_size in (0, 100001):
+        res = client.post(
+            f"/admin/marks/import?chunk_size={chunk_size}",
+            headers=auth_headers(academic_data["admin_user"]),
+            files={"file": ("results.csv", _csv([]), "text/csv")},
+        )
+        assert res.status_code == 422
+
+
+def test_xlsx_import(client, db_session, academic_data):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    data = academic_data
+    make_subject(db_session, data, "CS303", data["semesters"][0])
+    make_student(db_session, data, "X001")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Roll Number", "Subject Code", "Exam Type", "Marks Obtained", "Total Marks"])
+    sheet.append(["X001", "CS303", "Internal-1", 24, 30])
+    sheet.append([None, None, None, None, None])
+    sheet.append(["NOPE", "CS303", "Internal-1", 10, 30])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    res = client.post(
+        "/teacher/marks/import",
+        headers=auth_headers(data["teacher_user"]),
+        files={"file": ("results.xlsx", buffer.getvalue(),
+                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+    )
+    assert res.status_code == 200
+    report = res.json()
+    assert (report["total_rows"], report["created"], report["rejected"]) == (2, 1, 1)
+    assert report["errors"][0]["row"] == 4
+    assert db_session.query(models.Marks.marks_obtained).scalar() == 24
@@ -0,0 +1,121 @@
+import io
+
+import models
+from password_service import verify_password
+from principal_cache import principal_cache
+from conftest import make_student, auth_headers
+
+
+def _student(data, roll_number, **overrides):
+    row = {
+        "roll_number": roll_number,
+        "name": f"Student {roll_number}",
+        "department_id": data["department"].id,
+        "current_semester_id": data["semesters"][0].id,
+        "password": f"pw-{roll_number}",
+        "section_id": data["section"].id,
+    }
+    row.update(overrides)
+    return row
+
+
+def test_bulk_students_report_per_row(client, db_session, academic_data):
+    data = academic_data
+    make_student(db_session, data, "EXIST-1")
+    headers = auth_headers(data["admin_user"])
+
+    response = client.post("/admin/students/bulk", headers=headers, json=[
+        _student(data, "NEW-1"),
+        _student(data, "EXIST-1"),
+        _student(data, "NEW-1"),
+        _student(data, "NEW-2", department_id=999),
+        _student(data, "NEW-3", section_id=999),
+        _student(data, "NEW-4", section_id=None),
+    ])
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["total_rows"], report["created"], report["rejected"]) == (6, 2, 4)
+    assert [(r["row"], r["status"], r["error"]) for r in report["results"]] == [
+        (1, "created", None),
+        (2, "rejected", "Username already exists"),
+        (3, "rejected", "Duplicate in this upload"),
+        (4, "rejected", "Department not found"),
+        (5, "rejected", "Section not found"),
+        (6, "created", None),
+    ]
+
+    student = db_session.query(models.Student).filter_by(roll_number="NEW-1").one()
+    assert student.id == report["results"][0]["id"]
+    assert student.batch_id == data["batch"].id  # taken from the section
+    assert student.user.role == "student"
+    assert verify_password("pw-NEW-1", student.user.password_hash)
+
+    login = client.post("/token", data={"username": "NEW-4", "password": "pw-NEW-4"})
+    assert login.status_code == 200
+
+
+def test_bulk_students_query_count_is_constant(client, academic_data, query_counter):
+    data = academic_data
+    headers = auth_headers(data["admin_user"])
+
+    def onboard(prefix, n):
+        rows = [_student(data, f"{prefix}-{i}") for i in range(n)]
+        principal_cache.clear()
+        query_counter.clear()
+        assert client.post("/admin/students/bulk", headers=headers, json=rows).json()["created"] == n
+        return len(query_counter)
+
+    assert onboard("A", 2) == onboard("B", 40)
+
+
+def test_bulk_teachers_csv_upload(client, db_session, academic_data):
+    data = academic_data
+    headers = auth_headers(data["admin_user"])
+    dept_id = data["department"].id
+    csv_body = (
+        "email,name,department_id,password\n"
+        f"t1@test.edu,Teacher One,{dept_id},pw1\n"
+        f"{data['teacher_user'].username},Existing,{dept_id},pw2\n"
+        f"t2@test.edu,Teacher Two,abc,pw3\n"
+    )
+    response = client.post("/admin/teachers/bulk/upload", headers=headers,
+                           files={"file": ("teachers.csv", io.BytesIO(csv_body.encode()), "text/csv")})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["row"], r["username"], r["status"]) for r in results] == [
+        (2, "t1@test.edu", "created"),
+        (3, data["teacher_user"].username, "rejected"),
+        (4, "t2@test.edu", "rejected"),
+    ]
+    assert results[2]["error"].startswith("department_id")
+    assert db_session.query(models.Teacher).filter_by(email="t1@test.edu").one().user.role == "teacher"
+
+
+def test_bulk_upload_missing_columns(client, academic_data):
+    headers = auth_headers(academic_data["admin_user"])
+    response = client.post("/admin/students/bulk/upload", headers=headers,
+                           files={"file": ("s.csv", io.BytesIO(b"roll_number,name\nX,Y\n"), "text/csv")})
+    assert response.status_code == 400
+    assert "department_id" in response.json()["detail"]
+
+
+def test_bulk_students_username_taken_concurrently(client, db_session, academic_data, monkeypatch):
+    import onboarding
+    data = academic_data
+    headers = auth_headers(data["admin_user"])
+    accept_unique = onboarding._Onboarding._accept_unique
+
+    def racing_accept_unique(self, parsed):
+        accepted = accept_unique(self, parsed)
+        # Another request creates RACE-2 after the username check, before our insert
+        make_student(db_session, data, "RACE-2")
+        return accepted
+
+    monkeypatch.setattr(onboarding._Onboarding, "_accept_unique", racing_accept_unique)
+    response = client.post("/admin/students/bulk", headers=headers,
+                           json=[_student(data, "RACE-1"), _student(data, "RACE-2")])
+
+    assert response.status_code == 409
+    assert "nothing was saved" in response.json()["detail"]
+    assert db_session.query(models.User).filter_by(username="RACE-1").count() == 0
+    assert db_session.query(models.Student).filter_by(roll_number="RACE-2").count() == 1
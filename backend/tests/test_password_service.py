@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import pytest
+
+import models
+from password_service import PasswordService, PasswordServiceBusy, hash_password, verify_password
+from conftest import auth_headers
+
+
+def test_process_pool_hash_and_verify():
+    service = PasswordService(workers=1, rounds=4)
+    try:
+        hashed = service.hash_sync("s3cret")
+        assert hashed.split("$")[2] == "04"  # bcrypt cost factor
+        assert asyncio.run(service.verify("s3cret", hashed))
+        assert not asyncio.run(service.verify("wrong", hashed))
+        assert service.hash_many(["a", "b", "c"])[1].startswith("$2b$04$")
+
+        stats = service.stats()
+        assert stats["mode"] == "process"
+        assert stats["completed"] == 6 and stats["pending"] == 0
+    finally:
+        service.shutdown()
+
+
+def test_full_queue_is_rejected():
+    service = PasswordService(workers=0, rounds=4, max_pending=1)
+    release = threading.Event()
+    try:
+        blocked = service._submit(release.wait)
+        with pytest.raises(PasswordServiceBusy):
+            service.hash_sync("x")
+        assert service.stats()["rejected"] == 1
+        release.set()
+        blocked.result()
+        assert asyncio.run(service.verify("x", hash_password("x", 4)))
+    finally:
+        release.set()
+        service.shutdown()
+
+
+def test_malformed_hash_does_not_verify():
+    assert verify_password("x", "not-a-bcrypt-hash") is False
+
+
+def test_login_verifies_hash_of_any_cost(client, db_session):
+    user = models.User(username="login@test.edu", password_hash=hash_password("pw123", 5), role="teacher")
+    db_session.add(user)
+    db_session.commit()
+
+    assert client.post("/token", data={"username": "login@test.edu", "password": "nope"}).status_code == 401
+    assert client.post("/token", data={"username": "ghost", "password": "pw123"}).status_code == 401
+
+    response = client.post("/token", data={"username": "login@test.edu", "password": "pw123"})
+    assert response.status_code == 200
+    assert response.json()["role"] == "teacher"
+
+    db_session.refresh(user)
+    assert user.password_hash.split("$")[2] == "05"  # login never rewrites the stored hash
+
+
+def test_password_service_stats_endpoint(client, academic_data):
+    headers = auth_headers(academic_data["admin_user"])
+    response = client.post("/admin/teachers", headers=headers, json={
+        "name": "New Teacher", "email": "new@test.edu", "password": "pw",
+        "department_id": academic_data["department"].id,
+    })
+    assert response.status_code == 201
+
+    stats = client.get("/admin/auth/password-service", headers=headers).json()
+    assert stats["rounds"] == 4
+    assert stats["completed"] >= 1
+    assert stats["queue_depth"] == 0
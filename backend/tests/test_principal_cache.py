@@ -0,0 +1,59 @@
+import time
+
+from principal_cache import Principal, PrincipalCache
+from conftest import make_student, auth_headers
+
+
+def _user_queries(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def test_repeat_requests_skip_user_lookup(client, db_session, academic_data, query_counter):
+    student = make_student(db_session, academic_data, "PR-001")
+    headers = auth_headers(student.user)
+
+    query_counter.clear()
+    assert client.get("/student/marks", headers=headers).status_code == 200
+    assert len(_user_queries(query_counter)) == 1
+
+    query_counter.clear()
+    for _ in range(5):
+        assert client.get("/student/analysis", headers=headers).status_code == 200
+    assert _user_queries(query_counter) == []
+
+
+def test_deactivation_invalidates_principal(client, db_session, academic_data):
+    teacher_user = academic_data["teacher_user"]
+    headers = auth_headers(teacher_user)
+    assert client.get("/teacher/subjects", headers=headers).status_code == 200
+
+    teacher_user.is_active = False
+    db_session.commit()
+    res = client.get("/teacher/subjects", headers=headers)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Inactive user"
+
+
+def test_role_checker_uses_cached_role(client, academic_data):
+    headers = auth_headers(academic_data["teacher_user"])
+    assert client.get("/teacher/subjects", headers=headers).status_code == 200
+    assert client.get("/admin/stats", headers=headers).status_code == 403
+
+
+def test_cache_ttl_size_and_token_expiry():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    a = Principal(id=1, username="a", role="student", is_active=True)
+    b = Principal(id=2, username="b", role="teacher", is_active=True)
+
+    cache.set("t1", a)
+    cache.set("t2", b)
+    cache.set("t3", a)                  # evicts t1 (least recently used)
+    assert cache.get("t1") is None
+    assert cache.get("t3") == a
+
+    cache.invalidate_user(1)
+    assert cache.get("t3") is None
+    assert cache.get("t2") == b
+
+    cache.set("t4", b, token_expires_at=time.time() - 1)
+    assert cache.get("t4") is None
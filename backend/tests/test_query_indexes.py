@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+import models
+from conftest import make_student, make_subject, auth_headers
+
+
+def _plan(db_engine, stmt):
+    """EXPLAIN QUERY PLAN detail lines for a statement (literal parameters)."""
+    sql = str(stmt.compile(db_engine, compile_kwargs={"literal_binds": True}))
+    with db_engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def _assert_uses_index(db_engine, stmt, index_name):
+    plan = _plan(db_engine, stmt)
+    assert any(index_name in line for line in plan), plan
+    assert not any(line.startswith("SCAN") for line in plan), plan
+
+
+@pytest.mark.parametrize("stmt, index_name", [
+    # upload_marks / marks import existing-row lookup
+    (select(models.Marks.id).where(models.Marks.student_id == 1, models.Marks.subject_id == 2,
+                                   models.Marks.exam_type == "Internal-1"),
+     "uq_marks_student_subject_exam"),
+    # transcripts: marks of one student
+    (select(models.Marks).where(models.Marks.student_id == 1), "uq_marks_student_subject_exam"),
+    # access_control.get_subject_offering_for_teacher_subject
+    (select(models.SubjectOffering).where(models.SubjectOffering.teacher_id == 1,
+                                          models.SubjectOffering.subject_id == 2,
+                                          models.SubjectOffering.academic_year == "2024-25"),
+     "ix_subject_offerings_teacher_subject_year"),
+    # access_control.map_exam_type_to_session
+    (select(models.ExamSession).where(models.ExamSession.exam_type_id == 1,
+                                      models.ExamSession.semester_id == 2,
+                                      models.ExamSession.regulation_id == 1,
+                                      models.ExamSession.academic_year == "2024-25"),
+     "sqlite_autoindex_exam_sessions"),
+    # legacy class roster and section roster
+    (select(models.Student).where(models.Student.department_id == 1,
+                                  models.Student.current_semester_id == 2),
+     "ix_students_department_semester"),
+    (select(models.Student).where(models.Student.section_id == 1), "ix_students_section_id"),
+])
+def test_hot_filters_use_composite_indexes(db_engine, stmt, index_name):
+    _assert_uses_index(db_engine, stmt, index_name)
+
+
+def test_marks_unique_per_student_subject_exam(db_session, academic_data):
+    student = make_student(db_session, academic_data, "IX-001")
+    subject = make_subject(db_session, academic_data, "IX101", academic_data["semesters"][0])
+    for _ in range(2):
+        db_session.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type="Internal-1",
+                                    marks_obtained=10, total_marks=30))
+    with pytest.raises(IntegrityError):
+        db_session.commit()
+    db_session.rollback()
+
+
+def test_upload_marks_upserts_in_place(client, db_session, academic_data):
+    data = academic_data
+    student = make_student(db_session, data, "IX-002")
+    subject = make_subject(db_session, data, "IX102", data["semesters"][0])
+    headers = auth_headers(data["teacher_user"])
+    payload = {"student_id": student.id, "subject_id": subject.id, "exam_type": "Internal-1",
+               "marks_obtained": 12, "total_marks": 30}
+
+    first = client.post("/teacher/marks", headers=headers, json=payload)
+    assert first.status_code == 201
+    second = client.post("/teacher/marks", headers=headers, json={**payload, "marks_obtained": 27})
+    assert second.status_code == 201
+    assert second.json()["id"] == first.json()["id"]
+    assert second.json()["marks_obtained"] == 27
+
+    rows = db_session.query(models.Marks).filter(models.Marks.student_id == student.id).all()
+    assert [(r.marks_obtained, r.max_marks) for r in rows] == [(27, 30)]
+
+
+def test_startup_check_requires_marks_upsert_index(db_engine):
+    from marks_import import check_marks_upsert_index
+
+    check_marks_upsert_index(db_engine)  # create_all on a new database adds it
+
+    with db_engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX uq_marks_student_subject_exam")
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        check_marks_upsert_index(db_engine)
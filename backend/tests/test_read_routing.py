@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import database
+import models
+
+
+def test_read_url_for_sqlite_file(monkeypatch):
+    monkeypatch.setattr(database, "READ_DATABASE_URL", None)
+    monkeypatch.setattr(database, "SQLITE_READ_IMMUTABLE", False)
+    assert database.read_database_url("sqlite:////srv/app.db") == "sqlite:///file:/srv/app.db?mode=ro&uri=true"
+    assert database.read_database_url("sqlite://") is None
+    assert database.read_database_url("sqlite:///:memory:") is None
+    assert database.read_database_url("postgresql://u@db/app") is None
+
+    monkeypatch.setattr(database, "SQLITE_READ_IMMUTABLE", True)
+    assert database.read_database_url("sqlite:////srv/app.db").endswith("?mode=ro&immutable=1&uri=true")
+
+
+def test_read_url_prefers_replica(monkeypatch):
+    monkeypatch.setattr(database, "READ_DATABASE_URL", "postgres://u@replica/app")
+    assert database.read_database_url("postgresql://u@primary/app") == "postgresql://u@replica/app"
+
+
+def test_sqlite_read_engine_sees_primary_writes_but_cannot_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "READ_DATABASE_URL", None)
+    monkeypatch.setattr(database, "SQLITE_READ_IMMUTABLE", False)
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    primary = database.create_database_engine(url, profile="production")
+    with primary.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    reader = database.create_database_engine(database.read_database_url(url), profile="production",
+                                             read_only=True)
+    with primary.begin() as conn:
+        conn.execute(text("INSERT INTO t VALUES (2)"))
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT x FROM t ORDER BY x")).scalars().all() == [1, 2]
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(text("INSERT INTO t VALUES (3)"))
+    reader.dispose()
+    primary.dispose()
+
+
+def test_read_session_rejects_flush(db_engine):
+    Session = database.sessionmaker(class_=database.ReadOnlySession, bind=db_engine)
+    db = Session()
+    assert db.query(models.User).count() == 0
+    db.add(models.User(username="nobody", password_hash="x", role="admin"))
+    with pytest.raises(database.ReadOnlySessionError):
+        db.flush()
+    db.close()
+
+
+def test_async_read_session_rejects_flush(async_engine):
+    Session = database.async_sessionmaker(async_engine, sync_session_class=database.ReadOnlySession)
+
+    async def attempt():
+        async with Session() as db:
+            db.add(models.User(username="nobody", password_hash="x", role="admin"))
+            await db.flush()
+
+    with pytest.raises(database.ReadOnlySessionError):
+        asyncio.run(attempt())
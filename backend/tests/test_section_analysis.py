@@ -0,0 +1,43 @@
+import models
+from conftest import make_student, make_subject, auth_headers
+
+
+def test_section_student_analysis(client, db_session, academic_data, query_counter):
+    data = academic_data
+    sem1, sem2 = data["semesters"][:2]
+    math = make_subject(db_session, data, "MA101", sem1, name="Maths")
+    physics = make_subject(db_session, data, "PH102", sem2, name="Physics")
+    db_session.add(models.SubjectOffering(subject_id=math.id, section_id=data["section"].id,
+                                          teacher_id=data["teacher"].id, academic_year="2024-25"))
+    students = [make_student(db_session, data, f"S{i:03d}") for i in range(6)]
+    for i, student in enumerate(students[:5]):
+        db_session.add_all([
+            models.Marks(student_id=student.id, subject_id=math.id, exam_type="Mid-1",
+                         marks_obtained=5 * i, total_marks=30, max_marks=30),
+            models.Marks(student_id=student.id, subject_id=physics.id, exam_type="Mid-1",
+                         marks_obtained=25, total_marks=30, max_marks=30),
+        ])
+    db_session.commit()
+    section_id = data["section"].id
+    headers = auth_headers(data["teacher_user"])
+
+    query_counter.clear()
+    res = client.get(f"/teacher/sections/{section_id}/student-analysis", headers=headers)
+    assert res.status_code == 200
+    # auth (user + teacher profile), access check, roster, marks, settings
+    assert len(query_counter) == 6
+
+    body = res.json()
+    assert [r["roll_number"] for r in body] == [s.roll_number for s in students]
+    first = body[0]["analysis"]
+    assert first["weak_subjects"] == ["Maths"]
+    assert first["overall_trend"] == "improving"
+    assert list(first["semester_trend"]) == ["1-1", "1-2"]
+    assert body[4]["analysis"]["weak_subjects"] == []
+    assert body[5]["analysis"] == {"weak_subjects": [], "trend": "Insufficent Data"}
+
+
+def test_section_student_analysis_requires_offering(client, academic_data):
+    res = client.get(f"/teacher/sections/{academic_data['section'].id}/student-analysis",
+                     headers=auth_headers(academic_data["teacher_user"]))
+    assert res.status_code == 403
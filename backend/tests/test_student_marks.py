@@ -0,0 +1,61 @@
+import models
+from conftest import make_student, make_subject, auth_headers
+
+
+def _add_marks(db, data, student, subjects_per_semester):
+    """Give the student Mid-1/Mid-2/Semester marks for every subject in every semester."""
+    for sem in data["semesters"]:
+        for i in range(subjects_per_semester):
+            subject = make_subject(db, data, f"{sem.name}-S{i}-{student.roll_number}", sem)
+            for exam_type in data["exam_types"]:
+                session = data["exam_sessions"][(sem.id, exam_type.name)]
+                max_marks = 70.0 if exam_type.name == "Semester" else 30.0
+                db.add(models.Marks(
+                    student_id=student.id,
+                    subject_id=subject.id,
+                    exam_type=exam_type.name,
+                    marks_obtained=max_marks * 0.6,
+                    total_marks=max_marks,
+                    max_marks=max_marks,
+                    exam_session_id=session.id,
+                ))
+    db.commit()
+
+
+def _count_marks_queries(client, query_counter, user):
+    headers = auth_headers(user)
+    query_counter.clear()
+    res = client.get("/student/marks", headers=headers)
+    assert res.status_code == 200
+    return len(query_counter), res.json()
+
+
+def test_student_marks_query_count_is_constant(client, db_session, academic_data, query_counter):
+    small = make_student(db_session, academic_data, "R001")
+    large = make_student(db_session, academic_data, "R002")
+    _add_marks(db_session, academic_data, small, subjects_per_semester=1)
+    _add_marks(db_session, academic_data, large, subjects_per_semester=10)
+
+    small_queries, small_body = _count_marks_queries(client, query_counter, small.user)
+    large_queries, large_body = _count_marks_queries(client, query_counter, large.user)
+
+    assert sum(len(s["subjects"]) for s in small_body) == 4
+    assert sum(len(s["subjects"]) for s in large_body) == 40
+    assert small_queries == large_queries
+
+
+def test_student_marks_transcript_shape(client, db_session, academic_data):
+    student = make_student(db_session, academic_data, "R003")
+    _add_marks(db_session, academic_data, student, subjects_per_semester=1)
+
+    res = client.get("/student/marks", headers=auth_headers(student.user))
+    assert res.status_code == 200
+    body = res.json()
+
+    assert [s["semester_name"] for s in body] == ["1-1", "1-2", "2-1", "2-2"]
+    subject = body[0]["subjects"][0]
+    assert subject["internal_marks"] == 36.0
+    assert subject["university_marks"] == 42.0
+    assert subject["max_total_marks"] == 130.0
+    assert subject["is_passed"] is True
+    assert body[0]["backlogs"] == 0
@@ -0,0 +1,199 @@
+import time
+
+import pytest
+
+import ai_service
+import models
+import summary_precompute
+from ai_service import CircuitBreaker
+from ai_summary_cache import SummaryCache
+from conftest import make_student, make_subject, auth_headers
+
+
+@pytest.fixture
+def ai_env(tmp_path, monkeypatch):
+    """Enabled summarizer with a scripted model, temp cache/job store and a fresh breaker."""
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl_seconds=3600, max_entries=1000)
+    monkeypatch.setattr(ai_service, "get_summary_cache", lambda: cache)
+    monkeypatch.setattr(summary_precompute, "get_summary_cache", lambda: cache)
+    monkeypatch.setattr(ai_service, "_circuit_breaker", CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    monkeypatch.setattr(ai_service, "AI_BATCH_SIZE", 1)  # one scripted call per student
+
+    summarizer = ai_service.AIPerformanceSummarizer()
+    summarizer.ai_enabled = True
+    summarizer.backend = object()
+    state = {"calls": [], "fail": False}
+
+    def fake_generate(student_data):
+        if state["fail"]:
+            raise RuntimeError("provider down")
+        state["calls"].append(student_data["student_name"])
+        return f"Summary for {student_data['student_name']}"
+
+    monkeypatch.setattr(summarizer, "_generate_ai_summary", fake_generate)
+    monkeypatch.setattr(ai_service, "_summarizer_instance", summarizer)
+
+    store = summary_precompute.PrecomputeJobStore(str(tmp_path / "cache.db"))
+    manager = summary_precompute.SummaryPrecomputeManager(store, workers=2, rate_per_second=0, batch_size=2)
+    monkeypatch.setattr(summary_precompute, "_manager_instance", manager)
+    yield state
+    manager.shutdown()
+    store.close()
+    cache.close()
+
+
+def _students_with_marks(db, data, n):
+    subject = make_subject(db, data, "PC101", data["semesters"][0])
+    students = []
+    for i in range(n):
+        student = make_student(db, data, f"PC{i:03d}")
+        db.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type="Mid-1",
+                            marks_obtained=10 + i, total_marks=30, max_marks=30))
+        students.append(student)
+    db.commit()
+    return students
+
+
+def _wait(client, headers, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/admin/ai/precompute-jobs/{job_id}", headers=headers).json()
+        if job["status"] not in (summary_precompute.QUEUED, summary_precompute.RUNNING):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("precompute job did not finish")
+
+
+def test_precompute_then_endpoint_reads(client, db_session, academic_data, ai_env):
+    students = _students_with_marks(db_session, academic_data, 5)
+    student_headers = auth_headers(students[0].user)
+    headers = auth_headers(academic_data["admin_user"])
+
+    res = client.post(f"/admin/ai/precompute-jobs?section_id={academic_data['section'].id}", headers=headers)
+    assert res.status_code == 202
+    job = _wait(client, headers, res.json()["job_id"])
+
+    assert job["status"] == "completed"
+    assert (job["total"], job["processed"], job["succeeded"], job["failed"]) == (5, 5, 5, 0)
+    assert job["progress"] == 1.0
+    assert len(ai_env["calls"]) == 5
+
+    res = client.get("/student/ai-summary", headers=student_headers)
+    assert res.json()["source"] == "ai"
+    assert len(ai_env["calls"]) == 5  # served from the precomputed store
+
+
+def test_interrupted_job_resumes_after_checkpoint(client, db_session, academic_data, ai_env):
+    _students_with_marks(db_session, academic_data, 6)
+    headers = auth_headers(academic_data["admin_user"])
+
+    # First batch succeeds, then the provider goes down and the breaker opens
+    original = ai_service._summarizer_instance._generate_ai_summary
+
+    def flaky(student_data):
+        if len(ai_env["calls"]) >= 2:
+            ai_env["fail"] = True
+        return original(student_data)
+
+    ai_service._summarizer_instance._generate_ai_summary = flaky
+    job_id = client.post("/admin/ai/precompute-jobs", headers=headers).json()["job_id"]
+    job = _wait(client, headers, job_id)
+    assert job["status"] == "interrupted"
+    assert job["processed"] == 2
+    assert sorted(ai_env["calls"]) == ["Student PC000", "Student PC001"]
+
+    ai_env["fail"] = False
+    ai_service._summarizer_instance._generate_ai_summary = original
+    ai_service.get_circuit_breaker().reset()
+
+    res = client.post(f"/admin/ai/precompute-jobs/{job_id}/resume", headers=headers)
+    assert res.status_code == 202
+    job = _wait(client, headers, job_id)
+    assert job["status"] == "completed"
+    assert job["processed"] == 6
+    assert sorted(ai_env["calls"]) == [f"Student PC{i:03d}" for i in range(6)]
+
+
+def test_precompute_requires_ai_backend(client, academic_data, monkeypatch):
+    summarizer = ai_service.AIPerformanceSummarizer()
+    summarizer.ai_enabled = False
+    monkeypatch.setattr(ai_service, "_summarizer_instance", summarizer)
+    res = client.post("/admin/ai/precompute-jobs", headers=auth_headers(academic_data["admin_user"]))
+    assert res.status_code == 409
+
+
+def test_failed_students_are_retried(client, db_session, academic_data, ai_env, monkeypatch):
+    _students_with_marks(db_session, academic_data, 4)
+    headers = auth_headers(academic_data["admin_user"])
+    original = ai_service._summarizer_instance._generate_ai_summary
+    attempts = []
+
+    def fails_once(student_data):
+        attempts.append(student_data["student_name"])
+        if student_data["student_name"] == "Student PC001" and attempts.count("Student PC001") == 1:
+            raise RuntimeError("transient")
+        return original(student_data)
+
+    monkeypatch.setattr(ai_service._summarizer_instance, "_generate_ai_summary", fails_once)
+    job = _wait(client, headers, client.post("/admin/ai/precompute-jobs", headers=headers).json()["job_id"])
+    assert job["status"] == "completed"
+    assert (job["processed"], job["succeeded"], job["failed"]) == (4, 4, 0)
+    assert job["failed_student_ids"] == []
+    assert attempts.count("Student PC001") == 2
+
+
+def test_one_cache_read_per_student(client, db_session, academic_data, ai_env, monkeypatch):
+    _students_with_marks(db_session, academic_data, 3)
+    headers = auth_headers(academic_data["admin_user"])
+    cache = ai_service.get_summary_cache()
+    reads = []
+    original_get = cache.get
+    monkeypatch.setattr(cache, "get", lambda key: reads.append(key) or original_get(key))
+
+    job = _wait(client, headers, client.post("/admin/ai/precompute-jobs", headers=headers).json()["job_id"])
+    assert job["succeeded"] == 3
+    assert len(reads) == 3
+
+
+def test_get_is_read_only_and_stale_leases_are_claimed_once(tmp_path):
+    store = summary_precompute.PrecomputeJobStore(str(tmp_path / "jobs.db"))
+    worker_a = summary_precompute.SummaryPrecomputeManager(store, lease_seconds=30)
+    worker_b = summary_precompute.SummaryPrecomputeManager(store, lease_seconds=30)
+    job = store.create({"section_id": None, "semester_id": None}, total=10, owner=worker_a.owner)
+    store.update(job["id"], status=summary_precompute.RUNNING)
+
+    # Live job owned by another worker: reported as running, not touched
+    assert worker_b.get(job["id"])["status"] == "running"
+    assert store.get(job["id"])["status"] == "running"
+    assert not store.claim(job["id"], worker_b.owner, worker_b.lease_seconds)
+
+    # Lease expired: reported as interrupted, stored state still unchanged
+    store.update(job["id"], heartbeat_at=time.time() - 60)
+    assert worker_b.get(job["id"])["status"] == "interrupted"
+    assert store.get(job["id"])["status"] == "running"
+
+    # Concurrent resumes: exactly one worker claims it
+    assert store.claim(job["id"], worker_b.owner, worker_b.lease_seconds)
+    assert not store.claim(job["id"], worker_a.owner, worker_a.lease_seconds)
+    assert store.get(job["id"])["owner"] == worker_b.owner
+
+    worker_a.shutdown()
+    worker_b.shutdown()
+    store.close()
+
+
+def test_batch_loads_marks_without_per_student_queries(client, db_session, academic_data, ai_env,
+                                                       query_counter):
+    _students_with_marks(db_session, academic_data, 6)
+    headers = auth_headers(academic_data["admin_user"])
+
+    query_counter.clear()
+    job = _wait(client, headers, client.post("/admin/ai/precompute-jobs", headers=headers).json()["job_id"])
+    assert job["succeeded"] == 6
+
+    # batch_size=2: one marks query and one settings query per batch, none per student
+    marks_queries = [s for s in query_counter if "FROM marks" in s and "FROM students" not in s]
+    settings_queries = [s for s in query_counter if "FROM settings" in s]
+    assert len(marks_queries) == 3
+    assert len(settings_queries) == 3
+    assert not [s for s in query_counter if "FROM semesters" in s and "WHERE semesters.id = ?" in s]
@@ -0,0 +1,93 @@
+import models
+from transcript_cache import TranscriptCache
+from conftest import make_student, make_subject, auth_headers
+
+
+def test_lru_eviction_and_counters():
+    cache = TranscriptCache(max_entries=2)
+    generation = cache.generation()
+    cache.set(1, "transcript", "a", generation)
+    cache.set(2, "transcript", "b", generation)
+    assert cache.get(1, "transcript") == "a"  # 1 is now most recent
+    cache.set(3, "transcript", "c", generation)  # evicts 2
+
+    assert cache.get(2, "transcript") is None
+    assert cache.get(3, "transcript") == "c"
+    assert cache.get(1, "analysis") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    import transcript_cache
+    now = [1000.0]
+    monkeypatch.setattr(transcript_cache.time, "monotonic", lambda: now[0])
+    cache = TranscriptCache(ttl_seconds=30)
+    cache.set(1, "transcript", "a", cache.generation())
+
+    now[0] += 29
+    assert cache.get(1, "transcript") == "a"
+    now[0] += 2  # another worker's write is visible here after at most the TTL
+    assert cache.get(1, "transcript") is None
+
+
+def test_build_racing_an_invalidation_is_not_stored():
+    cache = TranscriptCache()
+    generation = cache.generation()     # request misses and starts building
+    assert cache.get(1, "transcript") is None
+    cache.invalidate(1)                 # marks written meanwhile
+    cache.set(1, "transcript", "built from old marks", generation)
+
+    assert cache.get(1, "transcript") is None
+    assert cache.stats()["stale_sets"] == 1
+    cache.set(1, "transcript", "fresh", cache.generation())
+    assert cache.get(1, "transcript") == "fresh"
+
+
+def test_marks_upload_invalidates_student(client, db_session, academic_data):
+    data = academic_data
+    student = make_student(db_session, data, "R100")
+    subject = make_subject(db_session, data, "CS101", data["semesters"][0])
+    headers = auth_headers(student.user)
+
+    assert client.get("/student/marks", headers=headers).json() == []
+    assert client.get("/student/marks", headers=headers).json() == []
+
+    admin_headers = auth_headers(data["admin_user"])
+    stats = client.get("/admin/cache/stats", headers=admin_headers).json()["transcript_cache"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+    res = client.post("/teacher/marks", headers=auth_headers(data["teacher_user"]), json={
+        "student_id": student.id,
+        "subject_id": subject.id,
+        "exam_type": "Mid-1",
+        "marks_obtained": 20,
+        "total_marks": 30,
+    })
+    assert res.status_code == 201
+
+    body = client.get("/student/marks", headers=headers).json()
+    assert body[0]["subjects"][0]["total_marks"] == 20
+
+
+def test_settings_change_clears_cache(client, db_session, academic_data):
+    data = academic_data
+    student = make_student(db_session, data, "R101")
+    subject = make_subject(db_session, data, "CS102", data["semesters"][0])
+    db_session.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type="Mid-1",
+                                marks_obtained=13, total_marks=30, max_marks=30))
+    db_session.commit()
+    headers = auth_headers(student.user)
+
+    assert client.get("/student/analysis", headers=headers).json()["weak_subjects"] == [subject.name]
+
+    res = client.put("/admin/settings", headers=auth_headers(data["admin_user"]),
+                     json={"pass_percentage": 30.0, "weak_threshold": 40.0})
+    assert res.status_code == 200
+
+    assert client.get("/student/analysis", headers=headers).json()["weak_subjects"] == []
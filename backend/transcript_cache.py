@@ -0,0 +1,143 @@
+"""
+Transcript Cache
+
+In-process LRU cache for per-student derived data (the SemesterPerformance
+transcript and the analyze_performance output). On result-publication day every
+student requests the same aggregation several times; caching it by student id
+turns the repeat calls into dictionary lookups.
+
+Invalidation rules:
+- Marks written for a student -> that student's entry is dropped
+- Pass/weak thresholds changed -> every entry is dropped
+
+The cache lives in the API process. With several workers each keeps its own
+copy, so invalidation only reaches the worker that handled the write; entries
+therefore expire after TRANSCRIPT_CACHE_TTL_SECONDS (default: 30, 0 disables
+the cache), which bounds how long another worker can serve a stale transcript.
+
+A transcript built while marks are being written may already be stale when it
+is stored. Callers take generation() before building and pass it to set(); any
+invalidation in between bumps the generation and the value is dropped.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "2048"))
+DEFAULT_TTL = float(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", "30"))
+
+
+class TranscriptCache:
+    """
+    Bounded LRU cache keyed by student id, with a per-part TTL.
+
+    Each entry holds named parts ("transcript", "analysis", ...) so endpoints
+    can share one slot per student and be invalidated together.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # student id -> part -> (expires_at, value)
+        self._entries: "OrderedDict[int, Dict[str, Tuple[float, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def generation(self) -> int:
+        """Invalidation counter; take it before building a value and pass it to set()."""
+        with self._lock:
+            return self._generation
+
+    def get(self, student_id: int, part: str) -> Optional[Any]:
+        """Return a cached part for the student, or None on a miss (absent or expired)."""
+        with self._lock:
+            entry = self._entries.get(student_id)
+            cached = entry.get(part) if entry is not None else None
+            if cached is None or cached[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self.hits += 1
+            return cached[1]
+
+    def set(self, student_id: int, part: str, value: Any, generation: int) -> None:
+        """
+        Store a part for the student, evicting the least recently used entry if full.
+
+        Skipped when anything was invalidated since `generation` was taken: the
+        value may have been built from marks that have changed since.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self._generation:
+                self.stale_sets += 1
+                return
+            entry = self._entries.get(student_id)
+            if entry is None:
+                entry = {}
+                self._entries[student_id] = entry
+            entry[part] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, student_id: int) -> None:
+        """Drop everything cached for one student."""
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(student_id, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_many(self, student_ids: Iterable[int]) -> None:
+        """Drop entries for several students (bulk marks writes)."""
+        with self._lock:
+            self._generation += 1
+            for student_id in set(student_ids):
+                if self._entries.pop(student_id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries (e.g. after a settings change)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = self.stale_sets = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the admin cache-stats endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_sets": self.stale_sets,
+            }
+
+
+# Global instance shared by the routers
+transcript_cache = TranscriptCache()
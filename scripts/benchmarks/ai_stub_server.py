@@ -0,0 +1,87 @@
+"""
+Local OpenAI-compatible stub LLM server
+
+Serves POST /v1/chat/completions from llm_backends.StubBackend, so the
+"openai" backend (HTTP client, timeouts, error handling) can be load-tested
+offline with controlled latency and failure rate.
+
+Usage:
+    python scripts/benchmarks/ai_stub_server.py --port 8089 --latency-ms 300 --failure-rate 0.05
+
+    # then, for the API:
+    AI_BACKEND=openai LLM_BASE_URL=http://127.0.0.1:8089/v1 uvicorn main:app
+"""
+
+import argparse
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend directory to path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from llm_backends import LLMBackendError, StubBackend
+
+
+def make_handler(backend):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+
+            try:
+                text = backend.generate(prompt, max_output_tokens=request.get("max_tokens", 300))
+            except LLMBackendError as e:
+                self.send_error(503, str(e))
+                return
+
+            body = json.dumps({
+                "object": "chat.completion",
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backend = StubBackend(latency_seconds=args.latency_ms / 1000, jitter_seconds=args.jitter_ms / 1000,
+                          failure_rate=args.failure_rate, seed=args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(backend))
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1 "
+          f"(latency {args.latency_ms:.0f}ms, failure rate {args.failure_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {backend.calls} calls ({backend.failures} injected failures)")
+
+
+if __name__ == "__main__":
+    main()
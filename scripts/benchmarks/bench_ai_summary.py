@@ -0,0 +1,87 @@
+"""
+Benchmark - AI Summary Paths (stub backend)
+
+Exercises ai_service against the deterministic stub backend, so our own
+overhead is measured without a provider:
+  - cold burst: N concurrent summaries through the concurrency limit
+  - warm burst: the same summaries again, served from the summary cache
+  - deadline: a backend slower than AI_TIMEOUT_SECONDS (fallback latency)
+  - failing backend: circuit breaker short-circuiting after it opens
+
+Usage:
+    python scripts/benchmarks/bench_ai_summary.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add backend directory to path; keep the summary cache out of the repo
+backend_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'backend')
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("AI_SUMMARY_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "bench_cache.db"))
+
+import ai_service
+from llm_backends import StubBackend
+
+BURST = 64
+
+
+def student_data(i):
+    return {
+        "student_name": f"Student {i}",
+        "total_subjects": 6,
+        "current_semester": "2-1",
+        "average_percentage": 40 + i % 50,
+        "strong_subjects": [{"name": "Maths", "percentage": 81.0}],
+        "weak_subjects": [{"name": "Physics", "percentage": 42.0}],
+        "exam_trend": "stable",
+        "backlogs": i % 3,
+    }
+
+
+async def burst(summarizer, n):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(summarizer.agenerate_summary(student_data(i)) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    sources = {s: sum(1 for r in results if r["source"] == s) for s in ("ai", "fallback")}
+    return elapsed, sources
+
+
+def report(name, elapsed, sources, n, backend):
+    print(f"{name:<22} {elapsed * 1000:>9.1f}ms {n / elapsed:>9.1f}/s "
+          f"ai={sources['ai']:<4} fallback={sources['fallback']:<4} backend calls={backend.calls}")
+
+
+def main():
+    print("=" * 70)
+    print(f"AI SUMMARY BENCHMARK (burst={BURST}, concurrency={ai_service.AI_MAX_CONCURRENCY}, "
+          f"deadline={ai_service.AI_TIMEOUT_SECONDS}s)")
+    print("=" * 70)
+
+    backend = StubBackend(latency_seconds=0.2)
+    summarizer = ai_service.AIPerformanceSummarizer(backend=backend)
+    ai_service.get_summary_cache().clear()
+    report("cold burst", *asyncio.run(burst(summarizer, BURST)), BURST, backend)
+    report("warm burst (cached)", *asyncio.run(burst(summarizer, BURST)), BURST, backend)
+
+    ai_service.get_summary_cache().clear()
+    ai_service.AI_TIMEOUT_SECONDS = 0.5
+    backend = StubBackend(latency_seconds=2.0)
+    summarizer = ai_service.AIPerformanceSummarizer(backend=backend)
+    report("deadline (2s backend)", *asyncio.run(burst(summarizer, 8)), 8, backend)
+
+    time.sleep(2.0)  # let the abandoned slow calls drain from the AI executor
+    ai_service.get_circuit_breaker().reset()
+    backend = StubBackend(latency_seconds=0.05, failure_rate=1.0)
+    summarizer = ai_service.AIPerformanceSummarizer(backend=backend)
+    report("failing backend", *asyncio.run(burst(summarizer, BURST)), BURST, backend)
+    print(f"circuit breaker: {ai_service.get_circuit_breaker().snapshot()['state']}")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark - Analysis Engines (pandas vs NumPy)
+
+Compares analysis.analyze_performance and analysis.analyze_class_performance
+under both engines at 10, 1k and 1M mark rows.
+
+Usage:
+    python scripts/benchmarks/bench_analysis_engines.py
+"""
+
+import sys
+import os
+import random
+import time
+
+# Add backend directory to path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+import analysis
+
+SIZES = [10, 1_000, 1_000_000]
+SEMESTERS = ["1-1", "1-2", "2-1", "2-2", "3-1", "3-2", "4-1", "4-2"]
+
+
+def make_marks(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            "subject": f"Subject {rng.randint(0, 47)}",
+            "marks": rng.randint(0, 30),
+            "total": 30,
+            "semester": rng.choice(SEMESTERS),
+            "student_id": rng.randint(1, 70),
+        }
+        for _ in range(n)
+    ]
+
+
+def time_call(fn, repeat):
+    """Best-of-3 average seconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def main():
+    print("=" * 70)
+    print("ANALYSIS ENGINE BENCHMARK")
+    print("=" * 70)
+    print(f"{'rows':>10} {'function':<28} {'pandas':>11} {'numpy':>11} {'speedup':>8}")
+
+    for n in SIZES:
+        marks = make_marks(n)
+        repeat = max(1, 2000 // max(1, n // 10)) if n < 1_000_000 else 1
+
+        cases = [
+            ("analyze_performance",
+             lambda engine: analysis.analyze_performance(1, marks, 50.0, engine=engine)),
+            ("analyze_class_performance",
+             lambda engine: analysis.analyze_class_performance(marks, engine=engine)),
+        ]
+        for name, call in cases:
+            pandas_t = time_call(lambda: call("pandas"), repeat)
+            numpy_t = time_call(lambda: call("numpy"), repeat)
+            print(f"{n:>10} {name:<28} {pandas_t * 1000:>9.3f}ms {numpy_t * 1000:>9.3f}ms "
+                  f"{pandas_t / numpy_t:>7.1f}x")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
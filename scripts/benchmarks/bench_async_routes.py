@@ -0,0 +1,298 @@
+"""
+Benchmark - Async vs Sync Route Handlers Under Load
+
+Seeds a temporary SQLite database, starts uvicorn on it (production pragma
+profile, transcript cache disabled so every request reaches the database) and
+drives each ported endpoint with a fixed number of concurrent clients:
+
+  async: /student/marks, /student/analysis, /teacher/subject-offerings, /admin/stats
+  sync:  the same handlers as they were before the port (threadpool + blocking
+         Session), mounted under /bench/sync/... for the comparison
+
+Reports requests/sec, p50 and p99 latency per endpoint.
+
+Usage:
+    python scripts/benchmarks/bench_async_routes.py [concurrency] [requests_per_endpoint]
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add backend directory to path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_dir)
+
+STUDENTS = 200
+SUBJECTS = 8
+EXAM_TYPES = ["Mid-1", "Mid-2", "Semester"]
+
+
+def seed(url):
+    import database, models, auth
+
+    engine = database.create_database_engine(url)
+    database.Base.metadata.create_all(bind=engine)
+    Session = database.sessionmaker(bind=engine)
+    db = Session()
+    rng = random.Random(3)
+
+    institute = models.Institute(name="Bench Institute", location="Bench")
+    regulation = models.Regulation(code="R20", is_active=True)
+    db.add_all([institute, regulation])
+    db.flush()
+    dept = models.Department(name="Computer Science", code="CSE", institute_id=institute.id)
+    batch = models.Batch(admission_year=2022, regulation_id=regulation.id, institute_id=institute.id)
+    db.add_all([dept, batch])
+    db.flush()
+    semesters = [models.Semester(name=n, sequence=i + 1) for i, n in enumerate(["1-1", "1-2", "2-1", "2-2"])]
+    exam_types = [models.ExamType(name=n) for n in EXAM_TYPES]
+    section = models.Section(name="A", department_id=dept.id, batch_id=batch.id)
+    db.add_all(semesters + exam_types + [section, models.Settings(pass_percentage=40.0, weak_threshold=50.0)])
+    db.flush()
+
+    teacher_user = models.User(username="teacher@bench.edu", password_hash="x", role="teacher")
+    admin_user = models.User(username="admin", password_hash="x", role="admin")
+    db.add_all([teacher_user, admin_user])
+    db.flush()
+    teacher = models.Teacher(user_id=teacher_user.id, email=teacher_user.username, name="T", department_id=dept.id)
+    db.add(teacher)
+    db.flush()
+
+    sessions = {}
+    for sem in semesters:
+        for et in exam_types:
+            s = models.ExamSession(exam_type_id=et.id, semester_id=sem.id,
+                                   regulation_id=regulation.id, academic_year="2024-25")
+            db.add(s)
+            sessions[(sem.id, et.name)] = s
+    subjects = []
+    for i in range(SUBJECTS):
+        sem = semesters[i % len(semesters)]
+        subject = models.Subject(name=f"Subject {i}", code=f"S{i:02d}", department_id=dept.id,
+                                 semester_id=sem.id, teacher_id=teacher.id, regulation_id=regulation.id)
+        db.add(subject)
+        subjects.append(subject)
+    db.flush()
+    for subject in subjects:
+        db.add(models.SubjectOffering(subject_id=subject.id, section_id=section.id,
+                                      teacher_id=teacher.id, academic_year="2024-25"))
+
+    student_users = []
+    for i in range(STUDENTS):
+        user = models.User(username=f"22B{i:04d}", password_hash="x", role="student")
+        db.add(user)
+        db.flush()
+        student = models.Student(user_id=user.id, roll_number=user.username, name=f"Student {i}",
+                                 department_id=dept.id, current_semester_id=semesters[0].id,
+                                 batch_id=batch.id, section_id=section.id)
+        db.add(student)
+        db.flush()
+        for subject in subjects:
+            for et in EXAM_TYPES:
+                max_marks = 70.0 if et == "Semester" else 30.0
+                db.add(models.Marks(student_id=student.id, subject_id=subject.id, exam_type=et,
+                                    marks_obtained=float(rng.randint(0, int(max_marks))),
+                                    total_marks=max_marks, max_marks=max_marks,
+                                    exam_session_id=sessions[(subject.semester_id, et)].id))
+        student_users.append(user)
+    db.commit()
+
+    def token(user):
+        return auth.create_access_token({"sub": user.username, "role": user.role, "user_id": user.id})
+
+    tokens = {
+        "student": [token(u) for u in student_users],
+        "teacher": [token(teacher_user)],
+        "admin": [token(admin_user)],
+    }
+    db.close()
+    engine.dispose()
+    return tokens
+
+
+def serve(port):
+    """Server process: the real app plus the pre-port sync handlers under /bench/sync."""
+    from fastapi import Depends, HTTPException
+    from sqlalchemy.orm import Session
+    import uvicorn
+    import database, models, auth
+    from main import app
+    from transcript_cache import transcript_cache
+    from routers.student_router import build_transcript, build_analysis
+
+    def sync_student_marks(current_user: models.User = Depends(auth.get_current_active_user),
+                           db: Session = Depends(database.get_db)):
+        if current_user.role != models.UserRole.STUDENT:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        student = current_user.student_profile
+        transcript = transcript_cache.get(student.id, "transcript")
+        if transcript is None:
+            transcript = build_transcript(db, student.id)
+            transcript_cache.set(student.id, "transcript", transcript)
+        return transcript
+
+    def sync_student_analysis(current_user: models.User = Depends(auth.get_current_active_user),
+                              db: Session = Depends(database.get_db)):
+        if current_user.role != models.UserRole.STUDENT:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        student = current_user.student_profile
+        result = transcript_cache.get(student.id, "analysis")
+        if result is None:
+            result = build_analysis(db, student.id)
+            transcript_cache.set(student.id, "analysis", result)
+        return result
+
+    def sync_subject_offerings(current_user: models.User = Depends(auth.RoleChecker(["teacher"])),
+                               db: Session = Depends(database.get_db)):
+        from access_control import get_teacher_subject_offerings
+        result = []
+        for offering in get_teacher_subject_offerings(db, current_user.teacher_profile.id):
+            subject, section = offering.subject, offering.section
+            result.append({
+                "subject_offering_id": offering.id,
+                "subject": {"id": subject.id, "name": subject.name, "code": subject.code,
+                            "semester_id": subject.semester_id, "department_id": subject.department_id},
+                "section": {"id": section.id, "name": section.name},
+                "academic_year": offering.academic_year,
+                "semester_name": subject.semester.name,
+            })
+        return result
+
+    def sync_admin_stats(current_user: models.User = Depends(auth.RoleChecker(["admin"])),
+                         db: Session = Depends(database.get_db)):
+        return {
+            "students": db.query(models.Student).count(),
+            "teachers": db.query(models.Teacher).count(),
+            "departments": db.query(models.Department).count(),
+            "subjects": db.query(models.Subject).count(),
+            "batches": db.query(models.Batch).count(),
+            "sections": db.query(models.Section).count(),
+            "subject_offerings": db.query(models.SubjectOffering).count(),
+            "exam_sessions": db.query(models.ExamSession).count(),
+        }
+
+    app.add_api_route("/bench/sync/student/marks", sync_student_marks)
+    app.add_api_route("/bench/sync/student/analysis", sync_student_analysis)
+    app.add_api_route("/bench/sync/teacher/subject-offerings", sync_subject_offerings)
+    app.add_api_route("/bench/sync/admin/stats", sync_admin_stats)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=2048)
+
+
+async def load(base_url, path, tokens, concurrency, total):
+    import httpx
+
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        queue = iter(range(total))
+
+        async def worker():
+            nonlocal errors
+            for i in queue:
+                headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {"rps": len(latencies) / elapsed, "p50": pct(0.50), "p99": pct(0.99), "errors": errors}
+
+
+def wait_for_server(port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Benchmark server did not start")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+
+    workdir = tempfile.mkdtemp(prefix="bench_async_")
+    url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "SQLITE_PROFILE": "production",
+        "TRANSCRIPT_CACHE_SIZE": "0",
+        "AI_SUMMARY_CACHE_PATH": os.path.join(workdir, "ai_cache.db"),
+    }
+    os.environ.update(env)
+    tokens = seed(url)
+
+    port = free_port()
+    server_log = open(os.path.join(workdir, "server.log"), "w")
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)],
+                              env=env, stdout=server_log, stderr=subprocess.STDOUT)
+    try:
+        wait_for_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+        cases = [
+            ("/student/marks", "student"),
+            ("/student/analysis", "student"),
+            ("/teacher/subject-offerings", "teacher"),
+            ("/admin/stats", "admin"),
+        ]
+
+        print("=" * 84)
+        print(f"ASYNC ROUTE BENCHMARK ({concurrency} concurrent clients, {total} requests per run)")
+        print("=" * 84)
+        print(f"{'endpoint':<28} {'mode':<6} {'req/s':>9} {'p50':>10} {'p99':>10} {'errors':>7}")
+        for path, role in cases:
+            for mode, prefix in (("sync", "/bench/sync"), ("async", "")):
+                # Warm-up: imports, pools and principal cache, outside the measurement
+                asyncio.run(load(base_url, prefix + path, tokens[role], 10, len(tokens[role])))
+                r = asyncio.run(load(base_url, prefix + path, tokens[role], concurrency, total))
+                print(f"{path:<28} {mode:<6} {r['rps']:>9.0f} {r['p50']:>8.1f}ms {r['p99']:>8.1f}ms "
+                      f"{r['errors']:>7}")
+        print("=" * 84)
+    finally:
+        server.terminate()
+        server.wait()
+        server_log.close()
+        with open(os.path.join(workdir, "server.log")) as f:
+            failures = sum(1 for line in f if line.startswith("ERROR:"))
+        if failures:
+            print(f"server logged {failures} failed requests (pool timeouts under load)")
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        os.chdir(backend_dir)
+        serve(int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,154 @@
+"""
+Benchmark - SQLite Read Throughput Under Concurrent Writes
+
+Runs reader threads (per-student marks aggregate, the query behind the
+student analysis pages) while writer threads insert marks in 500-row
+committed chunks, the way a marks upload does. Compares SQLite's stock
+settings ("default") with database.py's "production" profile (WAL,
+synchronous=NORMAL, larger cache, mmap, busy timeout).
+
+Each profile runs on a fresh temporary database file; the bundled database is
+never touched.
+
+Usage:
+    python scripts/benchmarks/bench_sqlite_concurrency.py [seconds] [readers] [writers]
+"""
+
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Add backend directory to path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import OperationalError
+
+import database
+import models  # noqa: F401  (registers tables on Base)
+
+STUDENTS = 2_000
+SEED_MARKS = 200_000
+CHUNK = 500
+EXAM_TYPES = ["Mid-1", "Mid-2", "Semester"]
+
+READ_SQL = text(
+    "SELECT subject_id, exam_type, AVG(marks_obtained * 100.0 / total_marks) "
+    "FROM marks WHERE student_id = :student_id GROUP BY subject_id, exam_type"
+)
+
+
+def marks_rows(rng, n):
+    return [
+        {
+            "student_id": rng.randint(1, STUDENTS),
+            "subject_id": rng.randint(1, 48),
+            "exam_type": rng.choice(EXAM_TYPES),
+            "marks_obtained": float(rng.randint(0, 30)),
+            "total_marks": 30.0,
+            "max_marks": 30.0,
+        }
+        for _ in range(n)
+    ]
+
+
+def seed(engine):
+    database.Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        for _ in range(SEED_MARKS // CHUNK):
+            conn.execute(insert(models.Marks), marks_rows(rng, CHUNK))
+        # Per-student lookups are what the analysis pages do
+        conn.execute(text("CREATE INDEX IF NOT EXISTS bench_marks_student ON marks (student_id)"))
+
+
+def run_profile(profile, seconds, readers, writers):
+    workdir = tempfile.mkdtemp(prefix="bench_sqlite_")
+    engine = database.create_sqlite_engine(
+        f"sqlite:///{os.path.join(workdir, 'bench.db')}", profile=profile,
+        pool_size=readers + writers, max_overflow=0,
+    )
+    try:
+        seed(engine)
+        stop = threading.Event()
+        lock = threading.Lock()
+        read_latencies, stats = [], {"writes": 0, "read_errors": 0, "write_errors": 0}
+
+        def reader(seed_value):
+            rng = random.Random(seed_value)
+            local = []
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(READ_SQL, {"student_id": rng.randint(1, STUDENTS)}).fetchall()
+                    local.append(time.perf_counter() - start)
+                except OperationalError:
+                    with lock:
+                        stats["read_errors"] += 1
+            with lock:
+                read_latencies.extend(local)
+
+        def writer(seed_value):
+            rng = random.Random(seed_value)
+            while not stop.is_set():
+                rows = marks_rows(rng, CHUNK)
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(models.Marks), rows)
+                    with lock:
+                        stats["writes"] += 1
+                except OperationalError:
+                    # "database is locked"
+                    with lock:
+                        stats["write_errors"] += 1
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        latencies = sorted(read_latencies)
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+        return {
+            "reads_per_s": len(latencies) / seconds,
+            "read_p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+            "read_p95_ms": p95 * 1000,
+            "read_max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+            "chunks_per_s": stats["writes"] / seconds,
+            "errors": stats["read_errors"] + stats["write_errors"],
+        }
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    print("=" * 78)
+    print(f"SQLITE CONCURRENCY BENCHMARK ({readers} readers, {writers} writers x {CHUNK}-row chunks, "
+          f"{seconds:.0f}s)")
+    print("=" * 78)
+    print(f"{'profile':<12} {'reads/s':>9} {'p50':>9} {'p95':>9} {'max':>10} {'chunks/s':>9} {'locked':>7}")
+    for profile in ("default", "production"):
+        r = run_profile(profile, seconds, readers, writers)
+        print(f"{profile:<12} {r['reads_per_s']:>9.0f} {r['read_p50_ms']:>7.2f}ms {r['read_p95_ms']:>7.2f}ms "
+              f"{r['read_max_ms']:>8.1f}ms {r['chunks_per_s']:>9.1f} {r['errors']:>7}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
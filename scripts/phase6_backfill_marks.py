@@ -19,14 +19,12 @@ import os
 backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
 sys.path.insert(0, backend_dir)
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 
+# Same database as the app: DATABASE_URL, or the bundled SQLite file
+from database import engine
 
-# Create engine
-db_path = os.path.join(backend_dir, 'performance_analyzer.db')
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 Session = sessionmaker(bind=engine)
 
 